@@ -1,17 +1,58 @@
+from contextlib import asynccontextmanager
+import asyncio
+import time
+
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import uvicorn
 
 from .modules.shared.config import settings
+from .modules.shared.startup import startup_report
 from .modules.chatbot import router as chatbot_router
 from .modules.avatar import router as avatar_router
+from .modules.assistant import router as assistant_router
+from .modules.avatar.tts import tts_manager
+from .modules.avatar.lipsync import lipsync_manager
+from .modules.avatar.prewarm import phrase_warmer
+from .modules.chatbot.llm import llm_manager
+from .modules.chatbot.rag import rag_system
+
+startup_report.record("app", "import", time.perf_counter() - _import_started)
+
+
+async def _warm_up():
+    """Construct managers off the event loop so first requests don't pay for it"""
+    for manager in (tts_manager, lipsync_manager, llm_manager, rag_system):
+        try:
+            await asyncio.to_thread(manager.get)
+        except Exception as exc:
+            print(f"⚠️  Warm-up failed for {manager!r}: {exc}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Optionally warm up managers and the TTS cache in the background; release resources on exit"""
+    warm_up_task = asyncio.create_task(_warm_up()) if settings.warm_up else None
+    prewarm_task = asyncio.create_task(phrase_warmer.run()) if settings.tts_prewarm_manifest else None
+    yield
+    for task in (warm_up_task, prewarm_task):
+        if task is not None:
+            task.cancel()
+    if tts_manager.is_initialized:
+        await tts_manager.aclose()
+    if rag_system.is_initialized:
+        rag_system.close()
+
 
 # Create FastAPI app
 app = FastAPI(
     title="AI Avatar Chatbot API",
     description="Modular API for RAG chatbot with talking avatar",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -26,6 +67,7 @@ app.add_middleware(
 # Include routers
 app.include_router(chatbot_router)
 app.include_router(avatar_router)
+app.include_router(assistant_router)
 
 
 @app.get("/")
@@ -37,6 +79,7 @@ async def root():
         "endpoints": {
             "chatbot": "/api/chatbot",
             "avatar": "/api/avatar",
+            "assistant": "/api/assistant",
             "docs": "/docs"
         }
     }
@@ -49,8 +92,10 @@ async def health():
         "status": "healthy",
         "modules": {
             "chatbot": "active",
-            "avatar": "active"
-        }
+            "avatar": "active",
+            "assistant": "active"
+        },
+        "startup": startup_report.as_dict()
     }
 
 
@@ -0,0 +1,166 @@
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from typing import Optional, Tuple
+import asyncio
+
+from ..shared.config import settings
+from ..shared.text import SentenceBuffer
+from ..chatbot.llm import llm_manager
+from ..chatbot.rag import rag_system
+from ..avatar.tts import tts_manager
+from ..avatar.lipsync import lipsync_manager
+from ..avatar.protocol import (
+    VISEME_FORMATS,
+    negotiate_subprotocol,
+    send_speech,
+    wants_binary,
+)
+
+router = APIRouter(prefix="/api/assistant", tags=["assistant"])
+
+
+async def _ask_and_speak(
+    websocket: WebSocket,
+    send_lock: asyncio.Lock,
+    query: str,
+    context: str,
+    provider: str,
+    binary: bool,
+    viseme_format: str,
+):
+    """
+    Stream LLM tokens and speak each sentence as soon as it closes
+
+    A producer reads the LLM stream, forwards tokens and hands each
+    completed sentence to a synthesizer, which starts its TTS. A consumer
+    sends sentences' audio and visemes in order as their synthesis
+    finishes, so sentence N plays while the LLM is still writing sentence
+    N+1. The ready queue bounds how far synthesis runs ahead of delivery;
+    tokens are never held back by it.
+    """
+    splitter = SentenceBuffer(
+        max_chars=settings.tts_stream_segment_chars,
+        min_chars=settings.tts_stream_min_segment_chars,
+    )
+    sentences: "asyncio.Queue[Optional[Tuple[int, str]]]" = asyncio.Queue()
+    ready: "asyncio.Queue[Optional[Tuple[int, str, asyncio.Task]]]" = asyncio.Queue(
+        maxsize=max(1, settings.tts_stream_lookahead)
+    )
+    pending = []
+    response_parts = []
+
+    async def produce():
+        index = 0
+        try:
+            async for chunk in llm_manager.stream_response(query, context, provider):
+                response_parts.append(chunk)
+                async with send_lock:
+                    await websocket.send_json({"type": "token", "content": chunk})
+                for sentence in splitter.feed(chunk):
+                    sentences.put_nowait((index, sentence))
+                    index += 1
+            for sentence in splitter.flush():
+                sentences.put_nowait((index, sentence))
+                index += 1
+        finally:
+            sentences.put_nowait(None)  # Unbounded, so this never blocks teardown
+
+    async def synthesize():
+        while True:
+            item = await sentences.get()
+            if item is None:
+                break
+            index, sentence = item
+            task = asyncio.create_task(tts_manager.text_to_speech_with_duration_async(sentence))
+            pending.append(task)
+            await ready.put((index, sentence, task))
+        await ready.put(None)
+
+    async def consume() -> Tuple[int, float]:
+        offset = 0.0
+        count = 0
+        while True:
+            item = await ready.get()
+            if item is None:
+                return count, offset
+            index, sentence, task = item
+            audio, duration = await task
+            timeline = lipsync_manager.build_timeline(sentence, duration=duration)
+            async with send_lock:
+                await send_speech(
+                    websocket,
+                    index=index,
+                    text=sentence,
+                    offset=offset,
+                    duration=duration,
+                    timeline=timeline,
+                    audio=audio,
+                    binary=binary,
+                    viseme_format=viseme_format,
+                )
+            offset += duration
+            count += 1
+
+    producer = asyncio.create_task(produce())
+    synthesizer = asyncio.create_task(synthesize())
+    try:
+        segments, total_duration = await consume()
+        await producer
+    finally:
+        stages = [producer, synthesizer, *pending]
+        for task in stages:
+            task.cancel()
+        # Let cancelled stages and syntheses unwind instead of leaking them
+        await asyncio.gather(*stages, return_exceptions=True)
+
+    async with send_lock:
+        await websocket.send_json({
+            "type": "complete",
+            "response": "".join(response_parts),
+            "segments": segments,
+            "duration": total_duration
+        })
+
+
+@router.websocket("/ask")
+async def websocket_ask_and_speak(websocket: WebSocket):
+    """
+    Answer a question and speak the answer over one WebSocket
+
+    Send ``{"query": ..., "use_rag": false, "provider": "gemini"}``. The
+    server streams ``token`` messages as the LLM writes, ``segment``
+    messages (text, audio, visemes, offset) for each finished sentence, and
+    ``complete`` with the full response. Supports the same binary
+    subprotocol and ``viseme_format`` option as ``/api/avatar/stream``.
+    """
+    subprotocol = negotiate_subprotocol(websocket)
+    await websocket.accept(subprotocol=subprotocol)
+    binary = wants_binary(websocket, subprotocol)
+    send_lock = asyncio.Lock()
+
+    try:
+        while True:
+            data = await websocket.receive_json()
+            query = data.get("query", "")
+            provider = data.get("provider", "gemini")
+            use_rag = data.get("use_rag", False)
+            viseme_format = data.get("viseme_format", "list")
+
+            if not query:
+                await websocket.send_json({"error": "No query provided"})
+                continue
+            if viseme_format not in VISEME_FORMATS:
+                await websocket.send_json({"error": f"Unknown viseme_format '{viseme_format}'"})
+                continue
+
+            context = ""
+            if use_rag:
+                context = await rag_system.retrieve_context(query)
+
+            await _ask_and_speak(
+                websocket, send_lock, query, context, provider, binary, viseme_format
+            )
+
+    except WebSocketDisconnect:
+        print("Assistant WebSocket disconnected")
+    except Exception as e:
+        await websocket.send_json({"error": str(e)})
@@ -0,0 +1,69 @@
+import asyncio
+import base64
+from typing import AsyncIterator, Dict, List, Optional
+
+from ..shared.config import settings
+from .lipsync import lipsync_manager
+from .protocol import viseme_payload
+from .tts import LongFormSpeech, tts_manager
+
+
+def speech_payload(
+    speech: LongFormSpeech,
+    return_audio: bool = True,
+    return_visemes: bool = True,
+    viseme_format: str = "list",
+) -> Dict:
+    """Response fields for synthesized speech, as returned by ``/speak``"""
+    payload: Dict = {}
+    if return_audio:
+        payload["audio_base64"] = base64.b64encode(speech.audio).decode("utf-8")
+    if return_visemes:
+        # Time visemes from each chunk's measured duration and offset
+        timeline = lipsync_manager.build_chunked_timeline(speech.chunks, speech.duration)
+        payload.update(viseme_payload(timeline, viseme_format))
+        payload["duration"] = speech.duration
+    return payload
+
+
+async def speak_batch(
+    texts: List[str],
+    return_audio: bool = True,
+    return_visemes: bool = True,
+    viseme_format: str = "list",
+    concurrency: Optional[int] = None,
+) -> AsyncIterator[Dict]:
+    """
+    Synthesize many utterances concurrently, yielding each as it finishes.
+
+    At most ``concurrency`` items (default ``tts_batch_concurrency``) are in
+    progress at once. Items are yielded in completion order and carry their
+    ``index`` in ``texts``; a failed item yields an ``error`` instead of
+    ending the batch. Unfinished items are cancelled if the consumer stops.
+    """
+    limiter = asyncio.Semaphore(max(1, concurrency or settings.tts_batch_concurrency))
+
+    async def render(index: int, text: str) -> Dict:
+        async with limiter:
+            try:
+                speech = await tts_manager.text_to_speech_long_async(text)
+                return {
+                    "type": "item",
+                    "index": index,
+                    **speech_payload(speech, return_audio, return_visemes, viseme_format),
+                }
+            except Exception as e:
+                return {"type": "item", "index": index, "error": str(e)}
+
+    tasks = [asyncio.create_task(render(index, text)) for index, text in enumerate(texts)]
+    failed = 0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            result = await next_done
+            failed += "error" in result
+            yield result
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    yield {"type": "complete", "count": len(texts), "failed": failed}
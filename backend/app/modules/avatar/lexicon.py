@@ -0,0 +1,329 @@
+"""
+Word -> phoneme lookup for lip sync.
+
+Pronunciations are ARPAbet phonemes (CMUdict symbols, stress removed)
+packed as one byte per phoneme. A small built-in lexicon covers the most
+frequent irregular English words. The full CMUdict is loaded from
+``lipsync_lexicon_path`` or, when that is unset, from the ``cmudict``
+package if it is installed. Unknown words go through letter-to-sound
+rules, which are only approximate: without a full dictionary most words
+take that path (``source`` says which dictionary is active).
+"""
+import importlib.util
+import io
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# ARPAbet inventory; a phoneme's code is its index in this tuple
+PHONEMES: Tuple[str, ...] = (
+    "sil",
+    "aa", "ae", "ah", "ao", "aw", "ay", "eh", "er", "ey", "ih", "iy",
+    "ow", "oy", "uh", "uw",
+    "b", "ch", "d", "dh", "f", "g", "hh", "jh", "k", "l", "m", "n", "ng",
+    "p", "r", "s", "sh", "t", "th", "v", "w", "y", "z", "zh",
+)
+PHONEME_CODES: Dict[str, int] = {symbol: code for code, symbol in enumerate(PHONEMES)}
+
+# Frequent words whose spelling the rules below get wrong (CMUdict, no stress)
+_CORE_LEXICON = """
+a AH
+about AH B AW T
+after AE F T ER
+again AH G EH N
+all AO L
+also AO L S OW
+any EH N IY
+are AA R
+as AE Z
+ask AE S K
+be B IY
+because B IH K AH Z
+been B IH N
+both B OW TH
+build B IH L D
+busy B IH Z IY
+buy B AY
+by B AY
+can K AE N
+come K AH M
+could K UH D
+do D UW
+does D AH Z
+done D AH N
+door D AO R
+eight EY T
+enough IH N AH F
+every EH V R IY
+eye AY
+five F AY V
+four F AO R
+friend F R EH N D
+from F R AH M
+give G IH V
+go G OW
+good G UH D
+great G R EY T
+have HH AE V
+he HH IY
+hello HH AH L OW
+help HH EH L P
+here HH IY R
+hi HH AY
+how HH AW
+i AY
+is IH Z
+know N OW
+laugh L AE F
+live L IH V
+love L AH V
+many M EH N IY
+me M IY
+money M AH N IY
+move M UW V
+my M AY
+nine N AY N
+no N OW
+none N AH N
+now N AW
+of AH V
+office AO F AH S
+okay OW K EY
+one W AH N
+only OW N L IY
+other AH DH ER
+our AW ER
+people P IY P AH L
+please P L IY Z
+put P UH T
+question K W EH S CH AH N
+said S EH D
+says S EH Z
+see S IY
+seven S EH V AH N
+she SH IY
+should SH UH D
+six S IH K S
+some S AH M
+sorry S AA R IY
+sure SH UH R
+thank TH AE NG K
+thanks TH AE NG K S
+that DH AE T
+the DH AH
+their DH EH R
+them DH EH M
+then DH EH N
+there DH EH R
+these DH IY Z
+they DH EY
+this DH IH S
+those DH OW Z
+three TH R IY
+to T UW
+today T AH D EY
+two T UW
+very V EH R IY
+was W AA Z
+water W AO T ER
+we W IY
+welcome W EH L K AH M
+were W ER
+what W AH T
+when W EH N
+where W EH R
+which W IH CH
+who HH UW
+whole HH OW L
+why W AY
+will W IH L
+with W IH DH
+woman W UH M AH N
+women W IH M AH N
+word W ER D
+work W ER K
+would W UH D
+yes Y EH S
+you Y UW
+your Y AO R
+zero Z IH R OW
+"""
+
+_DIGIT_WORDS = ("zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine")
+
+# Letter-to-sound rules, tried longest grapheme first at each position
+_GRAPHEME_RULES: Dict[str, Tuple[str, ...]] = {
+    "tion": ("sh", "ah", "n"), "sion": ("zh", "ah", "n"),
+    "ough": ("ao",), "eigh": ("ey",),
+    "tch": ("ch",), "sch": ("s", "k"), "igh": ("ay",), "dge": ("jh",),
+    "ph": ("f",), "th": ("th",), "sh": ("sh",), "ch": ("ch",), "ck": ("k",),
+    "ng": ("ng",), "qu": ("k", "w"), "wh": ("w",), "wr": ("r",), "kn": ("n",),
+    "gh": (), "ee": ("iy",), "ea": ("iy",), "oo": ("uw",), "ou": ("aw",),
+    "ow": ("ow",), "oi": ("oy",), "oy": ("oy",), "ai": ("ey",), "ay": ("ey",),
+    "au": ("ao",), "aw": ("ao",), "ie": ("iy",), "ei": ("ey",), "ue": ("uw",),
+    "ew": ("uw",), "er": ("er",), "ir": ("er",), "ur": ("er",), "ar": ("aa", "r"),
+    "or": ("ao", "r"), "oa": ("ow",),
+    "a": ("ae",), "b": ("b",), "c": ("k",), "d": ("d",), "e": ("eh",),
+    "f": ("f",), "g": ("g",), "h": ("hh",), "i": ("ih",), "j": ("jh",),
+    "k": ("k",), "l": ("l",), "m": ("m",), "n": ("n",), "o": ("aa",),
+    "p": ("p",), "q": ("k",), "r": ("r",), "s": ("s",), "t": ("t",),
+    "u": ("ah",), "v": ("v",), "w": ("w",), "x": ("k", "s"), "y": ("y",),
+    "z": ("z",),
+}
+_MAX_GRAPHEME = max(len(g) for g in _GRAPHEME_RULES)
+_VOWEL_LETTERS = frozenset("aeiouy")
+# Magic-e words: vowel + single consonant + final "e" -> long vowel
+_LONG_VOWELS = {"a": ("ey",), "e": ("iy",), "i": ("ay",), "o": ("ow",), "u": ("uw",)}
+
+_WORD_CHARS = re.compile(r"[^a-z0-9']+")
+
+
+def _encode(phonemes: Iterable[str]) -> bytes:
+    return bytes(PHONEME_CODES[p] for p in phonemes if p in PHONEME_CODES)
+
+
+class PronunciationLexicon:
+    """Packed word -> phoneme-code dict with a rule-based fallback."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._entries: Dict[str, bytes] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.source = "builtin"  # "file", "cmudict" or "builtin" (core words + rules)
+        self.stats: Dict[str, int] = {"lexicon_hits": 0, "rule_fallbacks": 0}
+
+    # ---------------------------------------------------------------- loading
+
+    def _load_lines(self, lines: Iterable[str]) -> int:
+        count = 0
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith(";;;"):
+                continue
+            word, _, pronunciation = line.partition(" ")
+            word = word.lower()
+            if word.endswith(")"):
+                continue  # Alternate pronunciation, e.g. "read(2)"
+            symbols = [re.sub(r"\d", "", p).lower() for p in pronunciation.split()]
+            self._entries[word] = _encode(symbols)
+            count += 1
+        return count
+
+    def load(self) -> None:
+        """Load the lexicon once; safe to call repeatedly"""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self._load_lines(_CORE_LEXICON.splitlines())
+            if self.path:
+                try:
+                    with open(self.path, "r", encoding="latin-1") as fh:
+                        count = self._load_lines(fh)
+                    self.source = "file"
+                    print(f"📖 Loaded {count} pronunciations from {self.path}")
+                except OSError as exc:
+                    print(f"⚠️  Could not load pronunciation lexicon: {exc}")
+            elif importlib.util.find_spec("cmudict") is not None:
+                import cmudict
+                with io.TextIOWrapper(cmudict.dict_stream(), encoding="latin-1") as fh:
+                    count = self._load_lines(fh)
+                self.source = "cmudict"
+                print(f"📖 Loaded {count} pronunciations from the cmudict package")
+            if self.source == "builtin":
+                print("⚠️  No pronunciation dictionary; lip sync uses letter-to-sound rules for most words")
+            self._loaded = True
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ----------------------------------------------------------------- lookup
+
+    @staticmethod
+    def normalize(word: str) -> str:
+        return _WORD_CHARS.sub("", word.lower()).strip("'")
+
+    def phoneme_codes(self, word: str) -> bytes:
+        """Phoneme codes for one word (lexicon first, then rules)"""
+        self.load()
+        word = self.normalize(word)
+        if not word:
+            return b""
+
+        codes = self._entries.get(word)
+        if codes is not None:
+            self.stats["lexicon_hits"] += 1
+            return codes
+
+        if word.isdigit():
+            return b"".join(self.phoneme_codes(_DIGIT_WORDS[int(d)]) for d in word)
+
+        # Possessives / contractions of known words: "avatar's", "we'll"
+        base, _, suffix = word.partition("'")
+        if suffix and base in self._entries:
+            tail = {"s": ("z",), "ll": ("l",), "re": ("er",), "ve": ("v",), "d": ("d",), "t": ("t",), "m": ("m",)}
+            return self._entries[base] + _encode(tail.get(suffix, ()))
+
+        self.stats["rule_fallbacks"] += 1
+        return _encode(self.rule_phonemes(word))
+
+    def phonemes(self, word: str) -> List[str]:
+        return [PHONEMES[code] for code in self.phoneme_codes(word)]
+
+    @staticmethod
+    def rule_phonemes(word: str) -> List[str]:
+        """Greedy longest-match letter-to-sound rules"""
+        word = word.replace("'", "")
+        phonemes: List[str] = []
+        length = len(word)
+
+        # Silent final "e" that lengthens the previous vowel (make, time, home)
+        magic_e = (
+            length >= 3 and word[-1] == "e"
+            and word[-2] not in _VOWEL_LETTERS and word[-3] in _LONG_VOWELS
+        )
+        if magic_e:
+            length -= 1
+
+        # Syllabic final "-le" after a consonant (table, simple)
+        syllabic_le = (
+            not magic_e and length >= 3 and word.endswith("le")
+            and word[-3] not in _VOWEL_LETTERS
+        )
+        if syllabic_le:
+            length -= 2
+
+        i = 0
+        while i < length:
+            char = word[i]
+            if magic_e and i == length - 2 and char in _LONG_VOWELS:
+                phonemes.extend(_LONG_VOWELS[char])
+                i += 1
+                continue
+            # Soft c / g before e, i, y
+            if char in "cg" and i + 1 < len(word) and word[i + 1] in "eiy":
+                phonemes.append("s" if char == "c" else "jh")
+                i += 1
+                continue
+            # Double consonants sound once
+            if i > 0 and char == word[i - 1] and char not in _VOWEL_LETTERS:
+                i += 1
+                continue
+            # "y" is a vowel except at the start of a word
+            if char == "y" and i > 0:
+                phonemes.append("iy" if i == length - 1 else "ih")
+                i += 1
+                continue
+            for size in range(min(_MAX_GRAPHEME, length - i), 0, -1):
+                rule = _GRAPHEME_RULES.get(word[i:i + size])
+                if rule is not None:
+                    phonemes.extend(rule)
+                    i += size
+                    break
+            else:
+                i += 1  # Unknown character
+        if syllabic_le:
+            phonemes.extend(("ah", "l"))
+        return phonemes
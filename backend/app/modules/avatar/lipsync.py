@@ -1,5 +1,119 @@
-from typing import List, Dict
+from array import array
+from bisect import bisect_right
+from functools import lru_cache
+from typing import List, Dict, Optional, Sequence, Tuple, Union
+import base64
 import re
+import struct
+import sys
+
+from ..shared.config import settings
+from ..shared.lazy import LazyInstance
+from .lexicon import PHONEMES, PronunciationLexicon
+
+_TIMELINE_HEADER = struct.Struct(">fI")
+
+
+class VisemeTimeline:
+    """
+    Viseme sequence stored as parallel arrays instead of one dict per viseme.
+
+    ``ids`` holds uint8 viseme ids and ``starts`` their start times in
+    seconds; each viseme lasts until the next start (the last one until
+    ``duration``). Lookups are O(log n) by bisection.
+    """
+
+    __slots__ = ("ids", "starts", "duration")
+
+    def __init__(
+        self,
+        ids: Optional[array] = None,
+        starts: Optional[array] = None,
+        duration: float = 0.0,
+    ):
+        self.ids = ids if ids is not None else array("B")
+        self.starts = starts if starts is not None else array("d")
+        self.duration = duration
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def viseme_at(self, time: float) -> int:
+        """Viseme id active at ``time`` (silence outside the timeline)"""
+        index = bisect_right(self.starts, time) - 1
+        if index < 0 or time >= self.duration:
+            return 0
+        return self.ids[index]
+
+    def to_list(self) -> List[Dict]:
+        """Legacy format: [{"viseme": int, "start": float, "duration": float}, ...]"""
+        ids, starts = self.ids, self.starts
+        ends = list(starts[1:])
+        ends.append(self.duration)
+        return [
+            {"viseme": viseme, "start": start, "duration": end - start}
+            for viseme, start, end in zip(ids, starts, ends)
+        ]
+
+    def _start_deltas(self) -> array:
+        """uint16 start deltas in ms, taken between rounded absolute times"""
+        deltas = array("H")
+        previous = 0
+        for start in self.starts:
+            current = round(start * 1000)
+            deltas.append(min(max(current - previous, 0), 0xFFFF))
+            previous = current
+        return deltas
+
+    @classmethod
+    def concat(cls, parts: List[Tuple[float, "VisemeTimeline"]], duration: float) -> "VisemeTimeline":
+        """
+        Join timelines placed at the given start offsets
+
+        Gaps between parts (e.g. encoder delay at clip joins) are silence.
+        """
+        ids = array("B")
+        starts = array("d")
+        for offset, part in parts:
+            while starts and starts[-1] >= offset:
+                ids.pop()  # Trailing silence (or overlap) the next part replaces
+                starts.pop()
+            ids.extend(part.ids)
+            starts.extend(offset + start for start in part.starts)
+            if offset + part.duration < duration:
+                ids.append(0)
+                starts.append(offset + part.duration)
+        return cls(ids, starts, duration)
+
+    def to_compact(self) -> Dict:
+        """
+        Compact wire encoding.
+
+        ``ids`` is the base64 of the uint8 id list and ``deltas`` the base64
+        of little-endian uint16 start deltas in milliseconds (the first delta
+        is the first start). Deltas are taken between rounded absolute times
+        so the decoded timeline does not drift.
+        """
+        deltas = self._start_deltas()
+        if sys.byteorder == "big":
+            deltas.byteswap()
+        return {
+            "format": "delta-ms-v1",
+            "count": len(self.ids),
+            "duration": self.duration,
+            "ids": base64.b64encode(self.ids.tobytes()).decode("ascii"),
+            "deltas": base64.b64encode(deltas.tobytes()).decode("ascii"),
+        }
+
+    def to_bytes(self) -> bytes:
+        """
+        Binary encoding: big-endian float32 duration, uint32 count, then
+        ``count`` uint8 ids and ``count`` big-endian uint16 start deltas (ms)
+        """
+        deltas = self._start_deltas()
+        if sys.byteorder == "little":
+            deltas.byteswap()
+        return _TIMELINE_HEADER.pack(self.duration, len(self.ids)) + self.ids.tobytes() + deltas.tobytes()
 
 
 class LipSyncManager:
@@ -43,7 +157,20 @@ class LipSyncManager:
         'ch': 7, 'jh': 7, 'ng': 1, 'hh': 1,
     }
     
-    def __init__(self):
+    def __init__(self, lexicon: Optional[PronunciationLexicon] = None):
+        self.lexicon = lexicon or PronunciationLexicon(settings.lipsync_lexicon_path or None)
+
+        # Phoneme code -> viseme id, applied to a whole word with bytes.translate
+        table = bytearray(256)
+        for code, symbol in enumerate(PHONEMES):
+            table[code] = self.PHONEME_TO_VISEME.get(symbol, 0)
+        self._phoneme_viseme_table = bytes(table)
+
+        # A word seen before costs one cache lookup
+        self._word_visemes = lru_cache(maxsize=settings.lipsync_word_cache_size)(
+            self._lookup_word_visemes
+        )
+
         self.viseme_names = [
             'silence',      # 0
             'open',         # 1 - A, E sounds
@@ -59,8 +186,8 @@ class LipSyncManager:
         """
         Convert text to viseme sequence with timing
         
-        This is a simplified implementation. For production use,
-        integrate with phoneme extraction tools like:
+        Words are converted via the pronunciation lexicon and timing is
+        estimated per word. For forced alignment, integrate with tools like:
         - Rhubarb Lip Sync
         - Montreal Forced Aligner
         - Festival/CMU Flite
@@ -72,71 +199,63 @@ class LipSyncManager:
         Returns:
             List of viseme data: [{"viseme": int, "start": float, "duration": float}, ...]
         """
+        return self.build_timeline(text, duration).to_list()
+
+    def build_timeline(self, text: str, duration: float = None) -> VisemeTimeline:
+        """
+        Convert text to a VisemeTimeline without per-viseme allocations
+
+        Words are mapped through the pronunciation lexicon (cached per
+        word). Each word gets an equal share of the duration, split evenly
+        across its visemes.
+        """
         # Simple word-based timing estimation
         words = text.split()
         
         if not words:
-            return [{"viseme": 0, "start": 0.0, "duration": 0.5}]
+            return VisemeTimeline(array("B", [0]), array("d", [0.0]), 0.5)
         
         # Estimate duration if not provided (rough: 150 words per minute)
         if duration is None:
             duration = len(words) * 0.4  # ~0.4 seconds per word
         
         time_per_word = duration / len(words)
-        viseme_sequence = []
-        current_time = 0.0
+        ids = array("B")
+        starts = array("d")
+        word_start = 0.0
         
         for word in words:
-            # Estimate visemes for word (simplified)
-            word_visemes = self._estimate_word_visemes(word.lower())
-            time_per_viseme = time_per_word / max(len(word_visemes), 1)
-            
-            for viseme in word_visemes:
-                viseme_sequence.append({
-                    "viseme": viseme,
-                    "start": current_time,
-                    "duration": time_per_viseme
-                })
-                current_time += time_per_viseme
+            word_visemes = self._word_visemes(word.lower())
+            step = time_per_word / len(word_visemes)
+            ids.frombytes(word_visemes)
+            starts.extend([word_start + step * i for i in range(len(word_visemes))])
+            word_start += time_per_word
         
-        return viseme_sequence
+        return VisemeTimeline(ids, starts, duration)
     
-    def _estimate_word_visemes(self, word: str) -> List[int]:
+    def build_chunked_timeline(
+        self,
+        chunks: Sequence[Tuple[str, float, float]],
+        duration: float,
+    ) -> VisemeTimeline:
+        """Timeline for stitched audio from (text, offset, duration) per chunk"""
+        if len(chunks) == 1 and chunks[0][1] == 0.0:
+            return self.build_timeline(chunks[0][0], duration=duration)
+        parts = [
+            (offset, self.build_timeline(text, duration=chunk_duration))
+            for text, offset, chunk_duration in chunks
+        ]
+        return VisemeTimeline.concat(parts, duration)
+
+    def _lookup_word_visemes(self, word: str) -> bytes:
         """
-        Estimate visemes for a word based on simple rules
-        This is a very basic implementation - use proper phoneme tools for production
+        Viseme ids (one per byte) for a word from its phonemes
+
+        Words without any pronounceable characters map to silence.
         """
-        visemes = []
-        
-        # Simple vowel/consonant detection
-        vowels = 'aeiou'
-        
-        for char in word:
-            if char in vowels:
-                if char in 'ae':
-                    visemes.append(1)  # open
-                elif char in 'i':
-                    visemes.append(2)  # smile
-                elif char in 'o':
-                    visemes.append(3)  # round
-                elif char in 'u':
-                    visemes.append(4)  # pursed
-            else:
-                if char in 'mbp':
-                    visemes.append(5)  # closed
-                elif char in 'fv':
-                    visemes.append(6)  # teeth_lip
-                elif char in 'szth':
-                    visemes.append(7)  # teeth
-                else:
-                    visemes.append(1)  # neutral open
-        
-        # Add silence between some consonants
-        if len(visemes) > 3:
-            visemes.insert(len(visemes) // 2, 0)
-        
-        return visemes if visemes else [0]
-    
+        visemes = self.lexicon.phoneme_codes(word).translate(self._phoneme_viseme_table)
+        return visemes if visemes else b"\x00"
+
     def phonemes_to_visemes(self, phonemes: List[Dict]) -> List[Dict]:
         """
         Convert phoneme sequence to viseme sequence
@@ -150,7 +269,8 @@ class LipSyncManager:
         viseme_sequence = []
         
         for phoneme_data in phonemes:
-            phoneme = phoneme_data.get('phoneme', 'sil').lower()
+            # Accept CMUdict-style stress markers ("AH0")
+            phoneme = re.sub(r'\d', '', phoneme_data.get('phoneme', 'sil')).lower()
             start = phoneme_data.get('start', 0.0)
             end = phoneme_data.get('end', 0.0)
             
@@ -166,8 +286,26 @@ class LipSyncManager:
         
         return viseme_sequence
     
-    def get_viseme_at_time(self, viseme_sequence: List[Dict], time: float) -> int:
+    def get_status(self) -> Dict[str, object]:
+        cache = self._word_visemes.cache_info()
+        return {
+            "lexicon_source": self.lexicon.source,
+            "lexicon_words": len(self.lexicon),
+            "word_cache_size": cache.currsize,
+            "word_cache_hits": cache.hits,
+            "word_cache_misses": cache.misses,
+            **self.lexicon.stats,
+        }
+
+    def get_viseme_at_time(
+        self,
+        viseme_sequence: Union[VisemeTimeline, List[Dict]],
+        time: float,
+    ) -> int:
         """Get the viseme index at a specific time"""
+        if isinstance(viseme_sequence, VisemeTimeline):
+            return viseme_sequence.viseme_at(time)
+
         for viseme_data in viseme_sequence:
             start = viseme_data['start']
             end = start + viseme_data['duration']
@@ -179,6 +317,6 @@ class LipSyncManager:
 
 
 # Global lip sync manager instance
-lipsync_manager = LipSyncManager()
+lipsync_manager = LazyInstance(LipSyncManager, "lipsync")
 
 
@@ -0,0 +1,154 @@
+"""
+Local speech synthesis, run inside worker processes.
+
+Two engines, both producing MP3 so local clips are interchangeable with
+Resemble's everywhere downstream (cache metadata, duration parsing, the
+websocket protocol):
+
+* ``coqui``  - Coqui TTS with ``settings.tts_model`` (loaded once per worker,
+  by the pool initializer ``load_engine``)
+* ``espeak`` - espeak-ng / espeak, near-instant but robotic
+
+WAV output is encoded with ffmpeg (libmp3lame).
+"""
+import importlib.util
+import multiprocessing
+import os
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+ENGINES = ("coqui", "espeak")
+
+_coqui_models: Dict[str, object] = {}
+
+
+def _espeak_binary() -> Optional[str]:
+    return shutil.which("espeak-ng") or shutil.which("espeak")
+
+
+def detect_engine(preferred: str = "auto") -> Optional[str]:
+    """Best available engine, or None (ffmpeg is required for all of them)"""
+    if preferred == "off" or not shutil.which("ffmpeg"):
+        return None
+    candidates = ENGINES if preferred == "auto" else (preferred,)
+    for engine in candidates:
+        if engine == "coqui" and importlib.util.find_spec("TTS") is not None:
+            return engine
+        if engine == "espeak" and _espeak_binary():
+            return engine
+    return None
+
+
+def _run(args, data: bytes, timeout: float) -> bytes:
+    result = subprocess.run(
+        args, input=data, capture_output=True, timeout=timeout if timeout > 0 else None
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{os.path.basename(args[0])} failed: {result.stderr.decode(errors='replace')[:200]}")
+    return result.stdout
+
+
+def _espeak_wav(text: str, voice: str, rate: int, timeout: float) -> bytes:
+    return _run(
+        [_espeak_binary(), "-v", voice, "-s", str(rate), "--stdin", "--stdout"],
+        text.encode("utf-8"),
+        timeout,
+    )
+
+
+def _raise_timeout(signum, frame):
+    raise TimeoutError("Coqui TTS synthesis timed out")
+
+
+@contextmanager
+def _deadline(timeout: float):
+    """
+    Interrupt in-process work after ``timeout`` seconds (pool workers only).
+
+    Uses SIGALRM, so it needs the main thread of a worker process; a model
+    stuck inside native code is killed by ``LocalBackend`` instead.
+    """
+    if (
+        timeout <= 0
+        or multiprocessing.parent_process() is None
+        or threading.current_thread() is not threading.main_thread()
+    ):
+        yield
+        return
+    previous = signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _coqui_model(model: str):
+    tts = _coqui_models.get(model)
+    if tts is None:
+        from TTS.api import TTS
+        tts = TTS(model_name=model, progress_bar=False).to("cpu")
+        _coqui_models[model] = tts
+    return tts
+
+
+def load_engine(engine: str, model: str) -> None:
+    """Pool initializer: load the Coqui model before any synthesis deadline runs"""
+    if engine == "coqui":
+        _coqui_model(model)
+
+
+def ready() -> None:
+    """No-op task used to wait until a pool's workers have initialized"""
+
+
+def _coqui_wav(text: str, model: str, timeout: float) -> bytes:
+    tts = _coqui_model(model)
+
+    fd, path = tempfile.mkstemp(suffix=".wav")
+    os.close(fd)
+    try:
+        with _deadline(timeout):
+            tts.tts_to_file(text=text, file_path=path)
+        with open(path, "rb") as f:
+            return f.read()
+    finally:
+        os.unlink(path)
+
+
+def wav_to_mp3(wav: bytes, bitrate: str, timeout: float) -> bytes:
+    return _run(
+        [
+            shutil.which("ffmpeg"), "-hide_banner", "-loglevel", "error",
+            "-f", "wav", "-i", "pipe:0",
+            "-map_metadata", "-1", "-codec:a", "libmp3lame", "-b:a", bitrate,
+            "-f", "mp3", "pipe:1",
+        ],
+        wav,
+        timeout,
+    )
+
+
+def synthesize(
+    text: str,
+    engine: str,
+    model: str,
+    voice: str,
+    rate: int,
+    bitrate: str,
+    timeout: float,
+) -> bytes:
+    """Synthesize ``text`` to MP3 bytes (top-level so process pools can pickle it)"""
+    if engine == "coqui":
+        wav = _coqui_wav(text, model, timeout)
+    elif engine == "espeak":
+        wav = _espeak_wav(text, voice, rate, timeout)
+    else:
+        raise ValueError(f"Unknown local TTS engine '{engine}'")
+    return wav_to_mp3(wav, bitrate, timeout)
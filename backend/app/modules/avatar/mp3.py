@@ -0,0 +1,342 @@
+"""
+In-memory MPEG audio frame parser.
+
+Reads MP3 frame headers straight from bytes (no temp files, no mutagen) and
+returns exact duration, average bitrate and the byte offset of every audio
+frame. Xing/Info (with the LAME gapless tag) and VBRI headers are honoured.
+"""
+import struct
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Bitrates in kbps indexed by [version_key][layer][bitrate_index]
+_BITRATES = {
+    1: {
+        1: (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+        2: (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+        3: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    },
+    2: {
+        1: (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+        2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+        3: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    },
+}
+
+_SAMPLE_RATES = {
+    1.0: (44100, 48000, 32000),
+    2.0: (22050, 24000, 16000),
+    2.5: (11025, 12000, 8000),
+}
+
+# Header version bits -> MPEG version (0b01 is reserved)
+_VERSIONS = {0b00: 2.5, 0b10: 2.0, 0b11: 1.0}
+# Header layer bits -> layer number (0b00 is reserved)
+_LAYERS = {0b01: 3, 0b10: 2, 0b11: 1}
+
+
+class MP3Error(ValueError):
+    """Raised when bytes do not contain a decodable MPEG audio stream."""
+
+
+@dataclass
+class FrameHeader:
+    version: float
+    layer: int
+    bitrate: int  # bits per second
+    sample_rate: int
+    padding: int
+    channels: int
+    frame_length: int
+    samples_per_frame: int
+
+    @property
+    def side_info_length(self) -> int:
+        if self.version == 1.0:
+            return 17 if self.channels == 1 else 32
+        return 9 if self.channels == 1 else 17
+
+
+@dataclass
+class MP3Info:
+    duration: float  # seconds, gapless-trimmed when a LAME tag is present
+    bitrate: int  # average bits per second of the audio frames
+    sample_rate: int
+    channels: int
+    version: float
+    layer: int
+    samples_per_frame: int
+    frame_count: int
+    audio_start: int  # offset of the first audio frame (after ID3v2 / Xing)
+    audio_end: int  # end of the last complete audio frame
+    vbr: bool = False
+    encoder_delay: int = 0
+    encoder_padding: int = 0
+    frame_offsets: array = field(default_factory=lambda: array("I"), repr=False)
+
+    def to_meta(self) -> Dict[str, object]:
+        """Scalar metadata suitable for a JSON index (frame offsets excluded)."""
+        return {
+            "duration": self.duration,
+            "bitrate": self.bitrate,
+            "sample_rate": self.sample_rate,
+            "channels": self.channels,
+            "version": self.version,
+            "layer": self.layer,
+            "samples_per_frame": self.samples_per_frame,
+            "frame_count": self.frame_count,
+            "audio_start": self.audio_start,
+            "audio_end": self.audio_end,
+            "vbr": self.vbr,
+            "encoder_delay": self.encoder_delay,
+            "encoder_padding": self.encoder_padding,
+        }
+
+    @classmethod
+    def from_meta(cls, meta: Dict[str, object]) -> Optional["MP3Info"]:
+        """Rebuild from ``to_meta`` output; None if fields are missing (older metadata)."""
+        fields = {name: meta[name] for name in cls.__dataclass_fields__ if name in meta}
+        try:
+            return cls(**fields)
+        except TypeError:
+            return None
+
+
+def parse_header(data: bytes, offset: int) -> Optional[FrameHeader]:
+    """Decode the 4-byte frame header at ``offset`` or return None."""
+    if offset + 4 > len(data):
+        return None
+    b0, b1, b2, b3 = data[offset], data[offset + 1], data[offset + 2], data[offset + 3]
+    if b0 != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+
+    version = _VERSIONS.get((b1 >> 3) & 0b11)
+    layer = _LAYERS.get((b1 >> 1) & 0b11)
+    bitrate_index = (b2 >> 4) & 0x0F
+    sample_rate_index = (b2 >> 2) & 0b11
+    if version is None or layer is None or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None  # Reserved values, or free-format which we do not support
+
+    bitrate = _BITRATES[1 if version == 1.0 else 2][layer][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version][sample_rate_index]
+    padding = (b2 >> 1) & 1
+    channels = 1 if (b3 >> 6) == 0b11 else 2
+
+    if layer == 1:
+        samples_per_frame = 384
+        frame_length = (12 * bitrate // sample_rate + padding) * 4
+    elif layer == 2 or version == 1.0:
+        samples_per_frame = 1152
+        frame_length = 144 * bitrate // sample_rate + padding
+    else:
+        samples_per_frame = 576
+        frame_length = 72 * bitrate // sample_rate + padding
+
+    return FrameHeader(
+        version=version,
+        layer=layer,
+        bitrate=bitrate,
+        sample_rate=sample_rate,
+        padding=padding,
+        channels=channels,
+        frame_length=frame_length,
+        samples_per_frame=samples_per_frame,
+    )
+
+
+def skip_id3v2(data: bytes) -> int:
+    """Return the offset just past any leading ID3v2 tags."""
+    offset = 0
+    while len(data) >= offset + 10 and data[offset:offset + 3] == b"ID3":
+        flags = data[offset + 5]
+        size_bytes = data[offset + 6:offset + 10]
+        size = 0
+        for byte in size_bytes:
+            size = (size << 7) | (byte & 0x7F)
+        offset += 10 + size + (10 if flags & 0x10 else 0)  # footer present
+    return offset
+
+
+def _find_first_frame(data: bytes, start: int) -> Tuple[int, FrameHeader]:
+    """Locate the first header that is followed by another valid header."""
+    offset = data.find(b"\xff", start)
+    while offset != -1 and offset + 4 <= len(data):
+        header = parse_header(data, offset)
+        if header is not None:
+            following = offset + header.frame_length
+            if following >= len(data):
+                return offset, header  # Single-frame stream
+            nxt = parse_header(data, following)
+            if nxt is not None and nxt.version == header.version and nxt.layer == header.layer:
+                return offset, header
+        offset = data.find(b"\xff", offset + 1)
+    raise MP3Error("No MPEG audio frame found")
+
+
+def _read_info_frame(data: bytes, offset: int, header: FrameHeader) -> Optional[Dict[str, int]]:
+    """Decode a Xing/Info or VBRI header frame, if the frame is one."""
+    # Reads are confined to the frame so a truncated header cannot run past it
+    frame = data[offset:offset + header.frame_length]
+    try:
+        return _decode_info_frame(frame, header)
+    except struct.error as exc:
+        raise MP3Error(f"Truncated Xing/VBRI header frame: {exc}") from exc
+
+
+def _decode_info_frame(frame: bytes, header: FrameHeader) -> Optional[Dict[str, int]]:
+    xing_at = 4 + header.side_info_length
+    tag = frame[xing_at:xing_at + 4]
+    if tag in (b"Xing", b"Info"):
+        result: Dict[str, int] = {"vbr": tag == b"Xing"}
+        (flags,) = struct.unpack_from(">I", frame, xing_at + 4)
+        cursor = xing_at + 8
+        if flags & 0x1:
+            (result["frames"],) = struct.unpack_from(">I", frame, cursor)
+            cursor += 4
+        if flags & 0x2:
+            (result["bytes"],) = struct.unpack_from(">I", frame, cursor)
+            cursor += 4
+        if flags & 0x4:
+            cursor += 100  # Seek TOC
+        if flags & 0x8:
+            cursor += 4  # Quality
+        # LAME extension: encoder delay/padding (12 bits each) at +21
+        if frame[cursor:cursor + 4] in (b"LAME", b"Lavf", b"Lavc"):
+            raw = frame[cursor + 21:cursor + 24]
+            if len(raw) == 3:
+                result["delay"] = (raw[0] << 4) | (raw[1] >> 4)
+                result["padding"] = ((raw[1] & 0x0F) << 8) | raw[2]
+        return result
+
+    vbri_at = 4 + 32
+    if frame[vbri_at:vbri_at + 4] == b"VBRI":
+        delay, _quality, total_bytes, frames = struct.unpack_from(">HHII", frame, vbri_at + 6)
+        return {"vbr": True, "frames": frames, "bytes": total_bytes, "delay": delay}
+    return None
+
+
+def parse_mp3(data: bytes) -> MP3Info:
+    """
+    Parse MP3 bytes and return exact timing and frame layout.
+
+    Every frame header is visited (headers only, frames are skipped by
+    length), so ``frame_offsets`` is always complete. Duration uses the
+    Xing/VBRI frame count when present and the scanned count otherwise,
+    minus LAME encoder delay and padding.
+    """
+    if not isinstance(data, bytes):
+        data = bytes(data)
+    start, first = _find_first_frame(data, skip_id3v2(data))
+
+    info_frame = _read_info_frame(data, start, first)
+    offsets = array("I")
+    offset = start
+    if info_frame is not None:
+        offset += first.frame_length  # The info frame carries no audio
+
+    audio_start = offset
+    end = len(data)
+    samples = 0
+    while offset + 4 <= end:
+        header = parse_header(data, offset)
+        if header is None or header.version != first.version or header.layer != first.layer:
+            break  # Trailing ID3v1/APE tag or garbage
+        if offset + header.frame_length > end:
+            break  # Truncated final frame
+        offsets.append(offset)
+        samples += header.samples_per_frame
+        offset += header.frame_length
+
+    if not offsets:
+        raise MP3Error("MP3 stream contains no complete audio frames")
+
+    audio_end = offset
+    frame_count = len(offsets)
+    delay = padding = 0
+    vbr = False
+    if info_frame is not None:
+        vbr = bool(info_frame.get("vbr"))
+        if info_frame.get("frames"):
+            samples = info_frame["frames"] * first.samples_per_frame
+        delay = info_frame.get("delay", 0)
+        padding = info_frame.get("padding", 0)
+    else:
+        vbr = any(parse_header(data, o).bitrate != first.bitrate for o in offsets[:: max(1, frame_count // 16)])
+
+    trimmed = samples - delay - padding
+    if trimmed <= 0:
+        trimmed = samples
+    duration = trimmed / first.sample_rate
+    raw_duration = samples / first.sample_rate
+    bitrate = int((audio_end - audio_start) * 8 / raw_duration) if raw_duration else first.bitrate
+
+    return MP3Info(
+        duration=duration,
+        bitrate=bitrate,
+        sample_rate=first.sample_rate,
+        channels=first.channels,
+        version=first.version,
+        layer=first.layer,
+        samples_per_frame=first.samples_per_frame,
+        frame_count=frame_count,
+        audio_start=audio_start,
+        audio_end=audio_end,
+        vbr=vbr,
+        encoder_delay=delay,
+        encoder_padding=padding,
+        frame_offsets=offsets,
+    )
+
+
+@dataclass
+class StitchedMP3:
+    audio: bytes
+    duration: float  # seconds from the start of the stream to the end of the last clip's speech
+    offsets: List[float]  # where each clip's speech starts in the stream
+    durations: List[float]  # each clip's gapless-trimmed duration
+
+
+def concat_mp3(
+    clips: Sequence[bytes],
+    infos: Optional[Sequence[Optional[MP3Info]]] = None,
+) -> StitchedMP3:
+    """
+    Join MP3 clips at frame boundaries without re-encoding.
+
+    Each clip is cut to its audio frames, dropping ID3 tags and the
+    Xing/Info frame (whose frame count would describe only the first clip).
+    The clips must share sample rate, channel count, MPEG version and
+    layer; bitrates may differ. Offsets account for each clip's encoder
+    delay, which stays in the stream once the LAME tag is gone. ``infos``
+    may supply already-known metadata per clip (None entries are parsed).
+    """
+    parts: List[bytes] = []
+    offsets: List[float] = []
+    durations: List[float] = []
+    first: Optional[MP3Info] = None
+    elapsed = 0.0
+    end = 0.0
+
+    for i, data in enumerate(clips):
+        info = infos[i] if infos is not None and infos[i] is not None else parse_mp3(data)
+        if first is None:
+            first = info
+        elif (info.sample_rate, info.channels, info.version, info.layer) != (
+            first.sample_rate, first.channels, first.version, first.layer
+        ):
+            raise MP3Error(
+                f"Cannot join {info.sample_rate}Hz/{info.channels}ch clip "
+                f"to {first.sample_rate}Hz/{first.channels}ch stream"
+            )
+
+        parts.append(data[info.audio_start:info.audio_end])
+        start = elapsed + info.encoder_delay / info.sample_rate
+        offsets.append(start)
+        durations.append(info.duration)
+        end = start + info.duration
+        elapsed += info.frame_count * info.samples_per_frame / info.sample_rate
+
+    if first is None:
+        raise MP3Error("No clips to join")
+    return StitchedMP3(b"".join(parts), end, offsets, durations)
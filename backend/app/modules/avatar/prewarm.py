@@ -0,0 +1,127 @@
+import asyncio
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+from ..shared.config import settings
+from .lipsync import lipsync_manager
+from .tts import tts_manager
+
+
+def load_phrases(path: str) -> List[str]:
+    """
+    Read a phrase manifest: a JSON list of strings (or ``{"phrases": [...]}``)
+    for ``.json`` files, otherwise one phrase per line with ``#`` comments.
+    """
+    with open(path, "r", encoding="utf-8") as fh:
+        raw = fh.read()
+
+    if path.endswith(".json"):
+        data = json.loads(raw)
+        if isinstance(data, dict):
+            data = data.get("phrases", [])
+        phrases = [str(item) for item in data]
+    else:
+        phrases = [line for line in raw.splitlines() if not line.lstrip().startswith("#")]
+
+    # Strip blanks and duplicates, keeping manifest order
+    return list(dict.fromkeys(phrase.strip() for phrase in phrases if phrase.strip()))
+
+
+class PhraseWarmer:
+    """
+    Background task that synthesizes common phrases into the TTS cache.
+
+    Phrases are rendered one at a time, no faster than ``tts_prewarm_rate``
+    per second. Each chunk of a phrase is synthesized on its own and only
+    while no live synthesis is in flight, so warming never competes with
+    visitors for Resemble or the local pool. Each phrase's audio and duration land in
+    the TTS cache and its words in the lip-sync cache.
+    """
+
+    def __init__(self) -> None:
+        self.state: str = "idle"
+        self.total: int = 0
+        self.stats: Dict[str, int] = {"cached": 0, "synthesized": 0, "failed": 0}
+        self.error: Optional[str] = None
+        self._started: Optional[float] = None
+        self._finished: Optional[float] = None
+
+    @property
+    def done(self) -> int:
+        return sum(self.stats.values())
+
+    async def _wait_for_idle(self) -> None:
+        """Yield to live traffic: hold off while other syntheses are running"""
+        while tts_manager.in_flight > 0:
+            await asyncio.sleep(0.25)
+
+    async def run(self, path: Optional[str] = None) -> None:
+        path = path or settings.tts_prewarm_manifest
+        if not path or not os.path.exists(path):
+            self.state = "disabled"
+            return
+
+        try:
+            phrases = await asyncio.to_thread(load_phrases, path)
+            await asyncio.to_thread(tts_manager.get)
+            await asyncio.to_thread(lipsync_manager.get)
+        except Exception as exc:
+            self.state, self.error = "failed", str(exc)
+            print(f"⚠️  TTS pre-warm failed to start: {exc}")
+            return
+
+        if not (tts_manager.primary.available or tts_manager.local.available):
+            self.state, self.error = "unavailable", "No TTS backend available"
+            return
+
+        self.state = "running"
+        self.total = len(phrases)
+        self._started = time.monotonic()
+        interval = 1.0 / settings.tts_prewarm_rate if settings.tts_prewarm_rate > 0 else 0.0
+        print(f"🔥 Pre-warming {self.total} phrases from {path}")
+
+        for phrase in phrases:
+            pending = tts_manager.uncached_chunks(phrase)
+            if not pending:
+                self.stats["cached"] += 1
+                continue
+
+            started = time.monotonic()
+            try:
+                for chunk in pending:
+                    await self._wait_for_idle()
+                    await tts_manager.text_to_speech_async(chunk)
+                # Every chunk is cached now, so this only stitches
+                speech = await tts_manager.text_to_speech_long_async(phrase)
+                lipsync_manager.build_chunked_timeline(speech.chunks, speech.duration)
+                self.stats["synthesized"] += 1
+            except Exception as exc:
+                self.stats["failed"] += 1
+                self.error = str(exc)
+                print(f"⚠️  Pre-warm failed for {phrase[:40]!r}: {exc}")
+
+            await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+        self.state = "done"
+        self._finished = time.monotonic()
+        print(f"✅ Pre-warm done: {self.stats['synthesized']} synthesized, "
+              f"{self.stats['cached']} already cached, {self.stats['failed']} failed")
+
+    def status(self) -> Dict[str, object]:
+        elapsed = None
+        if self._started is not None:
+            elapsed = round((self._finished or time.monotonic()) - self._started, 2)
+        return {
+            "state": self.state,
+            "total": self.total,
+            "done": self.done,
+            **self.stats,
+            "elapsed": elapsed,
+            "error": self.error,
+        }
+
+
+# Global pre-warm task state
+phrase_warmer = PhraseWarmer()
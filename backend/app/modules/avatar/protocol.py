@@ -0,0 +1,105 @@
+"""
+Wire formats for avatar speech over WebSocket.
+
+Two protocols are supported on the same endpoint:
+
+* JSON (default): every message is a JSON text frame and audio is base64.
+* Binary (``avatar.binary.v1``): negotiated with the WebSocket subprotocol
+  header (or ``?protocol=binary``). Control messages stay JSON text frames,
+  while audio and viseme timelines are sent as binary frames, each
+  prefixed with a 12-byte header::
+
+      magic "AV" | version u8 | type u8 | segment u16 | flags u16 | length u32
+
+  AUDIO payloads are the raw MP3 bytes. VISEMES payloads are a float32
+  segment offset followed by ``VisemeTimeline.to_bytes()``. All integers
+  are big-endian.
+"""
+import base64
+import struct
+from typing import Dict, Optional
+
+from fastapi import WebSocket
+
+from .lipsync import VisemeTimeline
+
+BINARY_SUBPROTOCOL = "avatar.binary.v1"
+VISEME_FORMATS = ("list", "compact")
+
+MAGIC = b"AV"
+VERSION = 1
+FRAME_AUDIO = 1
+FRAME_VISEMES = 2
+
+_HEADER = struct.Struct(">2sBBHHI")
+_OFFSET = struct.Struct(">f")
+
+
+def negotiate_subprotocol(websocket: WebSocket) -> Optional[str]:
+    """Subprotocol to accept, if the client offered the binary one"""
+    offered = websocket.scope.get("subprotocols") or []
+    return BINARY_SUBPROTOCOL if BINARY_SUBPROTOCOL in offered else None
+
+
+def wants_binary(websocket: WebSocket, subprotocol: Optional[str]) -> bool:
+    return subprotocol == BINARY_SUBPROTOCOL or websocket.query_params.get("protocol") == "binary"
+
+
+def pack_frame(frame_type: int, index: int, payload: bytes, flags: int = 0) -> bytes:
+    return _HEADER.pack(MAGIC, VERSION, frame_type, index & 0xFFFF, flags, len(payload)) + payload
+
+
+def pack_audio_frame(index: int, audio: bytes) -> bytes:
+    return pack_frame(FRAME_AUDIO, index, audio)
+
+
+def pack_viseme_frame(index: int, offset: float, timeline: VisemeTimeline) -> bytes:
+    return pack_frame(FRAME_VISEMES, index, _OFFSET.pack(offset) + timeline.to_bytes())
+
+
+def viseme_payload(timeline: VisemeTimeline, viseme_format: str) -> Dict:
+    """Serialize a timeline under the JSON key matching the requested format"""
+    if viseme_format == "compact":
+        return {"visemes_compact": timeline.to_compact()}
+    return {"visemes": timeline.to_list()}
+
+
+async def send_speech(
+    websocket: WebSocket,
+    *,
+    index: int,
+    text: str,
+    offset: float,
+    duration: float,
+    timeline: VisemeTimeline,
+    audio: bytes,
+    binary: bool,
+    viseme_format: str = "list",
+    extra: Optional[Dict] = None,
+) -> None:
+    """
+    Send one segment of speech.
+
+    JSON clients get a single ``segment`` message. Binary clients get the
+    same message without audio/visemes, followed by a VISEMES frame and an
+    AUDIO frame carrying the same segment index.
+    """
+    message = {
+        "type": "segment",
+        "index": index,
+        "text": text,
+        "offset": offset,
+        "duration": duration,
+        **(extra or {}),
+    }
+    if binary:
+        await websocket.send_json({**message, "binary": True})
+        await websocket.send_bytes(pack_viseme_frame(index, offset, timeline))
+        await websocket.send_bytes(pack_audio_frame(index, audio))
+        return
+
+    await websocket.send_json({
+        **message,
+        **viseme_payload(timeline, viseme_format),
+        "audio": base64.b64encode(audio).decode("utf-8"),
+    })
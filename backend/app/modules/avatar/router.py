@@ -1,12 +1,25 @@
-from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
-from fastapi.responses import Response
-from pydantic import BaseModel
-from typing import Optional, List, Dict
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import BinaryIO, Optional, List, Dict, Literal, Tuple
 import asyncio
-import base64
+import json
 
 from .tts import tts_manager
 from .lipsync import lipsync_manager
+from .protocol import (
+    VISEME_FORMATS,
+    negotiate_subprotocol,
+    pack_audio_frame,
+    pack_viseme_frame,
+    send_speech,
+    viseme_payload,
+    wants_binary,
+)
+from .streaming import synthesize_segments
+from .batch import speak_batch, speech_payload
+from .prewarm import phrase_warmer
+from ..shared.config import settings
 
 router = APIRouter(prefix="/api/avatar", tags=["avatar"])
 
@@ -15,11 +28,20 @@ class SpeakRequest(BaseModel):
     text: str
     return_audio: bool = True
     return_visemes: bool = True
+    viseme_format: Literal["list", "compact"] = "list"  # "compact": delta-coded arrays
+
+
+class SpeakBatchRequest(BaseModel):
+    texts: List[str] = Field(..., min_length=1, max_length=settings.tts_batch_max_items)
+    return_audio: bool = True
+    return_visemes: bool = True
+    viseme_format: Literal["list", "compact"] = "list"
 
 
 class SpeakResponse(BaseModel):
     audio_base64: Optional[str] = None
     visemes: Optional[List[Dict]] = None
+    visemes_compact: Optional[Dict] = None
     duration: Optional[float] = None
 
 
@@ -33,22 +55,15 @@ async def speak(request: SpeakRequest):
     try:
         response_data = {}
 
-        audio_base64: str = ""
-        visemes_payload: List[Dict] = []
-
         if request.return_audio or request.return_visemes:
-            # Generate audio bytes and get actual duration
-            audio_bytes, actual_duration = tts_manager.text_to_speech_with_duration(request.text)
-            audio_base64 = base64.b64encode(audio_bytes).decode("utf-8")
-
-            if request.return_audio:
-                response_data["audio_base64"] = audio_base64
-
-            if request.return_visemes:
-                # Use actual audio duration for accurate viseme timing
-                visemes_payload = lipsync_manager.text_to_visemes(request.text, duration=actual_duration)
-                response_data["visemes"] = visemes_payload
-                response_data["duration"] = actual_duration
+            # Long text is synthesized in chunks and stitched into one clip
+            speech = await tts_manager.text_to_speech_long_async(request.text)
+            response_data = speech_payload(
+                speech,
+                request.return_audio,
+                request.return_visemes,
+                request.viseme_format,
+            )
 
         return SpeakResponse(**response_data)
     
@@ -56,32 +71,203 @@ async def speak(request: SpeakRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/speak-audio")
-async def speak_audio(request: SpeakRequest):
+@router.post("/speak-batch")
+async def speak_batch_endpoint(request: SpeakBatchRequest):
     """
-    Generate speech audio only and return as WAV file
+    Synthesize many utterances concurrently
+
+    Streams NDJSON: one ``{"type": "item", "index": ...}`` line per text as
+    soon as it finishes (``/speak`` fields, or ``error`` if that item
+    failed), then ``{"type": "complete", "count": ..., "failed": ...}``.
+    At most ``tts_batch_concurrency`` items are synthesized at once.
     """
+    async def lines():
+        async for result in speak_batch(
+            request.texts,
+            return_audio=request.return_audio,
+            return_visemes=request.return_visemes,
+            viseme_format=request.viseme_format,
+        ):
+            yield json.dumps(result) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+def _parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Single ``bytes=`` range as inclusive (start, end); None serves the whole clip"""
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None  # Multi-range requests get the full clip
+    first, _, last = header[len("bytes="):].strip().partition("-")
     try:
-        audio_data = tts_manager.text_to_speech(request.text)
-        
-        return Response(
-            content=audio_data,
-            media_type="audio/mpeg",
-            headers={
-                "Content-Disposition": "attachment; filename=speech.mp3"
-            }
+        if first:
+            start, end = int(first), int(last) if last else size - 1
+        else:
+            start, end = size - int(last), size - 1  # Suffix range: last N bytes
+    except ValueError:
+        return None
+
+    start, end = max(start, 0), min(end, size - 1)
+    if start > end:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
         )
-    
+    return start, end
+
+
+async def _read_file(fh: BinaryIO, length: int, chunk_size: int = 64 * 1024):
+    """Stream ``length`` bytes from an open file without blocking the loop"""
+    try:
+        while length > 0:
+            data = await asyncio.to_thread(fh.read, min(chunk_size, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+    finally:
+        fh.close()
+
+
+async def _prepend(first: bytes, rest):
+    yield first
+    async for piece in rest:
+        yield piece
+
+
+async def _speak_audio(text: str, http_request: Request) -> Response:
+    headers = {
+        "Content-Disposition": "attachment; filename=speech.mp3",
+        "Cache-Control": f"public, max-age={settings.tts_audio_max_age}",
+    }
+
+    # Cache hit: serve the file with a content-hash ETag, 304s and ranges.
+    # Local-tier audio is a stand-in until Resemble recovers, so downstream
+    # caches must not keep it (and it gets no validator to revalidate with)
+    clip = await asyncio.to_thread(tts_manager.cached_clip, text)
+    if clip is not None:
+        headers["Accept-Ranges"] = "bytes"
+        if clip.local:
+            headers["Cache-Control"] = "no-store"
+        else:
+            headers["ETag"] = f'"{clip.etag}"'
+            if _etag_matches(http_request.headers.get("if-none-match"), headers["ETag"]):
+                return Response(status_code=304, headers=headers)
+
+        byte_range = None
+        if_range = http_request.headers.get("if-range")
+        if if_range is None or if_range == headers.get("ETag"):
+            byte_range = _parse_range(http_request.headers.get("range"), clip.size)
+
+        try:
+            fh = open(clip.path, "rb")  # Stays readable even if evicted mid-stream
+        except OSError:
+            clip = None
+        else:
+            start, end = byte_range or (0, clip.size - 1)
+            fh.seek(start)
+            headers["Content-Length"] = str(end - start + 1)
+            status_code = 200
+            if byte_range is not None:
+                headers["Content-Range"] = f"bytes {start}-{end}/{clip.size}"
+                status_code = 206
+            return StreamingResponse(
+                _read_file(fh, end - start + 1),
+                status_code=status_code,
+                media_type="audio/mpeg",
+                headers=headers,
+            )
+
+    # Miss: pass the provider download through while it is cached
+    served = []
+    stream = tts_manager.stream_speech(text, on_backend=served.append)
+    try:
+        first = await stream.__anext__()  # Surface provider errors as a 500
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    if served and served[0] is tts_manager.local:
+        headers["Cache-Control"] = "no-store"
+    return StreamingResponse(_prepend(first, stream), media_type="audio/mpeg", headers=headers)
+
+
+@router.get("/speak-audio")
+async def speak_audio_get(text: str, http_request: Request):
+    """
+    Speech audio as MP3, cacheable by browsers and CDNs
+
+    Cached clips are streamed from disk with a content-hash ``ETag`` (so
+    repeats get ``304 Not Modified``) and honour ``Range`` for seeking.
+    Uncached clips are streamed while they download from the provider.
+    Audio from the local fallback engine is sent ``no-store`` without an ETag.
+    """
+    return await _speak_audio(text, http_request)
+
+
+@router.post("/speak-audio")
+async def speak_audio(request: SpeakRequest, http_request: Request):
+    """
+    Generate speech audio only and return as an MP3 file (see the GET form)
+    """
+    return await _speak_audio(request.text, http_request)
+
+
+async def _stream_segments(
+    websocket: WebSocket,
+    text: str,
+    binary: bool,
+    viseme_format: str = "list"
+):
+    """Send each sentence's audio and visemes as soon as it is synthesized"""
+    segment_count = 0
+    total_duration = 0.0
+
+    async for segment in synthesize_segments(text):
+        await send_speech(
+            websocket,
+            index=segment.index,
+            text=segment.text,
+            offset=segment.offset,
+            duration=segment.duration,
+            timeline=segment.timeline,
+            audio=segment.audio,
+            binary=binary,
+            viseme_format=viseme_format,
+        )
+        segment_count += 1
+        total_duration = segment.offset + segment.duration
+
+    await websocket.send_json({
+        "type": "complete",
+        "segments": segment_count,
+        "duration": total_duration
+    })
 
 
 @router.websocket("/stream")
 async def websocket_avatar_stream(websocket: WebSocket):
     """
     WebSocket endpoint for streaming avatar speech and animation data
+
+    Send ``{"text": ..., "mode": "stream"}`` to receive the reply sentence by
+    sentence as ``segment`` messages (audio, visemes and offset from the
+    measured duration of earlier segments) followed by ``complete``.
+    Without ``mode`` the whole clip is sent as ``visemes`` then ``audio``.
+    Add ``"viseme_format": "compact"`` for delta-coded viseme arrays.
+
+    Clients offering the ``avatar.binary.v1`` subprotocol (or connecting
+    with ``?protocol=binary``) receive audio and visemes as binary frames
+    instead; see ``protocol.py`` for the layout.
     """
-    await websocket.accept()
+    subprotocol = negotiate_subprotocol(websocket)
+    await websocket.accept(subprotocol=subprotocol)
+    binary = wants_binary(websocket, subprotocol)
     
     try:
         while True:
@@ -92,25 +278,47 @@ async def websocket_avatar_stream(websocket: WebSocket):
             if not text:
                 await websocket.send_json({"error": "No text provided"})
                 continue
+
+            viseme_format = data.get("viseme_format", "list")
+            if viseme_format not in VISEME_FORMATS:
+                await websocket.send_json({"error": f"Unknown viseme_format '{viseme_format}'"})
+                continue
+
+            if data.get("mode") == "stream":
+                await _stream_segments(websocket, text, binary, viseme_format)
+                continue
             
             # Generate viseme sequence
             word_count = len(text.split())
             estimated_duration = word_count * 0.4
-            visemes = lipsync_manager.text_to_visemes(text, duration=estimated_duration)
+            timeline = lipsync_manager.build_timeline(text, duration=estimated_duration)
             
             # Send viseme data
-            await websocket.send_json({
-                "type": "visemes",
-                "data": visemes,
-                "duration": estimated_duration
-            })
+            if binary:
+                await websocket.send_bytes(pack_viseme_frame(0, 0.0, timeline))
+            elif viseme_format == "compact":
+                await websocket.send_json({
+                    "type": "visemes",
+                    "compact": timeline.to_compact(),
+                    "duration": estimated_duration
+                })
+            else:
+                await websocket.send_json({
+                    "type": "visemes",
+                    "data": timeline.to_list(),
+                    "duration": estimated_duration
+                })
             
             # Generate and send audio
-            audio_base64 = tts_manager.text_to_speech_base64(text)
-            await websocket.send_json({
-                "type": "audio",
-                "data": audio_base64
-            })
+            if binary:
+                audio = await tts_manager.text_to_speech_async(text)
+                await websocket.send_bytes(pack_audio_frame(0, audio))
+            else:
+                audio_base64 = await tts_manager.text_to_speech_base64_async(text)
+                await websocket.send_json({
+                    "type": "audio",
+                    "data": audio_base64
+                })
             
             # Send completion signal
             await websocket.send_json({"type": "complete"})
@@ -122,16 +330,20 @@ async def websocket_avatar_stream(websocket: WebSocket):
 
 
 @router.post("/visemes")
-async def generate_visemes(text: str, duration: Optional[float] = None):
+async def generate_visemes(
+    text: str,
+    duration: Optional[float] = None,
+    format: Literal["list", "compact"] = "list"
+):
     """
     Generate viseme sequence for text
     """
     try:
-        visemes = lipsync_manager.text_to_visemes(text, duration)
+        timeline = lipsync_manager.build_timeline(text, duration)
         
         return {
-            "visemes": visemes,
-            "viseme_count": len(visemes)
+            **viseme_payload(timeline, format),
+            "viseme_count": len(timeline)
         }
     
     except Exception as e:
@@ -149,7 +361,15 @@ async def health_check():
         "voice_uuid": status_info["voice_uuid"],
         "device": tts_manager.device,
         "error": status_info["error"],
-        "cache_size": status_info["cache_size"]
+        "cache_size": status_info["cache_size"],
+        "cache": status_info["cache"],
+        "in_flight": status_info["in_flight"],
+        "coalesced": status_info["coalesced"],
+        "backends": status_info["backends"],
+        "breaker": status_info["breaker"],
+        "routing": status_info["routing"],
+        "prewarm": phrase_warmer.status(),
+        "lipsync": lipsync_manager.get_status()
     }
 
 
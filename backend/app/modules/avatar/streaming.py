@@ -0,0 +1,76 @@
+import asyncio
+from collections import deque
+from dataclasses import dataclass
+from typing import AsyncIterator, Deque, List, Optional, Tuple
+
+from ..shared.config import settings
+from ..shared.text import split_sentences
+from .tts import tts_manager
+from .lipsync import lipsync_manager, VisemeTimeline
+
+
+@dataclass
+class SpeechSegment:
+    """One synthesized piece of a longer utterance."""
+
+    index: int
+    text: str
+    audio: bytes
+    duration: float  # Measured from the audio, not estimated
+    offset: float  # Start time of this segment within the whole utterance
+    timeline: VisemeTimeline  # Relative to segment start
+
+
+def segment_text(text: str) -> List[str]:
+    """Split text into segments sized for streamed synthesis."""
+    return split_sentences(
+        text,
+        max_chars=settings.tts_stream_segment_chars,
+        min_chars=settings.tts_stream_min_segment_chars,
+    )
+
+
+async def synthesize_segments(
+    text: str,
+    lookahead: Optional[int] = None,
+) -> AsyncIterator[SpeechSegment]:
+    """
+    Synthesize text sentence by sentence, yielding segments in order.
+
+    Up to ``lookahead`` segments are synthesized concurrently, so the first
+    segment is yielded as soon as its own audio is ready while later ones
+    are still rendering. Pending syntheses are cancelled if the consumer
+    stops early (e.g. the websocket closed).
+    """
+    segments = segment_text(text)
+    window = max(1, lookahead or settings.tts_stream_lookahead)
+    pending: Deque[Tuple[int, str, asyncio.Task]] = deque()
+    next_index = 0
+
+    def schedule() -> None:
+        nonlocal next_index
+        while next_index < len(segments) and len(pending) < window:
+            segment = segments[next_index]
+            task = asyncio.create_task(tts_manager.text_to_speech_with_duration_async(segment))
+            pending.append((next_index, segment, task))
+            next_index += 1
+
+    offset = 0.0
+    try:
+        schedule()
+        while pending:
+            index, segment, task = pending.popleft()
+            audio, duration = await task
+            schedule()
+            yield SpeechSegment(
+                index=index,
+                text=segment,
+                audio=audio,
+                duration=duration,
+                offset=offset,
+                timeline=lipsync_manager.build_timeline(segment, duration=duration),
+            )
+            offset += duration
+    finally:
+        for _, _, task in pending:
+            task.cancel()
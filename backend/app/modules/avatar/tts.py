@@ -1,225 +1,621 @@
+import asyncio
 import base64
-import hashlib
 import os
-import tempfile
 import time
-from typing import Dict, Optional, Tuple
-
-import requests
-from resemble import Resemble
+from contextlib import aclosing
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
 
+from ..shared.circuit import CircuitBreaker
 from ..shared.config import settings
+from ..shared.lazy import LazyInstance
+from ..shared.singleflight import SingleFlight
+from ..shared.text import split_sentences
+from .mp3 import MP3Error, MP3Info, StitchedMP3, concat_mp3, parse_mp3
+from .tts_backends import LocalBackend, ResembleBackend, TTSBackend
+from .tts_cache import TTSCache
 
-# Try to import mutagen for MP3 duration, fallback to estimation
-try:
-    from mutagen.mp3 import MP3
-    HAS_MUTAGEN = True
-except ImportError:
-    HAS_MUTAGEN = False
 
+@dataclass
+class LongFormSpeech:
+    """One clip for arbitrarily long text, stitched from per-chunk syntheses"""
 
-class TTSManager:
-    """Text-to-Speech manager using Resemble.ai SDK (non-streaming)."""
+    audio: bytes
+    duration: float
+    chunks: List[Tuple[str, float, float]]  # (text, offset, duration) per chunk
+    local: bool = False  # Rendered by the local fallback tier
 
-    def __init__(self) -> None:
-        self.api_key: Optional[str] = None
-        self.device: str = "cpu"
-        self._cache: Dict[str, bytes] = {}
-        self._cache_dir = tempfile.mkdtemp(prefix="tts_cache_")
 
-        # Resemble.ai configuration
-        self.project_uuid: str = "9d6b821e"  # Default project
-        self.voice_uuid: str = "68b8d08b"  # User-provided voice
+@dataclass
+class CachedClip:
+    """A cached clip on disk, for responses streamed from the file"""
 
-        self.api_error: Optional[str] = None
-        self._initialize_tts()
+    path: str
+    size: int
+    etag: str
+    local: bool = False  # Fallback-tier audio, which should not be cached downstream
 
-    def _initialize_tts(self) -> None:
-        try:
-            api_key = settings.resemble_api_key
-            if not api_key:
-                raise ValueError("Resemble.ai API key not configured in settings.")
-
-            self.api_key = api_key.strip()
-            Resemble.api_key(self.api_key)
 
-            print("✅ TTS initialized with Resemble.ai SDK")
-            print(f"🎤 Voice UUID: {self.voice_uuid}")
-            print(f"📦 Project UUID: {self.project_uuid}")
-        except Exception as exc:
-            self.api_error = str(exc)
-            print(f"❌ Error initializing Resemble.ai TTS: {exc}")
-
-    def _cache_key(self, text: str) -> str:
-        return hashlib.md5(f"{self.voice_uuid}:{text}".encode("utf-8")).hexdigest()
-
-    def _get_cached_audio(self, text: str) -> Optional[bytes]:
-        key = self._cache_key(text)
-        if key in self._cache:
-            return self._cache[key]
-
-        cache_path = os.path.join(self._cache_dir, f"{key}.mp3")
-        if os.path.exists(cache_path):
-            with open(cache_path, "rb") as fh:
-                audio_data = fh.read()
-            self._cache[key] = audio_data
-            return audio_data
-        return None
+class TTSManager:
+    """Text-to-Speech manager: Resemble.ai with a local fallback tier.
 
-    def _store_cache(self, text: str, audio: bytes) -> None:
-        key = self._cache_key(text)
-        if len(self._cache) < 50:
-            self._cache[key] = audio
+    A circuit breaker watches Resemble's error rate and p95 latency and
+    routes synthesis to the local engine while it is unhealthy. Calls that
+    miss the ``tts_latency_slo`` are hedged with a local synthesis so the
+    avatar keeps talking; the Resemble clip is still cached when it lands.
+    """
 
-        cache_path = os.path.join(self._cache_dir, f"{key}.mp3")
+    def __init__(self) -> None:
+        self.device: str = "cpu"
+        self.cache = TTSCache(
+            cache_dir=settings.tts_cache_dir,
+            memory_budget=settings.tts_cache_memory_bytes,
+            disk_budget=settings.tts_cache_disk_bytes,
+            policy=settings.tts_cache_policy,
+        )
+
+        self.primary = ResembleBackend()
+        self.local = LocalBackend()
+        self.breaker = CircuitBreaker(
+            self.primary.name,
+            window=settings.tts_breaker_window,
+            min_samples=settings.tts_breaker_min_samples,
+            error_rate=settings.tts_breaker_error_rate,
+            p95_latency=settings.tts_breaker_p95_latency,
+            cooldown=settings.tts_breaker_cooldown,
+            probes=settings.tts_breaker_probes,
+        )
+
+        # Async synthesis path: bounded fan-out per worker
+        self._semaphore = asyncio.Semaphore(settings.tts_max_concurrency)
+        self._in_flight: int = 0
+        self._flights = SingleFlight()  # Dedupe identical concurrent syntheses
+        self.routing: Dict[str, int] = {"primary": 0, "local": 0, "hedged": 0, "failovers": 0}
+
+    # Resemble settings, kept here for callers that predate the backends
+    @property
+    def api_key(self) -> Optional[str]:
+        return self.primary.api_key
+
+    @property
+    def api_error(self) -> Optional[str]:
+        return self.primary.api_error
+
+    @property
+    def voice_uuid(self) -> str:
+        return self.primary.voice_uuid
+
+    @property
+    def project_uuid(self) -> str:
+        return self.primary.project_uuid
+
+    @property
+    def in_flight(self) -> int:
+        """Syntheses currently running in this worker"""
+        return self._in_flight
+
+    async def aclose(self) -> None:
+        """Close pooled connections and workers (called on application shutdown)."""
+        await self.primary.aclose()
+        await self.local.aclose()
+        self.cache.flush()
+
+    def _cache_key(self, text: str, backend: Optional[TTSBackend] = None) -> str:
+        backend = backend or self.primary
+        return TTSCache.make_key(backend.voice_key, backend.namespace, text)
+
+    def _store_cache(self, key: str, audio: bytes) -> None:
+        info = self.get_audio_info(audio)
+        meta = info.to_meta() if info else {}
+        meta["etag"] = TTSCache.content_hash(audio)
+        self.cache.put(key, audio, meta=meta)
+
+    def get_audio_info(self, audio_bytes: bytes) -> Optional[MP3Info]:
+        """Parse MP3 frame headers in memory; None if the bytes are not MP3."""
         try:
-            with open(cache_path, "wb") as fh:
-                fh.write(audio)
-        except Exception as exc:
-            print(f"⚠️  Failed to persist cache: {exc}")
+            return parse_mp3(audio_bytes)
+        except MP3Error as exc:
+            print(f"⚠️  Could not parse audio: {exc}")
+            return None
+
+    @staticmethod
+    def _estimate_duration(audio_bytes: bytes) -> float:
+        # Rough fallback for non-MP3 payloads (~16kbps average)
+        return max(len(audio_bytes) / 2000.0, 0.5)
 
     def _get_audio_duration(self, audio_bytes: bytes) -> float:
         """Get audio duration from MP3 bytes"""
-        if not HAS_MUTAGEN:
-            # Fallback: estimate based on file size (rough: ~16kbps average)
-            # This is very rough, but better than nothing
-            estimated_duration = len(audio_bytes) / 2000.0  # ~2KB per second
-            return max(estimated_duration, 0.5)
-        
-        try:
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as tmp:
-                tmp.write(audio_bytes)
-                tmp_path = tmp.name
-            
-            try:
-                audio_file = MP3(tmp_path)
-                duration = audio_file.info.length
-                return float(duration)
-            finally:
-                try:
-                    os.unlink(tmp_path)
-                except:
-                    pass
-        except Exception as e:
-            print(f"⚠️  Could not get audio duration: {e}")
-            # Fallback estimation
-            estimated_duration = len(audio_bytes) / 2000.0
-            return max(estimated_duration, 0.5)
-
-    def text_to_speech(self, text: str, output_path: Optional[str] = None) -> bytes:
-        if not self.api_key:
+        info = self.get_audio_info(audio_bytes)
+        return info.duration if info else self._estimate_duration(audio_bytes)
+
+    def _cached_duration(self, key: str, audio_bytes: bytes) -> float:
+        """Duration from the clip's cached metadata, parsing only if absent."""
+        meta = self.cache.get_meta(key)
+        if meta and "duration" in meta:
+            return float(meta["duration"])
+
+        info = self.get_audio_info(audio_bytes)
+        if info is None:
+            return self._estimate_duration(audio_bytes)
+        self.cache.set_meta(key, info.to_meta())
+        return info.duration
+
+    def _prepare_text(self, text: str) -> str:
+        if not self.primary.available and not self.local.available:
             raise ValueError(f"Resemble.ai TTS Error: {self.api_error or 'TTS not initialized'}")
 
-        if not self.voice_uuid:
-            raise ValueError("Resemble.ai TTS Error: Voice UUID not configured.")
+        return text.strip()
+
+    @staticmethod
+    def _split_chunks(normalized_text: str) -> List[str]:
+        """Sentence-aligned chunks no longer than one provider call accepts"""
+        if len(normalized_text) <= settings.tts_chunk_chars:
+            return [normalized_text]
+        chunks = split_sentences(
+            normalized_text,
+            max_chars=settings.tts_chunk_chars,
+            min_chars=settings.tts_chunk_chars // 2,  # Pack sentences to cut provider calls
+        )
+        return chunks or [normalized_text]
+
+    def _primary_usable(self) -> bool:
+        """Whether Resemble would be tried now (no side effects on the breaker)"""
+        return self.primary.available and self.breaker.state != CircuitBreaker.OPEN
+
+    def uncached_chunks(self, text: str) -> List[str]:
+        """
+        Chunks of ``text`` that would need synthesis now.
+
+        A chunk counts as cached if it has a Resemble clip or, while Resemble
+        cannot be used, a local one (the clip ``_speak`` would serve).
+        """
+        primary_usable = self._primary_usable()
+        return [
+            chunk for chunk in self._split_chunks(text.strip())
+            if self._cache_key(chunk) not in self.cache
+            and (primary_usable or self._cache_key(chunk, self.local) not in self.cache)
+        ]
+
+    def is_cached(self, text: str) -> bool:
+        """Whether every chunk of ``text`` would be served from the cache"""
+        return not self.uncached_chunks(text)
+
+    def cached_clip(self, text: str) -> Optional[CachedClip]:
+        """Cache file holding the whole clip for ``text``, if there is one"""
+        chunks = self._split_chunks(text.strip())
+        if len(chunks) != 1:
+            return None  # Long text is stitched per request
+
+        keys = [self._cache_key(chunks[0])]
+        if not self._primary_usable():
+            keys.append(self._cache_key(chunks[0], self.local))
+        for key in keys:
+            path = self.cache.get_path(key)
+            if path is None:
+                continue
+            try:
+                size = os.path.getsize(path)
+                meta = self.cache.get_meta(key) or {}
+                etag = meta.get("etag")
+                if etag is None:
+                    # Clips cached before ETags were recorded
+                    with open(path, "rb") as fh:
+                        etag = TTSCache.content_hash(fh.read())
+                    self.cache.set_meta(key, {**meta, "etag": etag})
+            except OSError:
+                continue
+            return CachedClip(path, size, etag, local=key != keys[0])
+        return None
 
-        normalized_text = text.strip()
-        if len(normalized_text) > 1000:
-            normalized_text = normalized_text[:1000] + "..."
+    @staticmethod
+    def _write_output(output_path: Optional[str], audio: bytes) -> None:
+        if output_path:
+            with open(output_path, "wb") as fh:
+                fh.write(audio)
 
-        cached = self._get_cached_audio(normalized_text)
+    def text_to_speech(self, text: str, output_path: Optional[str] = None) -> bytes:
+        """Blocking synthesis. Request handlers should use ``text_to_speech_async``."""
+        chunks = self._split_chunks(self._prepare_text(text))
+        if len(chunks) == 1:
+            audio_data, _ = self._speak_sync(chunks[0])
+        else:
+            results = [self._speak_sync(chunk) for chunk in chunks]
+            for i in self._mixed_sources(chunks, [key for _, key in results]):
+                results[i] = self._local_clip_sync(chunks[i])
+            audio_data = self._stitch(results).audio
+        self._write_output(output_path, audio_data)
+        return audio_data
+
+    def _stitch(self, results: List[Tuple[bytes, str]]) -> StitchedMP3:
+        """Join cached chunk clips, reusing their stored metadata instead of parsing"""
+        infos = []
+        for _, key in results:
+            meta = self.cache.get_meta(key)
+            infos.append(MP3Info.from_meta(meta) if meta else None)
+        return concat_mp3([audio for audio, _ in results], infos)
+
+    def _mixed_sources(self, chunks: List[str], keys: List[str]) -> List[int]:
+        """
+        Indexes of Resemble chunks in an utterance that also has local ones.
+
+        Failover is per chunk, so a flaky provider can leave one utterance
+        split across voices and MP3 formats (which cannot be stitched);
+        those chunks are re-rendered locally to keep one voice throughout.
+        """
+        local = [key == self._cache_key(chunk, self.local) for chunk, key in zip(chunks, keys)]
+        if not any(local) or all(local):
+            return []
+        return [i for i, is_local in enumerate(local) if not is_local]
+
+    def _local_clip_sync(self, normalized_text: str) -> Tuple[bytes, str]:
+        key = self._cache_key(normalized_text, self.local)
+        audio_data = self.cache.get(key)
+        if not audio_data:
+            audio_data = self.local.synthesize_sync(normalized_text)
+            self._store_cache(key, audio_data)
+        return audio_data, key
+
+    async def _local_clip(self, normalized_text: str) -> Tuple[bytes, str]:
+        key = self._cache_key(normalized_text, self.local)
+        cached = await asyncio.to_thread(self.cache.get, key)
         if cached:
-            if output_path:
-                with open(output_path, "wb") as fh:
-                    fh.write(cached)
-            return cached
-
-        try:
-            print("🎙️  Generating speech with Resemble.ai (non-streaming)...")
-            print(f"📝 Text: {normalized_text[:60]}{'...' if len(normalized_text) > 60 else ''}")
-
-            response = Resemble.v2.clips.create_sync(
-                self.project_uuid,
-                self.voice_uuid,
-                normalized_text,
-            )
-
-            audio_url: Optional[str] = None
-            if isinstance(response, dict):
-                audio_url = response.get("item", {}).get("audio_src")
-            elif hasattr(response, "item"):
-                audio_url = getattr(response.item, "audio_src", None)
+            return cached, key
+        async with self._semaphore:
+            return await self._synthesize_local(normalized_text)
 
-            if not audio_url:
-                raise RuntimeError(f"No audio URL returned from Resemble.ai: {response}")
+    def _speak_sync(self, normalized_text: str) -> Tuple[bytes, str]:
+        key = self._cache_key(normalized_text)
+        cached = self.cache.get(key)
+        if cached:
+            return cached, key
 
-            audio_response = requests.get(audio_url, timeout=30)
-            audio_response.raise_for_status()
+        print(f"🎙️  Generating speech (blocking)...")
+        print(f"📝 Text: {normalized_text[:60]}{'...' if len(normalized_text) > 60 else ''}")
+        try:
+            audio_data = self.primary.synthesize_sync(normalized_text)
+        except Exception as exc:
+            error = self.primary.translate_error(exc)
+            if not self.local.available:
+                raise error from exc
+            key = self._cache_key(normalized_text, self.local)
+            audio_data = self.local.synthesize_sync(normalized_text)
 
-            audio_data = audio_response.content
-            if len(audio_data) < 100:
-                raise RuntimeError("Received audio payload is too small.")
+        self._store_cache(key, audio_data)
 
-            self._store_cache(normalized_text, audio_data)
+        print(f"✅ Generated {len(audio_data)} bytes of audio")
+        return audio_data, key
 
-            if output_path:
-                with open(output_path, "wb") as fh:
-                    fh.write(audio_data)
+    async def _speak(self, normalized_text: str) -> Tuple[bytes, str]:
+        """Audio for one chunk plus the cache key it is stored under"""
+        primary_key = self._cache_key(normalized_text)
+        cached = await asyncio.to_thread(self.cache.get, primary_key)
+        if cached:
+            return cached, primary_key
+
+        # Local clips only stand in while Resemble cannot be used
+        if not self._primary_usable():
+            local_key = self._cache_key(normalized_text, self.local)
+            cached = await asyncio.to_thread(self.cache.get, local_key)
+            if cached:
+                return cached, local_key
+
+        # Identical concurrent requests share one synthesis
+        return await self._flights.do(
+            primary_key,
+            lambda: self._synthesize_and_store(normalized_text),
+        )
+
+    async def text_to_speech_async(self, text: str, output_path: Optional[str] = None) -> bytes:
+        """Synthesize without blocking the event loop.
+
+        Provider calls share one keep-alive connection pool and at most
+        ``tts_max_concurrency`` syntheses run at once per worker. Concurrent
+        requests for the same clip wait on a single synthesis.
+        """
+        audio_data = (await self.text_to_speech_long_async(text)).audio
+        if output_path:
+            await asyncio.to_thread(self._write_output, output_path, audio_data)
+        return audio_data
+
+    async def text_to_speech_long_async(self, text: str) -> LongFormSpeech:
+        """
+        Synthesize text of any length as one clip.
+
+        Text longer than ``tts_chunk_chars`` is split at sentence boundaries
+        and the chunks are synthesized concurrently (at most
+        ``tts_long_form_concurrency`` at a time, each cached on its own),
+        then joined at MP3 frame boundaries without re-encoding. If some
+        chunks fell back to the local tier, the rest are re-rendered locally
+        so the clip has a single voice and format.
+        """
+        chunks = self._split_chunks(self._prepare_text(text))
+        if len(chunks) == 1:
+            audio_data, key = await self._speak(chunks[0])
+            duration = await asyncio.to_thread(self._cached_duration, key, audio_data)
+            return LongFormSpeech(
+                audio_data,
+                duration,
+                [(chunks[0], 0.0, duration)],
+                local=key == self._cache_key(chunks[0], self.local),
+            )
 
-            print(f"✅ Generated {len(audio_data)} bytes of audio using Resemble.ai")
-            return audio_data
+        limiter = asyncio.Semaphore(max(1, settings.tts_long_form_concurrency))
+
+        async def render(chunk: str, local: bool = False) -> Tuple[bytes, str]:
+            async with limiter:
+                return await (self._local_clip(chunk) if local else self._speak(chunk))
+
+        print(f"🧩 Long-form speech: {len(chunks)} chunks")
+        results = await asyncio.gather(*(render(chunk) for chunk in chunks))
+        mixed = self._mixed_sources(chunks, [key for _, key in results])
+        if mixed:
+            print(f"🔀 {len(mixed)} chunks re-rendered locally to match the fallback voice")
+            redone = await asyncio.gather(*(render(chunks[i], local=True) for i in mixed))
+            for i, result in zip(mixed, redone):
+                results[i] = result
+        stitched = await asyncio.to_thread(self._stitch, results)
+        return LongFormSpeech(
+            stitched.audio,
+            stitched.duration,
+            list(zip(chunks, stitched.offsets, stitched.durations)),
+            local=bool(mixed) or results[0][1] == self._cache_key(chunks[0], self.local),
+        )
+
+    async def _synthesize_and_store(self, normalized_text: str) -> Tuple[bytes, str]:
+        async with self._semaphore:
+            self._in_flight += 1
+            try:
+                print(f"🎙️  Generating speech ({self._in_flight} in flight)...")
+                print(f"📝 Text: {normalized_text[:60]}{'...' if len(normalized_text) > 60 else ''}")
+                if self.primary.available and self.breaker.allow():
+                    return await self._synthesize_primary(normalized_text)
+                if self.local.available:
+                    return await self._synthesize_local(normalized_text)
+                raise RuntimeError(
+                    f"Resemble.ai TTS Error: {self.primary.name} circuit is open "
+                    "and no local TTS engine is available"
+                )
+            finally:
+                self._in_flight -= 1
 
+    async def _synthesize_local(self, normalized_text: str) -> Tuple[bytes, str]:
+        try:
+            audio_data = await self.local.synthesize(normalized_text)
         except Exception as exc:
-            message = str(exc)
-            print(f"❌ Error generating speech: {message}")
-
-            lowered = message.lower()
-            if "401" in lowered or "unauthorized" in lowered:
-                raise ValueError("Resemble.ai API Error: Invalid API key") from exc
-            if "404" in lowered or "not found" in lowered:
-                raise ValueError("Resemble.ai API Error: Project or voice not found") from exc
-            if "429" in lowered:
-                raise ValueError("Resemble.ai API Error: Rate limit exceeded") from exc
-            if "syn_server_url" in lowered:
-                raise ValueError("Resemble.ai Streaming API requires special access.") from exc
-
-            raise RuntimeError(f"Resemble.ai TTS Error: {message}") from exc
+            raise self.local.translate_error(exc) from exc
+
+        key = self._cache_key(normalized_text, self.local)
+        await asyncio.to_thread(self._store_cache, key, audio_data)
+        self.routing["local"] += 1
+        print(f"✅ Generated {len(audio_data)} bytes of audio using {self.local.name}")
+        return audio_data, key
+
+    async def _synthesize_primary(self, normalized_text: str) -> Tuple[bytes, str]:
+        """Resemble synthesis, failing over or hedging to the local engine"""
+        key = self._cache_key(normalized_text)
+        started = time.monotonic()
+        task = asyncio.ensure_future(self.primary.synthesize(normalized_text))
+        task.add_done_callback(
+            lambda t: self.breaker.record(
+                time.monotonic() - started,
+                not t.cancelled() and t.exception() is None,
+            )
+        )
+
+        slo = settings.tts_latency_slo
+        hedge = self.local.available and slo > 0
+        done, _ = await asyncio.wait({task}, timeout=slo if hedge else None)
+
+        if task in done:
+            exc = task.exception()
+            if exc is None:
+                audio_data = task.result()
+                await asyncio.to_thread(self._store_cache, key, audio_data)
+                self.routing["primary"] += 1
+                print(f"✅ Generated {len(audio_data)} bytes of audio using Resemble.ai")
+                return audio_data, key
+
+            error = self.primary.translate_error(exc)
+            if not self.local.available:
+                raise error from exc
+            print("↪️  Resemble.ai failed; using local TTS")
+            self.routing["failovers"] += 1
+            return await self._synthesize_local(normalized_text)
+
+        # Missed the SLO: race a local synthesis against the pending call
+        print(f"⏱️  Resemble.ai slower than {slo:.1f}s; hedging with local TTS")
+        self.routing["hedged"] += 1
+        local_task = asyncio.ensure_future(self._synthesize_local(normalized_text))
+        done, _ = await asyncio.wait({task, local_task}, return_when=asyncio.FIRST_COMPLETED)
+
+        if task in done and task.exception() is None:
+            local_task.cancel()
+            audio_data = task.result()
+            await asyncio.to_thread(self._store_cache, key, audio_data)
+            self.routing["primary"] += 1
+            return audio_data, key
+
+        # Keep the Resemble clip for next time if it still arrives
+        task.add_done_callback(self._cache_late_clip(key))
+        try:
+            return await local_task
+        except Exception:
+            if task.done():
+                raise
+            audio_data = await task
+            await asyncio.to_thread(self._store_cache, key, audio_data)
+            self.routing["primary"] += 1
+            return audio_data, key
+
+    def _cache_late_clip(self, key: str):
+        def store(task: "asyncio.Future[bytes]") -> None:
+            if not task.cancelled() and task.exception() is None:
+                asyncio.ensure_future(asyncio.to_thread(self._store_cache, key, task.result()))
+        return store
 
     def text_to_speech_with_duration(self, text: str) -> Tuple[bytes, float]:
         """Generate speech and return audio bytes with actual duration"""
         audio_bytes = self.text_to_speech(text)
-        duration = self._get_audio_duration(audio_bytes)
-        return audio_bytes, duration
+        return audio_bytes, self._get_audio_duration(audio_bytes)
+
+    async def text_to_speech_with_duration_async(self, text: str) -> Tuple[bytes, float]:
+        """Async variant of ``text_to_speech_with_duration``"""
+        speech = await self.text_to_speech_long_async(text)
+        return speech.audio, speech.duration
 
     def text_to_speech_base64(self, text: str) -> str:
         audio = self.text_to_speech(text)
         return base64.b64encode(audio).decode("utf-8")
 
+    async def text_to_speech_base64_async(self, text: str) -> str:
+        audio = await self.text_to_speech_async(text)
+        return base64.b64encode(audio).decode("utf-8")
+
     def text_to_speech_with_audio_only(self, text: str) -> bytes:
         return self.text_to_speech(text)
 
-    async def stream_speech(self, text: str):
-        yield self.text_to_speech(text)
+    async def stream_speech(
+        self,
+        text: str,
+        on_backend: Optional[Callable[[TTSBackend], None]] = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Yield audio for ``text`` as it arrives.
+
+        A Resemble synthesis is passed through while it downloads and teed
+        into the cache once complete; identical requests arriving meanwhile
+        wait for it instead of calling Resemble again. Cache hits, long text
+        and the local tier yield the finished clip. ``on_backend`` is told
+        which backend produced the audio before the first bytes are yielded.
+        """
+        report = on_backend or (lambda backend: None)
+        normalized_text = self._prepare_text(text)
+        key = self._cache_key(normalized_text)
+
+        if (
+            len(self._split_chunks(normalized_text)) > 1
+            or not self.primary.available
+            or await asyncio.to_thread(self.cache.__contains__, key)
+        ):
+            speech = await self.text_to_speech_long_async(text)
+            report(self.local if speech.local else self.primary)
+            yield speech.audio
+            return
+
+        flight = self._flights.claim(key)
+        if flight is None:
+            # The same clip is already being synthesized: share it
+            audio_data, served_key = await self._flights.do(
+                key, lambda: self._synthesize_and_store(normalized_text)
+            )
+            report(self.primary if served_key == key else self.local)
+            yield audio_data
+            return
+
+        try:
+            async with aclosing(self._stream_primary(normalized_text, key, flight, report)) as pieces:
+                async for piece in pieces:
+                    yield piece
+        except Exception as exc:
+            if not flight.done():
+                flight.set_exception(exc)
+            raise
+        finally:
+            if not flight.done():
+                self._abandon_flight(normalized_text, flight)
+
+    def _abandon_flight(self, normalized_text: str, flight: "asyncio.Future") -> None:
+        """The streaming client left early; finish the clip for anyone waiting on it"""
+        if not self._flights.joined(self._cache_key(normalized_text)):
+            flight.cancel()
+            return
+
+        def settle(task: "asyncio.Task") -> None:
+            if task.cancelled():
+                flight.cancel()
+            elif task.exception() is not None:
+                flight.set_exception(task.exception())
+            else:
+                flight.set_result(task.result())
+
+        asyncio.ensure_future(self._synthesize_and_store(normalized_text)).add_done_callback(settle)
+
+    async def _stream_primary(
+        self,
+        normalized_text: str,
+        key: str,
+        flight: "asyncio.Future",
+        report: Callable[[TTSBackend], None],
+    ) -> AsyncIterator[bytes]:
+        # Take a worker slot before the breaker: a half-open probe is only
+        # claimed once the call can actually start
+        async with self._semaphore:
+            if not self.breaker.allow():
+                if not self.local.available:
+                    raise RuntimeError(f"Resemble.ai TTS Error: {self.primary.name} circuit is open")
+                result = await self._synthesize_local(normalized_text)
+                flight.set_result(result)
+                report(self.local)
+                yield result[0]
+                return
+
+            parts: List[bytes] = []
+            started = time.monotonic()
+            settled = False
+            self._in_flight += 1
+            try:
+                async for piece in self.primary.synthesize_stream(normalized_text):
+                    if not parts:
+                        report(self.primary)
+                    parts.append(piece)
+                    yield piece
+                settled = True
+                self.breaker.record(time.monotonic() - started, True)
+            except Exception as exc:
+                settled = True
+                self.breaker.record(time.monotonic() - started, False)
+                error = self.primary.translate_error(exc)
+                if parts or not self.local.available:
+                    raise error from exc
+                print("↪️  Resemble.ai failed; using local TTS")
+                self.routing["failovers"] += 1
+                result = await self._synthesize_local(normalized_text)
+                flight.set_result(result)
+                report(self.local)
+                yield result[0]
+                return
+            finally:
+                self._in_flight -= 1
+                if not settled:
+                    self.breaker.release()  # Client went away mid-download
+
+        self.routing["primary"] += 1
+        audio_data = b"".join(parts)
+        print(f"✅ Streamed {len(audio_data)} bytes of audio from Resemble.ai")
+        await asyncio.to_thread(self._store_cache, key, audio_data)
+        flight.set_result((audio_data, key))
 
     def get_status(self) -> Dict[str, object]:
         return {
-            "initialized": self.api_key is not None,
+            "initialized": self.primary.available or self.local.available,
             "voice_uuid": self.voice_uuid,
             "project_uuid": self.project_uuid,
-            "error": self.api_error,
-            "cache_size": len(self._cache),
-            "provider": "Resemble.ai",
+            "error": None if self.local.available else self.api_error,
+            "cache_size": len(self.cache),
+            "cache": self.cache.status(),
+            "in_flight": self._in_flight,
+            "coalesced": self._flights.stats["coalesced"],
+            "max_concurrency": settings.tts_max_concurrency,
+            "provider": self.primary.name if self._primary_usable() else self.local.name,
+            "backends": {"primary": self.primary.status(), "local": self.local.status()},
+            "breaker": self.breaker.status(),
+            "routing": self.routing,
         }
 
     def clear_cache(self) -> None:
-        self._cache.clear()
-        if os.path.exists(self._cache_dir):
-            for filename in os.listdir(self._cache_dir):
-                try:
-                    os.unlink(os.path.join(self._cache_dir, filename))
-                except OSError:
-                    pass
+        self.cache.clear()
         print("🧹 TTS cache cleared.")
 
-    def __del__(self) -> None:
-        try:
-            if os.path.exists(self._cache_dir):
-                import shutil
-
-                shutil.rmtree(self._cache_dir, ignore_errors=True)
-        except Exception:
-            pass
-
-
-tts_manager = TTSManager()
 
+# Global TTS manager instance (constructed on first use or at warm-up)
+tts_manager = LazyInstance(TTSManager, "tts")
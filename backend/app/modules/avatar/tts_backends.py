@@ -0,0 +1,327 @@
+"""
+TTS backends behind ``TTSManager``.
+
+A backend turns text into MP3 bytes. ``voice_key`` and ``namespace`` scope
+its clips in the shared TTS cache, so audio from different engines never
+collides.
+"""
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import AsyncIterator, Dict, Optional
+
+import httpx
+
+from ..shared.config import settings
+from ..shared.startup import startup_report
+from . import local_tts
+
+
+Resemble = None  # resemble SDK class, imported on first use
+requests = None
+
+
+def _load_resemble():
+    global Resemble, requests
+    if Resemble is None:
+        with startup_report.track("tts", "import"):
+            import requests as _requests
+            from resemble import Resemble as _Resemble
+        Resemble, requests = _Resemble, _requests
+    return Resemble
+
+
+class TTSBackend:
+    """Interface for speech synthesis engines"""
+
+    name: str = "base"
+    voice_key: str = ""
+    namespace: str = ""
+
+    @property
+    def available(self) -> bool:
+        return False
+
+    async def synthesize(self, text: str) -> bytes:
+        raise NotImplementedError
+
+    async def synthesize_stream(self, text: str) -> AsyncIterator[bytes]:
+        """Audio as it arrives; engines without streaming yield one piece"""
+        yield await self.synthesize(text)
+
+    def synthesize_sync(self, text: str) -> bytes:
+        raise NotImplementedError
+
+    def translate_error(self, exc: Exception) -> Exception:
+        return RuntimeError(f"{self.name} TTS Error: {str(exc) or exc.__class__.__name__}")
+
+    async def aclose(self) -> None:
+        pass
+
+    def status(self) -> Dict[str, object]:
+        return {"name": self.name, "available": self.available}
+
+
+class ResembleBackend(TTSBackend):
+    """Resemble.ai clips API over a pooled keep-alive client"""
+
+    name = "Resemble.ai"
+
+    def __init__(self) -> None:
+        self.api_key: Optional[str] = None
+        self.api_error: Optional[str] = None
+
+        # Resemble.ai configuration
+        self.project_uuid: str = "9d6b821e"  # Default project
+        self.voice_uuid: str = "68b8d08b"  # User-provided voice
+        self.voice_key = self.voice_uuid
+        self.namespace = self.project_uuid
+
+        self._http: Optional[httpx.AsyncClient] = None
+
+        try:
+            api_key = settings.resemble_api_key
+            if not api_key:
+                raise ValueError("Resemble.ai API key not configured in settings.")
+
+            self.api_key = api_key.strip()
+            _load_resemble().api_key(self.api_key)
+
+            print("✅ TTS initialized with Resemble.ai SDK")
+            print(f"🎤 Voice UUID: {self.voice_uuid}")
+            print(f"📦 Project UUID: {self.project_uuid}")
+        except Exception as exc:
+            self.api_error = str(exc)
+            print(f"❌ Error initializing Resemble.ai TTS: {exc}")
+
+    @property
+    def available(self) -> bool:
+        return self.api_key is not None and bool(self.voice_uuid)
+
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """Return the shared keep-alive client, creating it on first use."""
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=settings.tts_max_connections,
+                    max_keepalive_connections=settings.tts_max_keepalive_connections,
+                    keepalive_expiry=settings.tts_keepalive_expiry,
+                ),
+                timeout=httpx.Timeout(
+                    settings.tts_download_timeout,
+                    connect=settings.tts_connect_timeout,
+                ),
+                follow_redirects=True,
+            )
+        return self._http
+
+    async def aclose(self) -> None:
+        if self._http is not None and not self._http.is_closed:
+            await self._http.aclose()
+        self._http = None
+
+    @staticmethod
+    def _extract_audio_url(response: object) -> str:
+        audio_url: Optional[str] = None
+        if isinstance(response, dict):
+            audio_url = response.get("item", {}).get("audio_src")
+        elif hasattr(response, "item"):
+            audio_url = getattr(response.item, "audio_src", None)
+
+        if not audio_url:
+            raise RuntimeError(f"No audio URL returned from Resemble.ai: {response}")
+        return audio_url
+
+    @staticmethod
+    def _validate_audio(audio_data: bytes) -> bytes:
+        if len(audio_data) < 100:
+            raise RuntimeError("Received audio payload is too small.")
+        return audio_data
+
+    def translate_error(self, exc: Exception) -> Exception:
+        """Map provider failures onto the error messages the API exposes."""
+        message = str(exc) or exc.__class__.__name__
+        print(f"❌ Error generating speech: {message}")
+
+        lowered = message.lower()
+        if "401" in lowered or "unauthorized" in lowered:
+            return ValueError("Resemble.ai API Error: Invalid API key")
+        if "404" in lowered or "not found" in lowered:
+            return ValueError("Resemble.ai API Error: Project or voice not found")
+        if "429" in lowered:
+            return ValueError("Resemble.ai API Error: Rate limit exceeded")
+        if "syn_server_url" in lowered:
+            return ValueError("Resemble.ai Streaming API requires special access.")
+        if isinstance(exc, httpx.TimeoutException):
+            return RuntimeError(f"Resemble.ai TTS Error: request timed out ({message})")
+
+        return RuntimeError(f"Resemble.ai TTS Error: {message}")
+
+    def _require_configured(self) -> None:
+        if not self.api_key:
+            raise ValueError(f"Resemble.ai TTS Error: {self.api_error or 'TTS not initialized'}")
+        if not self.voice_uuid:
+            raise ValueError("Resemble.ai TTS Error: Voice UUID not configured.")
+
+    def synthesize_sync(self, text: str) -> bytes:
+        """Blocking clip creation through the SDK"""
+        self._require_configured()
+        response = _load_resemble().v2.clips.create_sync(
+            self.project_uuid,
+            self.voice_uuid,
+            text,
+        )
+        audio_url = self._extract_audio_url(response)
+
+        audio_response = requests.get(audio_url, timeout=settings.tts_download_timeout)
+        audio_response.raise_for_status()
+        return self._validate_audio(audio_response.content)
+
+    async def _create_clip(self, client: httpx.AsyncClient, text: str) -> str:
+        """Render a clip and return its audio URL."""
+        self._require_configured()
+
+        # Same request the SDK's create_sync issues, without blocking the loop
+        response = await client.post(
+            _load_resemble().endpoint("v2", f"projects/{self.project_uuid}/clips"),
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": f"Token token={self.api_key}",
+            },
+            json={"voice_uuid": self.voice_uuid, "body": text},
+            timeout=httpx.Timeout(
+                settings.tts_synthesis_timeout,
+                connect=settings.tts_connect_timeout,
+            ),
+        )
+        response.raise_for_status()
+        return self._extract_audio_url(response.json())
+
+    async def synthesize(self, text: str) -> bytes:
+        """Create a clip and download it over the pooled client."""
+        client = self._get_http_client()
+        audio_url = await self._create_clip(client, text)
+
+        audio_response = await client.get(audio_url)
+        audio_response.raise_for_status()
+        return self._validate_audio(audio_response.content)
+
+    async def synthesize_stream(self, text: str) -> AsyncIterator[bytes]:
+        """Create a clip and pass its download through as it arrives."""
+        client = self._get_http_client()
+        audio_url = await self._create_clip(client, text)
+
+        async with client.stream("GET", audio_url) as audio_response:
+            audio_response.raise_for_status()
+            async for piece in audio_response.aiter_bytes():
+                yield piece
+
+    def status(self) -> Dict[str, object]:
+        return {
+            **super().status(),
+            "voice_uuid": self.voice_uuid,
+            "project_uuid": self.project_uuid,
+            "error": self.api_error,
+        }
+
+
+class LocalBackend(TTSBackend):
+    """On-box synthesis (Coqui TTS or espeak) in a process pool"""
+
+    name = "local"
+    namespace = "local"
+
+    def __init__(self) -> None:
+        self.engine = local_tts.detect_engine(settings.tts_local_engine)
+        voice = settings.tts_model if self.engine == "coqui" else settings.tts_local_voice
+        self.voice_key = f"{self.engine}:{voice}"
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._warmup: Optional[asyncio.Future] = None
+        self._synthesize = partial(
+            local_tts.synthesize,
+            engine=self.engine,
+            model=settings.tts_model,
+            voice=settings.tts_local_voice,
+            rate=settings.tts_local_rate,
+            bitrate=settings.tts_local_bitrate,
+            timeout=settings.tts_local_timeout,
+        )
+
+        if self.engine:
+            print(f"✅ Local TTS fallback: {self.engine} ({self.voice_key})")
+        else:
+            print("⚠️  No local TTS engine (needs ffmpeg plus Coqui TTS or espeak)")
+
+    @property
+    def available(self) -> bool:
+        return self.engine is not None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=settings.tts_local_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=local_tts.load_engine,
+                initargs=(self.engine, settings.tts_model),
+            )
+            # One task per worker spawns them all; each loads the model first
+            loop = asyncio.get_running_loop()
+            self._warmup = asyncio.gather(*(
+                loop.run_in_executor(self._pool, local_tts.ready)
+                for _ in range(settings.tts_local_workers)
+            ))
+        return self._pool
+
+    def synthesize_sync(self, text: str) -> bytes:
+        return self._synthesize(text)
+
+    def _kill_pool(self) -> None:
+        """Stop workers that may be stuck in native code; a new pool starts next call"""
+        pool, self._pool = self._pool, None
+        if pool is None:
+            return
+        terminate = getattr(pool, "terminate_workers", None)  # Python 3.14+
+        if terminate is not None:
+            terminate()
+            return
+        for process in list((getattr(pool, "_processes", None) or {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    async def synthesize(self, text: str) -> bytes:
+        loop = asyncio.get_running_loop()
+        # Workers enforce the timeout themselves; this backstop covers engines
+        # that ignore the in-process deadline. Model loading happens before it
+        # starts (a first Coqui load can take minutes) so it cannot trip it.
+        deadline = 2 * settings.tts_local_timeout if settings.tts_local_timeout > 0 else None
+        try:
+            pool = self._get_pool()
+            await asyncio.shield(self._warmup)
+            future = loop.run_in_executor(pool, self._synthesize, text)
+            done, _ = await asyncio.wait({future}, timeout=deadline)
+            if not done:
+                print(f"⏱️  Local TTS worker hung for {deadline:.0f}s; restarting the pool")
+                future.cancel()
+                self._kill_pool()
+                raise RuntimeError("local TTS Error: synthesis timed out")
+            return future.result()
+        except Exception:
+            # A crashed worker breaks the whole pool; replace it next time
+            if self._pool is not None and getattr(self._pool, "_broken", False):
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+            raise
+
+    async def aclose(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def status(self) -> Dict[str, object]:
+        return {
+            **super().status(),
+            "engine": self.engine,
+            "voice": self.voice_key,
+            "workers": settings.tts_local_workers,
+        }
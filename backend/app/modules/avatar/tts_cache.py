@@ -0,0 +1,340 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+class TTSCache:
+    """
+    Two-tier, content-addressed cache for synthesized audio.
+
+    Clips are keyed by voice, project and normalized text. A memory tier and
+    a persistent disk tier each have their own byte budget and evict by LRU
+    or LFU. The disk index is written atomically and reloaded at startup, so
+    synthesis survives restarts. Each clip can carry parsed audio metadata,
+    kept in the index. Index writes are batched: changes mark it dirty and
+    it is written at most every ``INDEX_FLUSH_INTERVAL`` seconds and on
+    ``flush``; a crash in between loses only metadata and access stats, as
+    clip files are reconciled at startup. All methods are thread-safe.
+    """
+
+    INDEX_FILE = "index.json"
+    INDEX_FLUSH_INTERVAL = 30.0  # Seconds between lazy index writes
+    POLICIES = ("lru", "lfu")
+
+    def __init__(
+        self,
+        cache_dir: str,
+        memory_budget: int,
+        disk_budget: int,
+        policy: str = "lru",
+    ) -> None:
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown TTS cache policy '{policy}', expected one of {self.POLICIES}")
+
+        self.cache_dir = cache_dir
+        self.memory_budget = memory_budget
+        self.disk_budget = disk_budget
+        self.policy = policy
+
+        self._lock = threading.RLock()
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._entries: Dict[str, Dict] = {}  # Disk index: key -> size/hits/last_access
+        self._disk_bytes = 0
+        self._dirty = False
+        self._last_flush = time.monotonic()
+
+        self.stats: Dict[str, int] = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0,
+        }
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_index()
+
+    # ------------------------------------------------------------------ keys
+
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        """Canonical form used for keying: NFC, collapsed whitespace."""
+        return " ".join(unicodedata.normalize("NFC", text).split())
+
+    @staticmethod
+    def content_hash(audio: bytes) -> str:
+        """Strong validator for a clip's bytes (used as its HTTP ETag)."""
+        return hashlib.sha256(audio).hexdigest()[:32]
+
+    @classmethod
+    def make_key(cls, voice_uuid: str, project_uuid: str, text: str) -> str:
+        payload = f"{voice_uuid}\x00{project_uuid}\x00{cls.normalize_text(text)}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.mp3")
+
+    # ----------------------------------------------------------------- index
+
+    def _load_index(self) -> None:
+        index_path = os.path.join(self.cache_dir, self.INDEX_FILE)
+        entries: Dict[str, Dict] = {}
+        try:
+            with open(index_path, "r", encoding="utf-8") as fh:
+                entries = json.load(fh).get("entries", {})
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as exc:
+            print(f"⚠️  TTS cache index unreadable, rebuilding: {exc}")
+
+        # Reconcile with what is actually on disk
+        filenames = os.listdir(self.cache_dir)
+        on_disk = {name[:-4] for name in filenames if name.endswith(".mp3")}
+        for name in filenames:
+            if name.endswith(".frames"):  # Frame tables written by older versions
+                try:
+                    os.unlink(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+        for key in list(entries):
+            if key not in on_disk:
+                del entries[key]
+        for key in on_disk - entries.keys():
+            try:
+                stat = os.stat(self._path(key))
+            except OSError:
+                continue
+            entries[key] = {"size": stat.st_size, "hits": 0, "last_access": stat.st_mtime}
+
+        self._entries = entries
+        self._disk_bytes = sum(entry["size"] for entry in entries.values())
+        self._evict_disk()
+        self._write_index()
+        print(f"💾 TTS cache loaded: {len(self._entries)} clips, {self._disk_bytes} bytes")
+
+    def _write_index(self) -> None:
+        payload = json.dumps({"version": 1, "entries": self._entries}, separators=(",", ":"))
+        self._atomic_write(self.INDEX_FILE, payload.encode("utf-8"))
+        self._dirty = False
+        self._last_flush = time.monotonic()
+
+    def _atomic_write(self, filename: str, data: bytes) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=".tmp_")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(data)
+                fh.flush()
+                os.fsync(fh.fileno())
+            os.replace(tmp_path, os.path.join(self.cache_dir, filename))
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def _maybe_flush(self) -> None:
+        if self._dirty and time.monotonic() - self._last_flush > self.INDEX_FLUSH_INTERVAL:
+            self._write_index()
+
+    def flush(self) -> None:
+        """Persist pending index changes (call on shutdown)."""
+        with self._lock:
+            if self._dirty:
+                self._write_index()
+
+    # -------------------------------------------------------------- eviction
+
+    def _pick_victim(self, keys, keep: Optional[str] = None) -> str:
+        if self.policy == "lfu":
+            return min(
+                (k for k in keys if k != keep),
+                key=lambda k: (
+                    self._entries.get(k, {}).get("hits", 0),
+                    self._entries.get(k, {}).get("last_access", 0.0),
+                ),
+            )
+        return next(iter(keys))  # OrderedDict / insertion order is LRU order
+
+    def _evict_memory(self, keep: Optional[str] = None) -> None:
+        """Evict past the budget; ``keep`` (the clip just stored) is never chosen"""
+        while len(self._memory) > 1 and self._memory_bytes > self.memory_budget:
+            key = self._pick_victim(self._memory, keep)
+            self._memory_bytes -= len(self._memory.pop(key))
+            self.stats["memory_evictions"] += 1
+
+    def _evict_disk(self, keep: Optional[str] = None) -> None:
+        if self._disk_bytes <= self.disk_budget:
+            return
+        # Oldest (or least used) first
+        if self.policy == "lfu":
+            order = sorted(self._entries, key=lambda k: (self._entries[k]["hits"], self._entries[k]["last_access"]))
+        else:
+            order = sorted(self._entries, key=lambda k: self._entries[k]["last_access"])
+        for key in order:
+            if self._disk_bytes <= self.disk_budget:
+                break
+            if key == keep:
+                continue  # A fresh clip has no hits yet; LFU would drop it first
+            self._remove_disk(key)
+            self.stats["disk_evictions"] += 1
+        self._dirty = True
+
+    def _remove_disk(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._disk_bytes -= entry["size"]
+        try:
+            os.unlink(self._path(key))
+        except OSError:
+            pass
+
+    def _remember(self, key: str, audio: bytes) -> None:
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)  # Never serve bytes a re-put replaced
+        if len(audio) > self.memory_budget:
+            return
+        self._memory[key] = audio
+        self._memory_bytes += len(audio)
+        self._evict_memory(keep=key)
+
+    # ---------------------------------------------------------------- access
+
+    def _touch(self, key: str) -> None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry["hits"] += 1
+            entry["last_access"] = time.time()
+            self._dirty = True
+        self._maybe_flush()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                self._touch(key)
+                return audio
+
+            if key not in self._entries:
+                self.stats["misses"] += 1
+                return None
+
+            try:
+                with open(self._path(key), "rb") as fh:
+                    audio = fh.read()
+            except OSError:
+                self._remove_disk(key)
+                self._dirty = True
+                self.stats["misses"] += 1
+                return None
+
+            self.stats["disk_hits"] += 1
+            self._touch(key)
+            self._remember(key, audio)
+            return audio
+
+    def get_path(self, key: str) -> Optional[str]:
+        """Path of a clip's cache file for streaming, counted as a disk hit."""
+        with self._lock:
+            if key not in self._entries:
+                self.stats["misses"] += 1
+                return None
+            path = self._path(key)
+            if not os.path.exists(path):
+                self._remove_disk(key)
+                self._dirty = True
+                self.stats["misses"] += 1
+                return None
+            self.stats["disk_hits"] += 1
+            self._touch(key)
+            return path
+
+    def get_meta(self, key: str) -> Optional[Dict]:
+        """Return stored audio metadata for a clip without reading it."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry.get("meta") if entry else None
+
+    def set_meta(self, key: str, meta: Dict) -> None:
+        """Attach metadata to an existing clip (e.g. one cached before parsing)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry["meta"] = meta
+            self._dirty = True
+            self._maybe_flush()
+
+    def put(self, key: str, audio: bytes, meta: Optional[Dict] = None) -> None:
+        with self._lock:
+            self._remember(key, audio)
+
+            if len(audio) > self.disk_budget:
+                return
+            try:
+                self._atomic_write(f"{key}.mp3", audio)
+            except OSError as exc:
+                print(f"⚠️  Failed to persist TTS cache entry: {exc}")
+                return
+
+            previous = self._entries.get(key)
+            if previous is not None:
+                self._disk_bytes -= previous["size"]
+            self._entries[key] = {
+                "size": len(audio),
+                "hits": previous["hits"] if previous else 0,
+                "last_access": time.time(),
+            }
+            if meta is not None:
+                self._entries[key]["meta"] = meta
+            self._disk_bytes += len(audio)
+            self.stats["writes"] += 1
+            self._dirty = True
+
+            self._evict_disk(keep=key)
+            self._maybe_flush()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            for key in list(self._entries):
+                self._remove_disk(key)
+            self._dirty = True
+            self._maybe_flush()
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries.keys() | self._memory.keys())
+
+    def status(self) -> Dict[str, object]:
+        with self._lock:
+            lookups = self.stats["memory_hits"] + self.stats["disk_hits"] + self.stats["misses"]
+            hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+            return {
+                "policy": self.policy,
+                "entries": len(self._entries),
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "memory_budget": self.memory_budget,
+                "disk_bytes": self._disk_bytes,
+                "disk_budget": self.disk_budget,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                **self.stats,
+            }
@@ -0,0 +1,235 @@
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Hashable, Optional, Set, Tuple
+
+# Words that carry little meaning for matching near-duplicate questions.
+# Modals, auxiliaries and negations are deliberately kept: "can I return
+# it" != "should I return it", and "is it safe" != "is it not safe".
+_STOPWORDS = frozenset("""
+a an the i me my we our you your it its this that these those of to in on
+at for with about from by as and or please tell kindly hi hello hey what
+whats
+""".split())
+
+# Shorter queries are too ambiguous to answer from a near-duplicate
+_MIN_SIMILAR_TOKENS = 3
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+
+
+class _Entry:
+    __slots__ = ("response", "expires", "scope", "tokens")
+
+    def __init__(self, response: str, expires: float, scope: str, tokens: FrozenSet[str]):
+        self.response = response
+        self.expires = expires
+        self.scope = scope
+        self.tokens = tokens
+
+
+class ResponseCache:
+    """
+    LLM answer cache with an exact tier and an optional near-duplicate tier.
+
+    Exact keys are a fingerprint of model, normalized query and a hash of the
+    context the prompt was built with. The near-duplicate tier matches other
+    queries for the same model and context by Jaccard similarity of their
+    content-word sets, via a per-scope inverted index; queries with fewer
+    than three content words only hit exactly. Entries expire after
+    ``ttl`` seconds and the least recently used are evicted past
+    ``max_entries``. Thread-safe.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: float = 3600.0,
+        similarity_threshold: float = 0.0,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold  # 0 disables the second tier
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._index: Dict[str, Dict[str, Set[str]]] = {}  # scope -> token -> keys
+        self.stats: Dict[str, int] = {
+            "exact_hits": 0,
+            "similar_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+        }
+
+    # ------------------------------------------------------------------ keys
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        return " ".join(_NON_WORD.sub(" ", query.lower()).split())
+
+    @classmethod
+    def content_tokens(cls, query: str) -> FrozenSet[str]:
+        tokens = set()
+        for token in cls.normalize_query(query).split():
+            if token in _STOPWORDS:
+                continue
+            # Crude plural folding so "prices" matches "price"
+            if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+                token = token[:-1]
+            tokens.add(token)
+        return frozenset(tokens)
+
+    @staticmethod
+    def _scope(model: str, context: str) -> str:
+        context_hash = hashlib.sha256(context.encode("utf-8")).hexdigest()
+        return f"{model}:{context_hash}"
+
+    @classmethod
+    def make_key(cls, model: str, query: str, context: str = "") -> Tuple[str, str]:
+        """Return (exact key, scope) for a prompt"""
+        scope = cls._scope(model, context)
+        payload = f"{scope}\x00{cls.normalize_query(query)}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest(), scope
+
+    # ---------------------------------------------------------------- access
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        scope_index = self._index.get(entry.scope)
+        if scope_index is None:
+            return
+        for token in entry.tokens:
+            keys = scope_index.get(token)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del scope_index[token]
+        if not scope_index:
+            del self._index[entry.scope]
+
+    def _live(self, key: str, now: float) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires <= now:
+            self._drop(key)
+            self.stats["expirations"] += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _find_similar(self, scope: str, tokens: FrozenSet[str], now: float) -> Optional[_Entry]:
+        scope_index = self._index.get(scope)
+        if not scope_index or len(tokens) < _MIN_SIMILAR_TOKENS:
+            return None
+
+        overlap: Dict[str, int] = {}
+        for token in tokens:
+            for key in scope_index.get(token, ()):
+                overlap[key] = overlap.get(key, 0) + 1
+
+        best_key, best_score = None, 0.0
+        for key, shared in overlap.items():
+            candidate = self._entries[key].tokens
+            score = shared / (len(tokens) + len(candidate) - shared)
+            if score > best_score:
+                best_key, best_score = key, score
+
+        if best_key is None or best_score < self.similarity_threshold:
+            return None
+        return self._live(best_key, now)
+
+    def get(self, model: str, query: str, context: str = "") -> Optional[str]:
+        key, scope = self.make_key(model, query, context)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._live(key, now)
+            if entry is not None:
+                self.stats["exact_hits"] += 1
+                return entry.response
+
+            if self.similarity_threshold > 0:
+                entry = self._find_similar(scope, self.content_tokens(query), now)
+                if entry is not None:
+                    self.stats["similar_hits"] += 1
+                    return entry.response
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, model: str, query: str, context: str, response: str) -> None:
+        if not response or self.max_entries <= 0:
+            return
+        key, scope = self.make_key(model, query, context)
+        tokens = self.content_tokens(query)
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = _Entry(response, time.monotonic() + self.ttl, scope, tokens)
+            scope_index = self._index.setdefault(scope, {})
+            for token in tokens:
+                scope_index.setdefault(token, set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.stats["evictions"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._index.clear()
+
+    def status(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "similarity_threshold": self.similarity_threshold,
+                **self.stats,
+            }
+
+
+class LRUCache:
+    """Small thread-safe LRU map with hit/miss counters"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries  # 0 disables caching
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def status(self) -> Dict[str, object]:
+        with self._lock:
+            return {"entries": len(self._entries), "max_entries": self.max_entries, **self.stats}
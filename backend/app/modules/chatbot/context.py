@@ -0,0 +1,203 @@
+"""
+Context assembly for RAG prompts.
+
+Retrieved chunks overlap by ``rag_chunk_overlap`` characters and several hits
+often come from the same passage. ``pack_context`` merges overlapping or
+adjacent chunks of the same source into single spans (by ``start_index``
+when the splitter recorded it, otherwise by matching the overlapping text),
+drops duplicates and packs spans by relevance into a token budget.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+_MIN_TEXT_OVERLAP = 32  # Shorter suffix/prefix matches are treated as coincidence
+_SENTENCE_END = re.compile(r"[.!?](?=\s)|\n")
+
+_encoding = None
+_encoding_loaded = False
+
+
+def _get_encoding():
+    """tiktoken encoding if installed and available offline, else None"""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            print(f"⚠️  tiktoken unavailable ({e}); estimating tokens from length")
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """Token count: tiktoken cl100k when available, else ~4 characters per token"""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode_ordinary(text))
+    return max(1, (len(text) + 3) // 4)
+
+
+def truncate_to_tokens(text: str, token_budget: int) -> str:
+    """Longest prefix within the budget, cut at a sentence end (else a word break)"""
+    if token_budget <= 0:
+        return ""
+    encoding = _get_encoding()
+    if encoding is not None:
+        prefix = encoding.decode(encoding.encode_ordinary(text)[:token_budget])
+    else:
+        prefix = text[:token_budget * 4]
+    if len(prefix) >= len(text):
+        return text
+
+    ends = [match.end() for match in _SENTENCE_END.finditer(prefix)]
+    cut = ends[-1] if ends and ends[-1] >= len(prefix) // 2 else prefix.rfind(" ")
+    prefix = prefix[:cut if cut > 0 else len(prefix)].rstrip()
+    while prefix and count_tokens(prefix) > token_budget:
+        prefix = prefix[:prefix.rfind(" ")] if " " in prefix else ""
+    return prefix
+
+
+@dataclass
+class _Span:
+    source: Tuple
+    text: str
+    score: float
+    start: Optional[int]
+
+    @property
+    def end(self) -> Optional[int]:
+        return None if self.start is None else self.start + len(self.text)
+
+
+@dataclass
+class PackedContext:
+    """Prompt context plus what packing saved"""
+    text: str = ""
+    tokens: int = 0
+    naive_tokens: int = 0  # Tokens of the retrieved chunks joined as-is
+    chunks: int = 0
+    spans: int = 0
+    sources: List[str] = field(default_factory=list)
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(0, self.naive_tokens - self.tokens)
+
+    def to_dict(self) -> Dict:
+        return {
+            "tokens": self.tokens,
+            "tokens_saved": self.tokens_saved,
+            "chunks": self.chunks,
+            "spans": self.spans,
+            "sources": self.sources,
+        }
+
+
+def _text_overlap(left: str, right: str) -> int:
+    """Length of the longest suffix of ``left`` that is a prefix of ``right``"""
+    probe = right[:_MIN_TEXT_OVERLAP]
+    if len(probe) < _MIN_TEXT_OVERLAP:
+        return 0
+    start = left.find(probe)
+    while start != -1:
+        if right.startswith(left[start:]):
+            return len(left) - start
+        start = left.find(probe, start + 1)
+    return 0
+
+
+def _join(left: _Span, right: _Span) -> Optional[_Span]:
+    """Merge two spans of one source if they overlap or touch"""
+    score = max(left.score, right.score)
+
+    if left.start is not None and right.start is not None:
+        if right.start < left.start:
+            left, right = right, left
+        if right.start > left.end:
+            return None
+        text = left.text + right.text[left.end - right.start:] if right.end > left.end else left.text
+        return _Span(left.source, text, score, left.start)
+
+    if right.text in left.text:
+        return _Span(left.source, left.text, score, left.start)
+    if left.text in right.text:
+        return _Span(left.source, right.text, score, right.start)
+    for first, second in ((left, right), (right, left)):
+        overlap = _text_overlap(first.text, second.text)
+        if overlap:
+            return _Span(left.source, first.text + second.text[overlap:], score, first.start)
+    return None
+
+
+def merge_chunks(hits: List[Tuple[float, Dict]]) -> List[_Span]:
+    """Collapse overlapping chunks per source; spans come back best first"""
+    spans: List[_Span] = []
+    seen_texts = set()
+
+    for score, chunk in hits:
+        text = chunk["text"]
+        if text in seen_texts:
+            continue
+        seen_texts.add(text)
+
+        metadata = chunk.get("metadata") or {}
+        span = _Span(
+            (metadata.get("source"), metadata.get("page")),
+            text,
+            score,
+            metadata.get("start_index"),
+        )
+
+        # Fold into existing spans of the same source until nothing merges
+        merged = True
+        while merged:
+            merged = False
+            for i, other in enumerate(spans):
+                if other.source != span.source:
+                    continue
+                joined = _join(other, span)
+                if joined is not None:
+                    span = joined
+                    del spans[i]
+                    merged = True
+                    break
+        spans.append(span)
+
+    spans.sort(key=lambda s: s.score, reverse=True)
+    return spans
+
+
+def pack_context(hits: List[Tuple[float, Dict]], token_budget: int) -> PackedContext:
+    """Merge hits and keep the most relevant spans that fit the budget"""
+    packed = PackedContext(chunks=len(hits))
+    if not hits:
+        return packed
+
+    packed.naive_tokens = count_tokens("\n\n".join(chunk["text"] for _, chunk in hits))
+
+    parts = []
+    separator_tokens = count_tokens("\n\n")
+    for span in merge_chunks(hits):
+        text = span.text
+        tokens = count_tokens(text) + (separator_tokens if parts else 0)
+        if token_budget > 0 and packed.tokens + tokens > token_budget:
+            if parts:
+                continue
+            # The best span alone is over budget: keep its beginning rather than nothing
+            text = truncate_to_tokens(text, token_budget)
+            if not text:
+                continue
+            tokens = count_tokens(text)
+        parts.append(text)
+        packed.tokens += tokens
+        source = span.source[0]
+        if source and source not in packed.sources:
+            packed.sources.append(source)
+
+    packed.text = "\n\n".join(parts)
+    packed.spans = len(parts)
+    return packed
@@ -0,0 +1,128 @@
+"""
+Local, offline embedding backends for the RAG index.
+
+* ``SentenceTransformerEmbedding`` runs a sentence-transformers model on
+  CPU from the local model cache (no network).
+* ``HashingEmbedding`` needs nothing but NumPy: signed feature hashing of
+  words, word bigrams and character trigrams. Lower quality than a neural
+  model, but deterministic, instant to load and good at exact terms.
+
+All backends return L2-normalized float32 rows, so inner product is cosine
+similarity.
+"""
+import math
+import re
+import zlib
+from collections import Counter
+from typing import List, Optional
+
+import numpy as np
+
+from ..shared.config import settings
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+class EmbeddingBackend:
+    """Interface for embedding backends"""
+
+    name: str = "base"
+    dimension: int = 0
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        raise NotImplementedError
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return self.embed([text])[0]
+
+
+class HashingEmbedding(EmbeddingBackend):
+    """Feature-hashing vectorizer (hashing trick) with sublinear term weights"""
+
+    CHAR_NGRAM = 3
+    CHAR_WEIGHT = 0.5
+
+    def __init__(self, dimension: int = 768):
+        self.dimension = dimension
+        self.name = f"hashing-{dimension}"
+
+    def _features(self, text: str) -> Counter:
+        words = _WORD.findall(text.lower())
+        features: Counter = Counter(words)
+        features.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+        n = self.CHAR_NGRAM
+        for word in set(words):
+            padded = f"<{word}>"
+            for i in range(len(padded) - n + 1):
+                features[f"#{padded[i:i + n]}"] += self.CHAR_WEIGHT
+        return features
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        dimension = self.dimension
+        for row, text in enumerate(texts):
+            vector = matrix[row]
+            for feature, count in self._features(text).items():
+                h = zlib.crc32(feature.encode("utf-8"))
+                sign = 1.0 if (h >> 31) & 1 else -1.0
+                vector[h % dimension] += sign * (1.0 + math.log(count) if count >= 1 else count)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix /= norms
+        return matrix
+
+
+class SentenceTransformerEmbedding(EmbeddingBackend):
+    """sentence-transformers model on CPU, loaded from the local cache only"""
+
+    def __init__(self, model_name: str, batch_size: int = 64):
+        from sentence_transformers import SentenceTransformer
+
+        try:
+            self.model = SentenceTransformer(model_name, device="cpu", local_files_only=True)
+        except TypeError:
+            # Older releases without local_files_only
+            self.model = SentenceTransformer(model_name, device="cpu")
+        self.batch_size = batch_size
+        self.dimension = int(self.model.get_sentence_embedding_dimension())
+        self.name = f"st:{model_name}"
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        )
+        return np.asarray(vectors, dtype=np.float32)
+
+
+def create_embedding_backend(backend: Optional[str] = None) -> EmbeddingBackend:
+    """
+    Build the configured backend.
+
+    ``auto`` tries the local sentence-transformers model and falls back to
+    hashing when the package or the cached model is unavailable.
+    """
+    backend = (backend or settings.embedding_backend).lower()
+
+    if backend in ("auto", "sentence-transformers"):
+        try:
+            embedder = SentenceTransformerEmbedding(
+                settings.embedding_model,
+                batch_size=settings.embedding_batch_size,
+            )
+            print(f"✅ Embeddings: {embedder.name} ({embedder.dimension}d, CPU)")
+            return embedder
+        except Exception as exc:
+            if backend != "auto":
+                raise
+            print(f"⚠️  sentence-transformers unavailable ({exc}); using hashing embeddings")
+
+    if backend not in ("auto", "hashing"):
+        raise ValueError(f"Unknown embedding backend '{backend}'")
+
+    embedder = HashingEmbedding(settings.embedding_dimension)
+    print(f"✅ Embeddings: {embedder.name}")
+    return embedder
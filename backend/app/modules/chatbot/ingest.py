@@ -0,0 +1,87 @@
+"""
+Document parsing for the ingestion pipeline.
+
+``parse_file`` runs in worker processes: it hashes the file, skips it if
+the content matches the hash already indexed, otherwise loads it page by
+page and splits each page as it is read. Only the resulting chunk texts
+and metadata travel back to the parent, which embeds them in fixed-size
+batches.
+"""
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from .manifest import file_sha256
+
+_splitters: Dict[Tuple[int, int], object] = {}
+
+
+@dataclass
+class ParsedFile:
+    """Result of parsing one file in a worker"""
+    path: str
+    sha256: str
+    mtime: float
+    size: int
+    unchanged: bool = False
+    chunks: List[Tuple[str, Dict]] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+def _get_splitter(chunk_size: int, chunk_overlap: int):
+    """Per-process splitter, reused across files"""
+    key = (chunk_size, chunk_overlap)
+    if key not in _splitters:
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+        _splitters[key] = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            length_function=len,
+            add_start_index=True,  # Lets the context packer merge overlapping hits
+        )
+    return _splitters[key]
+
+
+def _lazy_pages(path: str):
+    from langchain_community.document_loaders import PyPDFLoader, TextLoader
+
+    loader = PyPDFLoader(path) if path.endswith(".pdf") else TextLoader(path)
+    return loader.lazy_load()
+
+
+def parse_file(
+    path: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    known_sha256: Optional[str] = None,
+) -> ParsedFile:
+    """Hash, load and split one file (top-level so process pools can pickle it)"""
+    try:
+        stat = os.stat(path)
+        parsed = ParsedFile(path, file_sha256(path), stat.st_mtime, stat.st_size)
+    except OSError as e:
+        return ParsedFile(path, "", 0.0, 0, error=str(e))
+
+    if parsed.sha256 == known_sha256:
+        parsed.unchanged = True
+        return parsed
+
+    try:
+        splitter = _get_splitter(chunk_size, chunk_overlap)
+        for page in _lazy_pages(path):
+            for chunk in splitter.split_documents([page]):
+                parsed.chunks.append((chunk.page_content, dict(chunk.metadata)))
+    except Exception as e:
+        parsed.chunks = []
+        parsed.error = str(e)
+    return parsed
+
+
+def create_parse_pool(workers: int) -> Executor:
+    """Process pool for parse_file (spawned: the parent runs threads)"""
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
@@ -0,0 +1,111 @@
+"""
+Background ingestion jobs.
+
+Uploads return as soon as the files are on disk; indexing runs as an
+asyncio task whose per-file progress is polled via
+``GET /api/chatbot/documents/jobs/{job_id}``.
+"""
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional
+
+
+class IngestJob:
+    """Progress of one ingestion run"""
+
+    def __init__(self, file_paths: List[str], bytes_received: int = 0):
+        self.id = uuid.uuid4().hex
+        self.status = "queued"
+        self.files: Dict[str, Dict] = {
+            os.path.abspath(path): {"name": os.path.basename(path), "status": "pending", "chunks": 0}
+            for path in file_paths
+        }
+        self.bytes_received = bytes_received
+        self.chunks_added = 0
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def record(self, path: str, status: str, chunks: int = 0):
+        """Progress callback from the ingestion thread"""
+        entry = self.files.get(os.path.abspath(path))
+        if entry is None:
+            return
+        entry["status"] = status
+        entry["chunks"] = chunks
+        self.chunks_added += chunks
+
+    def to_dict(self) -> Dict:
+        end = self.finished_at or time.time()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        done = sum(1 for f in self.files.values() if f["status"] != "pending")
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "files": list(self.files.values()),
+            "files_done": done,
+            "files_total": len(self.files),
+            "chunks_added": self.chunks_added,
+            "bytes_received": self.bytes_received,
+            "elapsed": round(elapsed, 3),
+            "chunks_per_second": round(self.chunks_added / elapsed, 1) if elapsed else 0.0,
+            "error": self.error,
+        }
+
+
+class IngestJobManager:
+    """Runs ingestion jobs in the background and keeps recent ones for polling"""
+
+    def __init__(self, max_jobs: int = 100):
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, IngestJob]" = OrderedDict()
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def submit(
+        self,
+        file_paths: List[str],
+        run: Callable[[List[str], Callable], Awaitable],
+        bytes_received: int = 0,
+    ) -> IngestJob:
+        """Create a job and start ``run(file_paths, progress)`` as a task"""
+        job = IngestJob(file_paths, bytes_received)
+        self._jobs[job.id] = job
+        self._tasks[job.id] = asyncio.create_task(self._run(job, file_paths, run))
+        self._evict(keep=job.id)  # Its status URL is about to be handed out
+        return job
+
+    async def _run(self, job: IngestJob, file_paths: List[str], run):
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            await run(file_paths, job.record)
+            job.status = "completed"
+        except Exception as e:
+            print(f"Error in ingestion job {job.id}: {e}")
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+            self._tasks.pop(job.id, None)
+
+    def _evict(self, keep: Optional[str] = None):
+        """Forget the oldest finished jobs beyond max_jobs"""
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.max_jobs:
+                break
+            if job_id not in self._tasks and job_id != keep:
+                del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        return self._jobs.get(job_id)
+
+    def active(self) -> int:
+        return len(self._tasks)
+
+
+# Global job manager instance
+ingest_jobs = IngestJobManager()
@@ -0,0 +1,180 @@
+"""
+BM25 inverted index over chunk text.
+
+Built incrementally as chunks are indexed and persisted next to the vector
+index. The tokenizer keeps product codes and model numbers intact
+("SKU-4411", "XR2.5") and also emits their parts and separator-free form,
+so "sku 4411", "sku4411" and "SKU-4411" all match each other.
+"""
+import json
+import math
+import os
+import re
+import tempfile
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+LEXICAL_FILE = "lexical.json"
+
+_TOKEN = re.compile(r"[^\W_]+(?:[-_./:#+][^\W_]+)*")
+_SEPARATORS = re.compile(r"[-_./:#+]")
+_ALPHA_DIGIT = re.compile(r"\d+|[^\W\d_]+")
+
+STOP_WORDS = frozenset("""
+a an and are as at be but by do does for from has have how i if in is it its
+me my of on or our so that the their them then there these they this to was
+we were what when where which who why will with you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased terms, with compound codes expanded into their parts"""
+    terms = []
+    for match in _TOKEN.finditer(text.lower()):
+        token = match.group()
+        if token in STOP_WORDS:
+            continue
+        terms.append(token)
+
+        parts = _SEPARATORS.split(token)
+        if len(parts) > 1:
+            terms.append("".join(parts))
+        else:
+            parts = _ALPHA_DIGIT.findall(token)
+            if len(parts) < 2:
+                continue
+        terms.extend(part for part in parts if part not in STOP_WORDS)
+    return terms
+
+
+class LexicalIndex:
+    """Okapi BM25 over chunk ids"""
+
+    def __init__(self, persist_dir: str, k1: float = 1.5, b: float = 0.75):
+        self.path = Path(persist_dir) / LEXICAL_FILE
+        self.k1 = k1
+        self.b = b
+        self._doc_terms: Dict[str, Dict[str, int]] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._doc_len: Dict[str, int] = {}
+        self._total_len = 0
+        self._dirty = False
+        self.load()
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def ids(self) -> set:
+        return set(self._doc_terms)
+
+    def terms(self, chunk_id: str) -> Dict[str, int]:
+        return self._doc_terms.get(chunk_id, {})
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def load(self):
+        if not self.path.exists():
+            return
+        try:
+            doc_terms = json.loads(self.path.read_text(encoding="utf-8"))
+        except Exception as e:
+            print(f"⚠️  Could not load lexical index: {e}")
+            return
+        for chunk_id, terms in doc_terms.items():
+            self._insert(chunk_id, terms)
+        self._dirty = False
+
+    def save(self):
+        """Write the per-chunk term counts atomically (postings are rebuilt on load)"""
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=".lexical.")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self._doc_terms, f, ensure_ascii=False, separators=(",", ":"))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        self._dirty = False
+
+    # ------------------------------------------------------------------
+    # Mutation
+    # ------------------------------------------------------------------
+
+    def _insert(self, chunk_id: str, terms: Dict[str, int]):
+        self._doc_terms[chunk_id] = terms
+        length = sum(terms.values())
+        self._doc_len[chunk_id] = length
+        self._total_len += length
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[chunk_id] = tf
+
+    def add(self, ids: List[str], texts: List[str]):
+        """Index a batch of chunks; existing ids are replaced"""
+        self.delete(chunk_id for chunk_id in ids if chunk_id in self._doc_terms)
+        for chunk_id, text in zip(ids, texts):
+            self._insert(chunk_id, dict(Counter(tokenize(text))))
+        self._dirty = True
+
+    def delete(self, ids: Iterable[str]) -> int:
+        removed = 0
+        for chunk_id in list(ids):
+            terms = self._doc_terms.pop(chunk_id, None)
+            if terms is None:
+                continue
+            for term in terms:
+                postings = self._postings[term]
+                del postings[chunk_id]
+                if not postings:
+                    del self._postings[term]
+            self._total_len -= self._doc_len.pop(chunk_id)
+            removed += 1
+        if removed:
+            self._dirty = True
+        return removed
+
+    def clear(self):
+        self._doc_terms.clear()
+        self._postings.clear()
+        self._doc_len.clear()
+        self._total_len = 0
+        self._dirty = False
+        if self.path.exists():
+            self.path.unlink()
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+
+    def search(self, query: str, k: int = 4) -> List[Tuple[float, str]]:
+        """Top-k chunk ids by BM25, best first"""
+        n = len(self._doc_terms)
+        if not n or k <= 0:
+            return []
+
+        avg_len = self._total_len / n or 1.0
+        k1, b = self.k1, self.b
+        scores: Dict[str, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            df = len(postings)
+            idf = math.log(1.0 + (n - df + 0.5) / (df + 0.5))
+            for chunk_id, tf in postings.items():
+                norm = k1 * (1.0 - b + b * self._doc_len[chunk_id] / avg_len)
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (k1 + 1.0) / (tf + norm)
+
+        best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(score, chunk_id) for chunk_id, score in best]
+
+    def status(self) -> Dict:
+        return {"chunks": len(self._doc_terms), "terms": len(self._postings)}
@@ -1,6 +1,20 @@
-from typing import Optional, AsyncGenerator
-import google.generativeai as genai
+from typing import Optional, AsyncGenerator, Dict
+import asyncio
 from ..shared.config import settings
+from ..shared.lazy import LazyInstance
+from ..shared.startup import startup_report
+from .cache import ResponseCache
+
+genai = None  # google.generativeai, imported on first use (~0.7s)
+
+
+def _load_genai():
+    global genai
+    if genai is None:
+        with startup_report.track("llm", "import"):
+            import google.generativeai as _genai
+        genai = _genai
+    return genai
 
 
 class LLMManager:
@@ -8,11 +22,19 @@ class LLMManager:
     
     def __init__(self):
         self.gemini_model = None
+        # Model objects are reused so their async clients (and connections) are too
+        self._models: Dict[str, object] = {}
+        self.cache = ResponseCache(
+            max_entries=settings.llm_cache_max_entries,
+            ttl=settings.llm_cache_ttl,
+            similarity_threshold=settings.llm_cache_similarity_threshold,
+        )
         self._initialize_llms()
     
     def _initialize_llms(self):
         """Initialize Gemini LLM"""
         if settings.gemini_api_key:
+            _load_genai()
             # Configure direct Gemini API
             genai.configure(api_key=settings.gemini_api_key)
             
@@ -30,6 +52,7 @@ class LLMManager:
                 try:
                     # Just create the model - don't test generation during init
                     test_model = genai.GenerativeModel(model_name)
+                    self._models[model_name] = test_model
                     self.gemini_model = model_name
                     print(f"✅ Gemini LLM initialized successfully with {model_name}")
                     return
@@ -51,68 +74,140 @@ class LLMManager:
     def get_model(self, provider: str = "gemini"):
         """Get Gemini model instance"""
         if self.gemini_model:
-            return genai.GenerativeModel(self.gemini_model)
+            model = self._models.get(self.gemini_model)
+            if model is None:
+                model = _load_genai().GenerativeModel(self.gemini_model)
+                self._models[self.gemini_model] = model
+            return model
         else:
             raise ValueError("Gemini API key not configured or model not available")
+
+    @staticmethod
+    def _build_prompt(query: str, context: str = "", history: str = "") -> str:
+        prompt = "You are a helpful AI assistant. Use the provided context to answer questions accurately."
+        if context:
+            prompt += f"\n\nContext:\n{context}"
+        if history:
+            prompt += f"\n\nConversation so far:\n{history}"
+        prompt += f"\n\nUser: {query}\nAssistant:"
+        return prompt
+
+    @staticmethod
+    def _cache_scope(context: str, history: str) -> str:
+        """Answers depend on the conversation too, so history is part of the cache scope"""
+        return f"{context}\x00{history}" if history else context
+
+    def _translate_error(self, exc: Exception, streaming: bool = False) -> Exception:
+        error_msg = str(exc) or exc.__class__.__name__
+        if isinstance(exc, asyncio.TimeoutError):
+            return TimeoutError(f"Gemini API {'streaming ' if streaming else ''}request timed out")
+        if "404" in error_msg or "not found" in error_msg.lower():
+            return ValueError(f"Gemini model '{self.gemini_model}' is not available. Please check your API key and model access. Error: {error_msg}")
+        return Exception(f"Gemini API {'streaming ' if streaming else ''}error: {error_msg}")
+
+    @staticmethod
+    def _replay_chunks(text: str):
+        """Split a cached answer into word-aligned chunks for streaming"""
+        size = max(1, settings.llm_cache_replay_chunk_chars)
+        start = 0
+        while start < len(text):
+            end = text.find(" ", start + size)
+            end = len(text) if end < 0 else end + 1
+            yield text[start:end]
+            start = end
+        
+    @staticmethod
+    def _chunk_texts(chunk):
+        if hasattr(chunk, 'text') and chunk.text:
+            yield chunk.text
+        elif hasattr(chunk, 'parts'):
+            for part in chunk.parts:
+                if hasattr(part, 'text') and part.text:
+                    yield part.text
     
     async def generate_response(
         self, 
         query: str, 
         context: str = "", 
-        provider: str = "gemini"
+        provider: str = "gemini",
+        history: str = ""
     ) -> str:
         """Generate a response using the specified LLM"""
         model = self.get_model(provider)
-        
-        prompt = "You are a helpful AI assistant. Use the provided context to answer questions accurately."
-        if context:
-            prompt += f"\n\nContext:\n{context}"
-        prompt += f"\n\nUser: {query}\nAssistant:"
+        scope = self._cache_scope(context, history)
+
+        cached = self.cache.get(self.gemini_model, query, scope)
+        if cached is not None:
+            return cached
+
+        prompt = self._build_prompt(query, context, history)
+        timeout = settings.llm_request_timeout
         
         try:
-            response = model.generate_content(prompt)
+            response = await asyncio.wait_for(
+                model.generate_content_async(prompt, request_options={"timeout": timeout}),
+                timeout=timeout,
+            )
             if hasattr(response, 'text'):
-                return response.text
+                text = response.text
             else:
                 # Handle different response formats
-                return str(response)
+                text = str(response)
         except Exception as e:
-            error_msg = str(e)
-            if "404" in error_msg or "not found" in error_msg.lower():
-                raise ValueError(f"Gemini model '{self.gemini_model}' is not available. Please check your API key and model access. Error: {error_msg}")
-            raise Exception(f"Gemini API error: {error_msg}")
+            raise self._translate_error(e) from e
+
+        self.cache.put(self.gemini_model, query, scope, text)
+        return text
     
     async def stream_response(
         self, 
         query: str, 
         context: str = "", 
-        provider: str = "gemini"
+        provider: str = "gemini",
+        history: str = ""
     ) -> AsyncGenerator[str, None]:
-        """Stream response chunks from the LLM"""
+        """Stream response chunks from the LLM (cached answers are replayed)"""
         model = self.get_model(provider)
-        
-        prompt = "You are a helpful AI assistant. Use the provided context to answer questions accurately."
-        if context:
-            prompt += f"\n\nContext:\n{context}"
-        prompt += f"\n\nUser: {query}\nAssistant:"
+        scope = self._cache_scope(context, history)
+
+        cached = self.cache.get(self.gemini_model, query, scope)
+        if cached is not None:
+            for text in self._replay_chunks(cached):
+                yield text
+                await asyncio.sleep(0)
+            return
+
+        prompt = self._build_prompt(query, context, history)
+        parts = []
         
         try:
-            response = model.generate_content(prompt, stream=True)
-            for chunk in response:
-                if hasattr(chunk, 'text') and chunk.text:
-                    yield chunk.text
-                elif hasattr(chunk, 'parts'):
-                    for part in chunk.parts:
-                        if hasattr(part, 'text') and part.text:
-                            yield part.text
+            response = await asyncio.wait_for(
+                model.generate_content_async(
+                    prompt,
+                    stream=True,
+                    request_options={"timeout": settings.llm_request_timeout},
+                ),
+                timeout=settings.llm_stream_first_chunk_timeout,
+            )
+            chunks = response.__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(
+                        chunks.__anext__(), timeout=settings.llm_stream_idle_timeout
+                    )
+                except StopAsyncIteration:
+                    break
+                for text in self._chunk_texts(chunk):
+                    parts.append(text)
+                    yield text
         except Exception as e:
-            error_msg = str(e)
-            if "404" in error_msg or "not found" in error_msg.lower():
-                raise ValueError(f"Gemini model '{self.gemini_model}' is not available. Please check your API key and model access. Error: {error_msg}")
-            raise Exception(f"Gemini API streaming error: {error_msg}")
+            raise self._translate_error(e, streaming=True) from e
+
+        # Only complete answers are cached
+        self.cache.put(self.gemini_model, query, scope, "".join(parts))
 
 
-# Global LLM manager instance
-llm_manager = LLMManager()
+# Global LLM manager instance (constructed on first use or at warm-up)
+llm_manager = LazyInstance(LLMManager, "llm")
 
 
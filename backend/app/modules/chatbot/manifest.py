@@ -0,0 +1,96 @@
+"""
+Ingestion manifest: which files are in the index and under which chunk ids.
+
+Each entry records the file's sha256, mtime and size plus the ids of the
+chunks it produced, so re-ingesting skips unchanged files (mtime and size
+match, or the content hash does), replaces the chunks of changed files and
+drops the chunks of deleted ones.
+"""
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+def file_sha256(path: str, block_size: int = 1024 * 1024) -> str:
+    """Hash a file in blocks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class IngestManifest:
+    """Persistent path -> {sha256, mtime, size, chunk_ids} map"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.entries: Dict[str, Dict] = {}
+        self._dirty = False
+        self.load()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def load(self):
+        if not self.path.exists():
+            return
+        try:
+            self.entries = json.loads(self.path.read_text(encoding="utf-8"))
+        except Exception as e:
+            print(f"⚠️  Could not load ingestion manifest: {e}")
+            self.entries = {}
+
+    def save(self):
+        """Write the manifest atomically"""
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=".manifest.")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        self._dirty = False
+
+    def get(self, path: str) -> Optional[Dict]:
+        return self.entries.get(path)
+
+    def set(self, path: str, sha256: str, mtime: float, size: int, chunk_ids: List[str]):
+        self.entries[path] = {
+            "sha256": sha256,
+            "mtime": mtime,
+            "size": size,
+            "chunk_ids": chunk_ids,
+        }
+        self._dirty = True
+
+    def touch(self, path: str, mtime: float, size: int):
+        """Record a new mtime for a file whose content did not change"""
+        self.entries[path].update(mtime=mtime, size=size)
+        self._dirty = True
+
+    def remove(self, path: str) -> Optional[Dict]:
+        entry = self.entries.pop(path, None)
+        if entry is not None:
+            self._dirty = True
+        return entry
+
+    def paths_under(self, directory: str) -> List[str]:
+        prefix = os.path.join(directory, "")
+        return [path for path in self.entries if path.startswith(prefix)]
+
+    def clear(self):
+        self.entries = {}
+        self._dirty = False
+        if self.path.exists():
+            self.path.unlink()
@@ -1,156 +1,489 @@
-from typing import List, Optional
+from concurrent.futures import FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from collections import deque
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import asyncio
+import glob
+import hashlib
 import os
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import (
-    PyPDFLoader,
-    TextLoader,
-    DirectoryLoader
-)
-from langchain_community.vectorstores import Chroma
-from langchain_openai import OpenAIEmbeddings
-from langchain_core.documents import Document
+import threading
+import time
 from ..shared.config import settings
+from ..shared.lazy import LazyInstance
+from ..shared.startup import startup_report
+from .cache import LRUCache
+from .context import PackedContext, pack_context
+from .ingest import ParsedFile, create_parse_pool, parse_file
+from .lexical import LexicalIndex, tokenize
+from .manifest import IngestManifest
+
+SUPPORTED_EXTENSIONS = (".pdf", ".txt")
 
 
 class RAGSystem:
-    """Retrieval-Augmented Generation system using ChromaDB"""
+    """Hybrid (BM25 + local embedding) Retrieval-Augmented Generation"""
     
     def __init__(self):
-        # RAG disabled - requires OpenAI embeddings which are not available
+        with startup_report.track("rag", "import"):
+            from .vector_index import VectorIndex
+        
+        self._lock = threading.RLock()  # Guards the indexes and the manifest
+        self._ingest_lock = threading.Lock()  # One ingestion at a time
+        self._pool = None
+        self.workers = settings.ingest_workers or os.cpu_count() or 1
+        self.last_ingest: Optional[Dict] = None
+        self.context_stats = {"requests": 0, "tokens": 0, "tokens_saved": 0}
+        
+        # Chunk texts and the lexical index load immediately; the embedding
+        # model loads in the background and lexical search covers until then
+        index_dir = os.path.join(settings.chroma_persist_dir, "local_index")
+        self.index = VectorIndex(index_dir)
+        self.lexical = LexicalIndex(index_dir)
+        self.manifest = IngestManifest(os.path.join(index_dir, "manifest.json"))
+        
+        # Repeated questions skip embedding and search; the retrieval cache
+        # is keyed on the index version, bumped by every index mutation
+        self.version = 0
+        self._query_vectors = LRUCache(settings.rag_query_cache_size)
+        self._results = LRUCache(settings.rag_retrieval_cache_size)
+        
         self.embeddings = None
+        self._embeddings_ready = threading.Event()
+        threading.Thread(target=self._load_embeddings, name="rag-embeddings", daemon=True).start()
+
+    def _load_embeddings(self):
+        """Create the local embedding backend and attach it to the index"""
+        from .embeddings import create_embedding_backend
         
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            length_function=len,
-        )
+        try:
+            with startup_report.track("rag", "embeddings"):
+                embeddings = create_embedding_backend()
+        except Exception as e:
+            print(f"⚠️  Embedding backend unavailable ({e}); retrieval is lexical-only")
+            self._embeddings_ready.set()
+            return
+        
+        with self._lock:
+            self.index.bind(embeddings.name, embeddings.dimension)
+            self._reconcile()
+            self.embeddings = embeddings
+            self._bump_version()
+        self._embeddings_ready.set()
+
+    def _reconcile(self):
+        """Bring the manifest and lexical index in line with the vector index"""
+        stale = [
+            path for path, entry in self.manifest.entries.items()
+            if not all(chunk_id in self.index for chunk_id in entry["chunk_ids"])
+        ]
+        for path in stale:
+            self.manifest.remove(path)
+        if stale:
+            print(f"⚠️  {len(stale)} file(s) missing from the vector index will be re-ingested")
         
-        self.vectorstore = None
-        self._initialize_vectorstore()
+        vector_ids = self.index.ids()
+        lexical_ids = self.lexical.ids()
+        self.lexical.delete(lexical_ids - vector_ids)
+        missing = list(vector_ids - lexical_ids)
+        if missing:
+            self.lexical.add(missing, [self.index.get(chunk_id)["text"] for chunk_id in missing])
+        
+        self.index.save()
+        self.lexical.save()
+        self.manifest.save()
+    
+    def _bump_version(self):
+        """Invalidate cached retrieval results (call with the lock held)"""
+        self.version += 1
+        self._results.clear()
+    
+    @staticmethod
+    def _normalize_query(query: str) -> str:
+        return " ".join(query.lower().split())
     
-    def _initialize_vectorstore(self):
-        """Initialize or load existing ChromaDB vectorstore"""
-        if not self.embeddings:
-            print("Warning: OpenAI API key not configured. RAG system disabled.")
+    def _require_embeddings(self):
+        """Wait for the embedding backend; ingestion needs it"""
+        self._embeddings_ready.wait()
+        if self.embeddings is None:
+            raise ValueError("Embedding backend unavailable; cannot index documents")
+    
+    @staticmethod
+    def _chunk_ids(path: str, sha256: str, count: int) -> List[str]:
+        """Stable chunk ids: same path and content always map to the same ids"""
+        prefix = hashlib.sha1(path.encode("utf-8")).hexdigest()[:12]
+        return [f"{prefix}-{sha256[:12]}-{i}" for i in range(count)]
+    
+    def _get_pool(self):
+        """Parser process pool, started on first multi-file ingest"""
+        if self._pool is None:
+            self._pool = create_parse_pool(self.workers)
+        return self._pool
+    
+    def _parse_files(self, todo: List[Tuple[str, Optional[Dict]]]) -> Iterator[Tuple[Optional[Dict], ParsedFile]]:
+        """
+        Parse files in the process pool, yielding results as they finish.
+        
+        At most ``2 * workers`` files are in flight, so parsed chunks never
+        pile up faster than the caller embeds them. If a worker crashes, the
+        pool is replaced and the files it had in flight are retried once.
+        """
+        args = (settings.rag_chunk_size, settings.rag_chunk_overlap)
+        
+        if self.workers <= 1 or len(todo) <= 1:
+            for path, entry in todo:
+                yield entry, parse_file(path, *args, entry and entry["sha256"])
             return
         
-        persist_dir = settings.chroma_persist_dir
+        pool = self._get_pool()
+        queue = iter(todo)
+        pending = {}
+        failed = []
+        retried = set()
         
-        # Create directory if it doesn't exist
-        os.makedirs(persist_dir, exist_ok=True)
+        def submit(path: str, entry: Optional[Dict]) -> bool:
+            try:
+                future = pool.submit(parse_file, path, *args, entry and entry["sha256"])
+            except Exception as e:
+                failed.append((entry, ParsedFile(path, "", 0.0, 0, error=str(e))))
+                return False
+            pending[future] = (path, entry)
+            return True
         
-        # Initialize Chroma with persistence
-        self.vectorstore = Chroma(
-            persist_directory=persist_dir,
-            embedding_function=self.embeddings,
-            collection_name="documents"
-        )
+        def submit_next():
+            for path, entry in queue:
+                if submit(path, entry):
+                    return
+        
+        for _ in range(2 * self.workers):
+            submit_next()
+        
+        while pending or failed:
+            while failed:
+                yield failed.pop()
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future not in pending:
+                    continue  # Already resubmitted after a pool crash
+                path, entry = pending.pop(future)
+                try:
+                    result = future.result()
+                except BrokenProcessPool as e:
+                    # A crashed worker fails every file in flight: replace the
+                    # pool and retry each once (a file that crashes it twice fails)
+                    in_flight = [(path, entry)] + list(pending.values())
+                    pending.clear()
+                    self.close()
+                    pool = self._get_pool()
+                    for retry_path, retry_entry in in_flight:
+                        if retry_path in retried:
+                            failed.append((retry_entry, ParsedFile(retry_path, "", 0.0, 0, error=str(e))))
+                        else:
+                            retried.add(retry_path)
+                            submit(retry_path, retry_entry)
+                    for _ in range(2 * self.workers - len(pending)):
+                        submit_next()
+                    continue
+                except Exception as e:
+                    result = ParsedFile(path, "", 0.0, 0, error=str(e))
+                submit_next()
+                yield entry, result
     
-    async def add_documents(self, file_paths: List[str]) -> int:
-        """Add documents to the vector store"""
-        if not self.vectorstore:
-            raise ValueError("Vectorstore not initialized. Check OpenAI API key.")
-        
-        all_documents = []
-        
-        for file_path in file_paths:
-            # Load document based on file type
-            if file_path.endswith('.pdf'):
-                loader = PyPDFLoader(file_path)
-            elif file_path.endswith('.txt'):
-                loader = TextLoader(file_path)
-            else:
-                print(f"Skipping unsupported file type: {file_path}")
-                continue
-            
-            documents = loader.load()
-            all_documents.extend(documents)
+    def _embed_batch(self, ids: List[str], texts: List[str], metadatas: List[Dict]):
+        """Embed one batch and add it to both indexes"""
+        vectors = self.embeddings.embed(texts)
+        with self._lock:
+            self.index.add(ids=ids, texts=texts, metadatas=metadatas, vectors=vectors)
+            self.lexical.add(ids, texts)
+            self._bump_version()
+    
+    def _delete_chunks(self, chunk_ids: List[str]):
+        with self._lock:
+            self.index.delete(chunk_ids)
+            self.lexical.delete(chunk_ids)
+            self._bump_version()
+    
+    def _ingest(
+        self,
+        file_paths: List[str],
+        prune_directory: Optional[str] = None,
+        progress: Optional[Callable[[str, str, int], None]] = None
+    ) -> Dict:
+        """
+        Bring the index in line with the given files.
         
-        # Split documents into chunks
-        chunks = self.text_splitter.split_documents(all_documents)
+        Unchanged files are skipped, changed files have their chunks
+        replaced and, with ``prune_directory``, files that disappeared from
+        that directory have their chunks removed. Files are parsed in worker
+        processes while the parent embeds chunks in fixed-size batches.
+        ``progress(path, status, chunks)`` is called as each file finishes.
+        """
+        stats = {"added": 0, "updated": 0, "skipped": 0, "removed": 0, "failed": 0, "chunks_added": 0}
+        started = time.perf_counter()
+        batch_size = settings.embedding_batch_size
+        seen = set()
+        todo = []
+        ids: List[str] = []
+        texts: List[str] = []
+        metadatas: List[Dict] = []
+        report = progress or (lambda path, status, chunks: None)
+        awaiting = deque()  # (manifest entry args, position of its last chunk in the stream)
+        queued = embedded = 0
         
-        # Add to vectorstore
-        self.vectorstore.add_documents(chunks)
+        def embed(count: int):
+            nonlocal embedded
+            if count:
+                self._embed_batch(ids[:count], texts[:count], metadatas[:count])
+                del ids[:count], texts[:count], metadatas[:count]
+                embedded += count
+            while awaiting and awaiting[0][1] <= embedded:
+                (path, sha256, mtime, size, chunk_ids), _ = awaiting.popleft()
+                # Only now is the file fully indexed; a failed embed leaves it to be retried
+                self.manifest.set(path, sha256, mtime, size, chunk_ids)
+                report(path, "indexed", len(chunk_ids))
         
-        return len(chunks)
-    
-    async def load_directory(self, directory_path: str) -> int:
-        """Load all supported documents from a directory"""
-        if not self.vectorstore:
-            raise ValueError("Vectorstore not initialized. Check OpenAI API key.")
-        
-        # Load PDF files
-        pdf_loader = DirectoryLoader(
-            directory_path,
-            glob="**/*.pdf",
-            loader_cls=PyPDFLoader
-        )
+        self._require_embeddings()
         
-        # Load text files
-        txt_loader = DirectoryLoader(
-            directory_path,
-            glob="**/*.txt",
-            loader_cls=TextLoader
+        with self._ingest_lock:
+            for file_path in file_paths:
+                path = os.path.abspath(file_path)
+                if not path.endswith(SUPPORTED_EXTENSIONS):
+                    print(f"Skipping unsupported file type: {file_path}")
+                    report(file_path, "unsupported", 0)
+                    continue
+                seen.add(path)
+                
+                try:
+                    stat = os.stat(path)
+                except OSError as e:
+                    print(f"Error loading {file_path}: {e}")
+                    stats["failed"] += 1
+                    report(path, "failed", 0)
+                    continue
+                
+                entry = self.manifest.get(path)
+                if entry and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+                    stats["skipped"] += 1
+                    report(path, "unchanged", 0)
+                    continue
+                todo.append((path, entry))
+            
+            for entry, parsed in self._parse_files(todo):
+                if parsed.error:
+                    print(f"Error loading {parsed.path}: {parsed.error}")
+                    stats["failed"] += 1
+                    report(parsed.path, "failed", 0)
+                    continue
+                
+                if parsed.unchanged:
+                    self.manifest.touch(parsed.path, parsed.mtime, parsed.size)
+                    stats["skipped"] += 1
+                    report(parsed.path, "unchanged", 0)
+                    continue
+                
+                if entry:
+                    self._delete_chunks(entry["chunk_ids"])
+                    stats["updated"] += 1
+                else:
+                    stats["added"] += 1
+                
+                chunk_ids = self._chunk_ids(parsed.path, parsed.sha256, len(parsed.chunks))
+                stats["chunks_added"] += len(parsed.chunks)
+                
+                ids.extend(chunk_ids)
+                for text, metadata in parsed.chunks:
+                    texts.append(text)
+                    metadatas.append(metadata)
+                queued += len(parsed.chunks)
+                awaiting.append(((parsed.path, parsed.sha256, parsed.mtime, parsed.size, chunk_ids), queued))
+                
+                while len(ids) >= batch_size:
+                    embed(batch_size)
+            
+            embed(len(ids))
+            
+            if prune_directory:
+                for path in self.manifest.paths_under(os.path.abspath(prune_directory)):
+                    if path not in seen:
+                        self._delete_chunks(self.manifest.remove(path)["chunk_ids"])
+                        stats["removed"] += 1
+                        report(path, "removed", 0)
+            
+            # Indexes first: a crash in between only causes a harmless re-ingest
+            with self._lock:
+                self.index.save()
+                self.lexical.save()
+                self.manifest.save()
+        
+        elapsed = time.perf_counter() - started
+        stats["seconds"] = round(elapsed, 3)
+        stats["chunks_per_second"] = round(stats["chunks_added"] / elapsed, 1) if elapsed else 0.0
+        self.last_ingest = stats
+        print(
+            f"📚 Ingested: {stats['added']} new, {stats['updated']} changed, "
+            f"{stats['skipped']} unchanged, {stats['removed']} removed, "
+            f"{stats['failed']} failed ({stats['chunks_added']} chunks, {stats['seconds']}s)"
         )
+        return stats
+    
+    async def add_documents(
+        self,
+        file_paths: List[str],
+        progress: Optional[Callable[[str, str, int], None]] = None
+    ) -> int:
+        """Add documents to the vector index"""
+        stats = await asyncio.to_thread(self._ingest, file_paths, None, progress)
+        return stats["chunks_added"]
+    
+    async def load_directory(self, directory_path: str) -> int:
+        """Sync all supported documents in a directory into the index"""
+        file_paths = []
+        for extension in SUPPORTED_EXTENSIONS:
+            file_paths.extend(glob.glob(os.path.join(directory_path, "**", f"*{extension}"), recursive=True))
         
-        all_documents = []
+        stats = await asyncio.to_thread(self._ingest, sorted(file_paths), directory_path)
+        return stats["chunks_added"]
+    
+    def _vector_search(self, query: str, limit: int) -> List[str]:
+        """Chunk ids by embedding similarity; empty while the model is cold"""
+        embeddings = self.embeddings
+        if embeddings is None:
+            return []
         
-        try:
-            all_documents.extend(pdf_loader.load())
-        except Exception as e:
-            print(f"Error loading PDFs: {e}")
+        key = (embeddings.name, query)
+        query_vector = self._query_vectors.get(key)
+        if query_vector is None:
+            try:
+                query_vector = embeddings.embed_query(query)
+            except Exception as e:
+                print(f"⚠️  Query embedding failed, using lexical results only: {e}")
+                return []
+            self._query_vectors.put(key, query_vector)
         
-        try:
-            all_documents.extend(txt_loader.load())
-        except Exception as e:
-            print(f"Error loading text files: {e}")
+        with self._lock:
+            return [chunk["id"] for _, chunk in self.index.search(query_vector, k=limit)]
+    
+    def _rerank(self, query: str, hits: List[Tuple[float, Dict]]) -> List[Tuple[float, Dict]]:
+        """Blend the fused score with the share of query terms each chunk contains"""
+        terms = set(tokenize(query))
+        if not terms or not hits:
+            return hits
         
-        if not all_documents:
-            return 0
+        top = hits[0][0]
+        rescored = []
+        for score, chunk in hits:
+            coverage = len(terms.intersection(self.lexical.terms(chunk["id"]))) / len(terms)
+            rescored.append((0.5 * score / top + 0.5 * coverage, chunk))
+        rescored.sort(key=lambda hit: hit[0], reverse=True)
+        return rescored
+    
+    def _search(self, query: str, k: int, key: Tuple) -> List[Tuple[float, Dict]]:
+        """
+        Hybrid search: BM25 and vector candidates merged by reciprocal rank
+        fusion, then optionally reranked by query-term coverage.
+        """
+        candidates = max(k, settings.rag_candidates)
         
-        # Split and add to vectorstore
-        chunks = self.text_splitter.split_documents(all_documents)
-        self.vectorstore.add_documents(chunks)
+        with self._lock:
+            lexical_ids = [chunk_id for _, chunk_id in self.lexical.search(query, k=candidates)]
+        vector_ids = self._vector_search(query, candidates)
         
-        return len(chunks)
-    
-    async def retrieve_context(self, query: str, k: int = 4) -> str:
-        """Retrieve relevant context for a query"""
-        if not self.vectorstore:
-            return ""
+        fused: Dict[str, float] = {}
+        for ranking in (vector_ids, lexical_ids):
+            for rank, chunk_id in enumerate(ranking):
+                fused[chunk_id] = fused.get(chunk_id, 0.0) + 1.0 / (settings.rag_rrf_k + rank + 1)
         
-        # Perform similarity search
-        docs = self.vectorstore.similarity_search(query, k=k)
+        best = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:candidates]
+        with self._lock:
+            hits = [
+                (score, chunk) for chunk_id, score in best
+                if (chunk := self.index.get(chunk_id)) is not None
+            ]
+            if settings.rag_rerank:
+                hits = self._rerank(query, hits)
         
-        # Combine document contents
-        context = "\n\n".join([doc.page_content for doc in docs])
+        hits = hits[:k]
+        # Stored under the version read up front, so a concurrent ingest
+        # leaves this entry unreachable rather than stale
+        self._results.put(key, hits)
+        return hits
+    
+    async def _hybrid_search(self, query: str, k: int) -> List[Tuple[float, Dict]]:
+        """Cached search; misses run in a worker thread"""
+        query = self._normalize_query(query)
+        key = (query, k, self.version)
+        hits = self._results.get(key)
+        if hits is None:
+            hits = await asyncio.to_thread(self._search, query, k, key)
+        return hits
+    
+    async def build_context(self, query: str, k: int = None, token_budget: int = None) -> PackedContext:
+        """Retrieve and pack context: overlapping chunks merged, within a token budget"""
+        hits = await self._hybrid_search(query, k or settings.rag_top_k)
         
-        return context
+        packed = pack_context(
+            hits,
+            settings.rag_context_token_budget if token_budget is None else token_budget
+        )
+        self.context_stats["requests"] += 1
+        self.context_stats["tokens"] += packed.tokens
+        self.context_stats["tokens_saved"] += packed.tokens_saved
+        return packed
+    
+    async def retrieve_context(self, query: str, k: int = None) -> str:
+        """Retrieve relevant context for a query"""
+        packed = await self.build_context(query, k)
+        return packed.text
     
-    async def search_documents(self, query: str, k: int = 4) -> List[dict]:
+    async def search_documents(self, query: str, k: int = None) -> List[dict]:
         """Search for relevant documents and return metadata"""
-        if not self.vectorstore:
-            return []
-        
-        docs = self.vectorstore.similarity_search(query, k=k)
+        hits = await self._hybrid_search(query, k or settings.rag_top_k)
         
         results = []
-        for doc in docs:
+        for score, chunk in hits:
             results.append({
-                "content": doc.page_content,
-                "metadata": doc.metadata
+                "content": chunk["text"],
+                "metadata": chunk["metadata"],
+                "score": score
             })
         
         return results
     
     def clear_database(self):
-        """Clear all documents from the vector store"""
-        if self.vectorstore:
-            self.vectorstore.delete_collection()
-            self._initialize_vectorstore()
-
-
-# Global RAG system instance
-rag_system = RAGSystem()
+        """Clear all documents from the indexes"""
+        with self._ingest_lock, self._lock:
+            self.index.clear()
+            self.lexical.clear()
+            self.manifest.clear()
+            self._bump_version()
+    
+    def close(self):
+        """Stop the parser process pool"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+    
+    def get_status(self) -> dict:
+        """Get RAG system status"""
+        return {
+            "enabled": True,
+            "embeddings": (
+                self.embeddings.name if self.embeddings
+                else "unavailable" if self._embeddings_ready.is_set()
+                else "loading"
+            ),
+            "lexical": self.lexical.status(),
+            "index_version": self.version,
+            "context": self.context_stats,
+            "query_embedding_cache": self._query_vectors.status(),
+            "retrieval_cache": self._results.status(),
+            "files": len(self.manifest),
+            "ingest_workers": self.workers,
+            "last_ingest": self.last_ingest,
+            **self.index.status()
+        }
 
 
+# Global RAG system instance (constructed on first use or at warm-up)
+rag_system = LazyInstance(RAGSystem, "rag")
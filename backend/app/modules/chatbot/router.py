@@ -1,12 +1,18 @@
 from fastapi import APIRouter, HTTPException, UploadFile, File, WebSocket, WebSocketDisconnect
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
+import asyncio
 import os
-import shutil
+import tempfile
+import uuid
 from pathlib import Path
 
 from .rag import rag_system
 from .llm import llm_manager
+from .jobs import ingest_jobs
+from .sessions import session_store
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
 
 router = APIRouter(prefix="/api/chatbot", tags=["chatbot"])
 
@@ -14,17 +20,23 @@ router = APIRouter(prefix="/api/chatbot", tags=["chatbot"])
 class QueryRequest(BaseModel):
     query: str
     provider: str = "gemini"  # Changed default to Gemini
-    use_rag: bool = False  # Disabled by default (requires OpenAI for embeddings)
+    use_rag: bool = False  # Retrieve context from the local document index
+    session_id: Optional[str] = Field(None, max_length=128)  # Keeps conversation history server-side
 
 
 class QueryResponse(BaseModel):
     response: str
     context_used: bool
+    session_id: Optional[str] = None
+    context_tokens: int = 0
+    context_tokens_saved: int = 0  # Removed by merging overlapping chunks and the budget
 
 
 class DocumentUploadResponse(BaseModel):
     message: str
-    chunks_added: int
+    job_id: str
+    status_url: str
+    files: List[str]
 
 
 @router.post("/query", response_model=QueryResponse)
@@ -33,22 +45,33 @@ async def query_chatbot(request: QueryRequest):
     try:
         context = ""
         context_used = False
+        packed = None
         
         if request.use_rag:
             # Retrieve relevant context from RAG system
-            context = await rag_system.retrieve_context(request.query)
+            packed = await rag_system.build_context(request.query)
+            context = packed.text
             context_used = bool(context)
         
+        session = session_store.get(request.session_id) if request.session_id else None
+        
         # Generate response using LLM
         response = await llm_manager.generate_response(
             query=request.query,
             context=context,
-            provider=request.provider
+            provider=request.provider,
+            history=session.history() if session else ""
         )
         
+        if session:
+            session_store.record_turn(session, request.query, response)
+        
         return QueryResponse(
             response=response,
-            context_used=context_used
+            context_used=context_used,
+            session_id=request.session_id,
+            context_tokens=packed.tokens if packed else 0,
+            context_tokens_saved=packed.tokens_saved if packed else 0
         )
     
     except Exception as e:
@@ -57,8 +80,14 @@ async def query_chatbot(request: QueryRequest):
 
 @router.websocket("/stream")
 async def websocket_stream(websocket: WebSocket):
-    """WebSocket endpoint for streaming chat responses"""
+    """
+    WebSocket endpoint for streaming chat responses
+    
+    The connection is one conversation: history is kept server-side under a
+    session created on connect, unless messages name a ``session_id``.
+    """
     await websocket.accept()
+    connection_session_id = uuid.uuid4().hex
     
     try:
         while True:
@@ -67,6 +96,7 @@ async def websocket_stream(websocket: WebSocket):
             query = data.get("query", "")
             provider = data.get("provider", "openai")
             use_rag = data.get("use_rag", True)
+            session_id = str(data.get("session_id") or connection_session_id)[:128]
             
             if not query:
                 await websocket.send_json({"error": "No query provided"})
@@ -74,18 +104,27 @@ async def websocket_stream(websocket: WebSocket):
             
             # Get context if RAG is enabled
             context = ""
+            context_info = None
             if use_rag:
-                context = await rag_system.retrieve_context(query)
+                packed = await rag_system.build_context(query)
+                context = packed.text
+                context_info = packed.to_dict()
+            
+            session = session_store.get(session_id)
+            parts = []
             
             # Stream response
-            async for chunk in llm_manager.stream_response(query, context, provider):
+            async for chunk in llm_manager.stream_response(query, context, provider, session.history()):
+                parts.append(chunk)
                 await websocket.send_json({
                     "type": "chunk",
                     "content": chunk
                 })
             
+            session_store.record_turn(session, query, "".join(parts))
+            
             # Send end signal
-            await websocket.send_json({"type": "end"})
+            await websocket.send_json({"type": "end", "context": context_info, "session_id": session_id})
     
     except WebSocketDisconnect:
         print("WebSocket disconnected")
@@ -93,36 +132,81 @@ async def websocket_stream(websocket: WebSocket):
         await websocket.send_json({"error": str(e)})
 
 
-@router.post("/documents/upload", response_model=DocumentUploadResponse)
+async def _save_upload(file: UploadFile, data_dir: Path) -> tuple:
+    """Stream an upload to disk in chunks without blocking the event loop"""
+    name = Path(file.filename or "").name
+    if not name or name.startswith("."):
+        raise HTTPException(status_code=400, detail=f"Invalid file name: {file.filename!r}")
+    
+    file_path = data_dir / name
+    size = 0
+    
+    # Unique temp name: concurrent uploads of the same file must not share it
+    fd, partial_path = await asyncio.to_thread(
+        tempfile.mkstemp, dir=data_dir, prefix=f".{name}.", suffix=".part"
+    )
+    buffer = os.fdopen(fd, "wb")
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            await asyncio.to_thread(buffer.write, chunk)
+            size += len(chunk)
+    except BaseException:
+        await asyncio.to_thread(buffer.close)
+        await asyncio.to_thread(Path(partial_path).unlink, missing_ok=True)
+        raise
+    await asyncio.to_thread(buffer.close)
+    
+    # Publish the complete file in one step so directory scans never see a partial one
+    await asyncio.to_thread(os.replace, partial_path, file_path)
+    return str(file_path), size
+
+
+@router.post("/documents/upload", response_model=DocumentUploadResponse, status_code=202)
 async def upload_documents(files: List[UploadFile] = File(...)):
-    """Upload documents for RAG processing"""
+    """
+    Upload documents for RAG processing
+    
+    Files are written to disk and indexed by a background job; poll
+    ``status_url`` for per-file progress.
+    """
     try:
         data_dir = Path("data")
         data_dir.mkdir(exist_ok=True)
         
         file_paths = []
+        total_bytes = 0
         
         # Save uploaded files
         for file in files:
-            file_path = data_dir / file.filename
-            
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-            
-            file_paths.append(str(file_path))
+            file_path, size = await _save_upload(file, data_dir)
+            file_paths.append(file_path)
+            total_bytes += size
         
-        # Add documents to RAG system
-        chunks_added = await rag_system.add_documents(file_paths)
+        # Index in the background
+        job = ingest_jobs.submit(file_paths, rag_system.add_documents, bytes_received=total_bytes)
         
         return DocumentUploadResponse(
             message=f"Successfully uploaded {len(files)} file(s)",
-            chunks_added=chunks_added
+            job_id=job.id,
+            status_url=f"{router.prefix}/documents/jobs/{job.id}",
+            files=[Path(path).name for path in file_paths]
         )
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/documents/jobs/{job_id}")
+async def get_ingest_job(job_id: str):
+    """Progress of a background ingestion job"""
+    job = ingest_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
 @router.post("/documents/load-directory")
 async def load_directory(directory: str = "data"):
     """Load all documents from a directory"""
@@ -143,22 +227,34 @@ async def load_directory(directory: str = "data"):
 
 @router.delete("/documents/clear")
 async def clear_documents():
-    """Clear all documents from the vector store"""
+    """Clear all documents from the vector store (after any running ingest job)"""
     try:
-        rag_system.clear_database()
+        # Waits on the ingest lock, so keep it off the event loop
+        await asyncio.to_thread(rag_system.clear_database)
         return {"message": "All documents cleared"}
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.delete("/sessions/{session_id}")
+async def delete_session(session_id: str):
+    """Forget a conversation's history"""
+    if not session_store.delete(session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+    return {"message": "Session deleted"}
+
+
 @router.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {
         "status": "healthy",
         "gemini_configured": bool(llm_manager.gemini_model),
-        "rag_disabled": "RAG requires OpenAI embeddings (not available)"
+        "response_cache": llm_manager.cache.status(),
+        "sessions": session_store.status(),
+        "rag": rag_system.get_status(),
+        "ingest_jobs_active": ingest_jobs.active()
     }
 
 
@@ -0,0 +1,175 @@
+"""
+Server-side conversation sessions.
+
+Each session keeps the last ``session_max_turns`` exchanges verbatim and a
+rolling summary of everything older, so the history sent with each prompt
+stays bounded however long the conversation runs. Turns leaving the recent
+window are folded into the summary as one condensed line each; the oldest
+lines drop off once the summary reaches ``session_summary_chars``.
+
+The store evicts idle sessions after ``session_ttl`` seconds and the least
+recently used ones beyond ``session_max_sessions`` or ``session_max_bytes``.
+"""
+import re
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Optional, Tuple
+
+from ..shared.config import settings
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+def _first_sentence(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    match = _SENTENCE_END.search(text)
+    return _clip(text[:match.start()] if match else text, limit)
+
+
+class Session:
+    """Recent turns plus a rolling summary of older ones"""
+
+    __slots__ = ("id", "turns", "summary", "turn_count", "created_at", "last_access", "size")
+
+    def __init__(self, session_id: str, max_turns: int):
+        self.id = session_id
+        self.turns: Deque[Tuple[str, str]] = deque()
+        self.summary: Deque[str] = deque()
+        self.turn_count = 0
+        self.created_at = time.monotonic()
+        self.last_access = self.created_at
+        self.size = 0  # Approximate bytes held
+
+    def history(self) -> str:
+        """Prompt-ready history: summary lines, then recent turns"""
+        parts = []
+        if self.summary:
+            parts.append("Earlier in the conversation:\n" + "\n".join(self.summary))
+        turn_chars = settings.session_turn_chars
+        for user, assistant in self.turns:
+            parts.append(f"User: {_clip(user, turn_chars)}\nAssistant: {_clip(assistant, turn_chars)}")
+        return "\n\n".join(parts)
+
+    def add_turn(self, user: str, assistant: str, max_turns: int, summary_chars: int):
+        self.turns.append((user, assistant))
+        self.size += len(user) + len(assistant)
+        self.turn_count += 1
+
+        while len(self.turns) > max_turns:
+            old_user, old_assistant = self.turns.popleft()
+            self.size -= len(old_user) + len(old_assistant)
+            line = f"- User asked: {_clip(old_user, 160)} / Assistant: {_first_sentence(old_assistant, 200)}"
+            self.summary.append(line)
+            self.size += len(line)
+
+        summary_size = sum(len(line) + 1 for line in self.summary)
+        while self.summary and summary_size > summary_chars:
+            dropped = self.summary.popleft()
+            summary_size -= len(dropped) + 1
+            self.size -= len(dropped)
+
+    def to_dict(self) -> Dict:
+        return {
+            "session_id": self.id,
+            "turns": self.turn_count,
+            "recent_turns": len(self.turns),
+            "summary_lines": len(self.summary),
+            "bytes": self.size,
+            "idle_seconds": round(time.monotonic() - self.last_access, 1),
+        }
+
+
+class SessionStore:
+    """LRU/TTL-bounded in-process session store"""
+
+    def __init__(
+        self,
+        max_sessions: int = 1000,
+        ttl: float = 3600.0,
+        max_bytes: int = 32 * 1024 * 1024,
+        max_turns: int = 6,
+        summary_chars: int = 1500,
+    ):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_turns = max_turns
+        self.summary_chars = summary_chars
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self.stats: Dict[str, int] = {"created": 0, "expired": 0, "evicted": 0}
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _expire(self, now: float):
+        # Least recently used first, so stop at the first live session
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session.last_access < self.ttl:
+                break
+            del self._sessions[session.id]
+            self.stats["expired"] += 1
+
+    def _enforce_limits(self, keep: str):
+        total = sum(session.size for session in self._sessions.values())
+        while len(self._sessions) > 1 and (
+            len(self._sessions) > self.max_sessions or total > self.max_bytes
+        ):
+            oldest = next(iter(self._sessions))
+            if oldest == keep:
+                break
+            total -= self._sessions.pop(oldest).size
+            self.stats["evicted"] += 1
+
+    def get(self, session_id: str) -> Session:
+        """Fetch a session, creating it if unknown or expired"""
+        now = time.monotonic()
+        self._expire(now)
+
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = Session(session_id, self.max_turns)
+            self._sessions[session_id] = session
+            self.stats["created"] += 1
+            self._enforce_limits(keep=session_id)
+        else:
+            self._sessions.move_to_end(session_id)
+        session.last_access = now
+        return session
+
+    def record_turn(self, session: Session, user: str, assistant: str):
+        session.add_turn(user, assistant, self.max_turns, self.summary_chars)
+        session.last_access = time.monotonic()
+        if session.id in self._sessions:
+            self._sessions.move_to_end(session.id)
+            self._enforce_limits(keep=session.id)
+
+    def delete(self, session_id: str) -> bool:
+        return self._sessions.pop(session_id, None) is not None
+
+    def peek(self, session_id: str) -> Optional[Session]:
+        return self._sessions.get(session_id)
+
+    def status(self) -> Dict:
+        return {
+            "sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "bytes": sum(session.size for session in self._sessions.values()),
+            "max_bytes": self.max_bytes,
+            **self.stats,
+        }
+
+
+# Global session store
+session_store = SessionStore(
+    max_sessions=settings.session_max_sessions,
+    ttl=settings.session_ttl,
+    max_bytes=settings.session_max_bytes,
+    max_turns=settings.session_max_turns,
+    summary_chars=settings.session_summary_chars,
+)
@@ -0,0 +1,251 @@
+"""
+In-process flat vector index for RAG.
+
+Vectors live in one float32 matrix (``vectors.npy``) that is memory-mapped
+on load, with chunk texts and metadata in ``chunks.json`` alongside.
+Inserts are buffered and concatenated in one step before the next search;
+deletes are tombstoned and compacted away on save. Search is a single
+matrix-vector product plus ``argpartition``, which stays in the low
+milliseconds for tens of thousands of chunks.
+"""
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+VECTORS_FILE = "vectors.npy"
+CHUNKS_FILE = "chunks.json"
+INFO_FILE = "index.json"
+
+
+class VectorIndex:
+    """Exact inner-product (cosine) search over normalized embeddings"""
+
+    def __init__(
+        self,
+        persist_dir: str,
+        dimension: Optional[int] = None,
+        backend_name: Optional[str] = None,
+    ):
+        """
+        Without ``dimension``/``backend_name`` the persisted index is loaded
+        as-is, so chunk texts are available before the embedding model is;
+        call ``bind`` once it is.
+        """
+        self.persist_dir = Path(persist_dir)
+        self.dimension = dimension
+        self.backend_name = backend_name
+
+        self._vectors = np.zeros((0, dimension or 0), dtype=np.float32)
+        self._pending: List[np.ndarray] = []
+        self._chunks: List[Optional[Dict]] = []  # None marks a deleted row
+        self._rows: Dict[str, int] = {}
+        self._deleted = 0
+        self._dirty = False
+
+        self.load()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, chunk_id: str) -> bool:
+        return chunk_id in self._rows
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def load(self):
+        """Load a persisted index; mismatched embeddings start a fresh one"""
+        info_path = self.persist_dir / INFO_FILE
+        if not info_path.exists():
+            return
+
+        try:
+            info = json.loads(info_path.read_text(encoding="utf-8"))
+            if self.backend_name is None:
+                self.backend_name = info["backend"]
+                self.dimension = info["dimension"]
+            elif info.get("backend") != self.backend_name or info.get("dimension") != self.dimension:
+                print(
+                    f"⚠️  Vector index was built with {info.get('backend')} "
+                    f"({info.get('dimension')}d); re-ingest documents for {self.backend_name}"
+                )
+                return
+
+            vectors = np.load(self.persist_dir / VECTORS_FILE, mmap_mode="r")
+            chunks = json.loads((self.persist_dir / CHUNKS_FILE).read_text(encoding="utf-8"))
+            if vectors.shape != (len(chunks), self.dimension):
+                raise ValueError("vectors and chunks are out of sync")
+        except Exception as e:
+            print(f"⚠️  Could not load vector index: {e}")
+            return
+
+        self._vectors = vectors
+        self._chunks = chunks
+        self._rows = {chunk["id"]: row for row, chunk in enumerate(chunks)}
+        print(f"✅ Vector index loaded: {len(self._rows)} chunks")
+
+    def bind(self, backend_name: str, dimension: int) -> bool:
+        """
+        Attach the embedding backend; returns False (and empties the index)
+        when the loaded vectors came from a different one.
+        """
+        if self.backend_name == backend_name and self.dimension == dimension:
+            return True
+
+        stale = bool(self._chunks)
+        if stale:
+            print(
+                f"⚠️  Vector index was built with {self.backend_name} "
+                f"({self.dimension}d); re-ingest documents for {backend_name}"
+            )
+        self.backend_name = backend_name
+        self.dimension = dimension
+        self._vectors = np.zeros((0, dimension), dtype=np.float32)
+        self._pending.clear()
+        self._chunks = []
+        self._rows = {}
+        self._deleted = 0
+        self._dirty = stale
+        return not stale
+
+    def save(self):
+        """Compact and write the index atomically"""
+        if not self._dirty:
+            return
+
+        self._consolidate()
+        if self._deleted:
+            keep = [row for row, chunk in enumerate(self._chunks) if chunk is not None]
+            self._vectors = np.ascontiguousarray(self._vectors[keep])
+            self._chunks = [self._chunks[row] for row in keep]
+            self._rows = {chunk["id"]: row for row, chunk in enumerate(self._chunks)}
+            self._deleted = 0
+
+        self.persist_dir.mkdir(parents=True, exist_ok=True)
+        vectors = np.asarray(self._vectors, dtype=np.float32)
+        self._atomic_write(VECTORS_FILE, lambda f: np.save(f, vectors))
+        self._atomic_write(
+            CHUNKS_FILE,
+            lambda f: f.write(json.dumps(self._chunks, ensure_ascii=False).encode("utf-8")),
+        )
+        info = {"backend": self.backend_name, "dimension": self.dimension, "count": len(self._chunks)}
+        self._atomic_write(INFO_FILE, lambda f: f.write(json.dumps(info).encode("utf-8")))
+
+        # Drop the in-memory copy in favour of the page cache
+        self._vectors = np.load(self.persist_dir / VECTORS_FILE, mmap_mode="r")
+        self._dirty = False
+
+    def _atomic_write(self, name: str, write):
+        fd, tmp_path = tempfile.mkstemp(dir=self.persist_dir, prefix=f".{name}.")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.persist_dir / name)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    # ------------------------------------------------------------------
+    # Mutation
+    # ------------------------------------------------------------------
+
+    def add(
+        self,
+        ids: List[str],
+        texts: List[str],
+        metadatas: List[Dict],
+        vectors: np.ndarray,
+    ):
+        """Append a batch; existing ids are replaced"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.shape != (len(ids), self.dimension):
+            raise ValueError(
+                f"Expected vectors of shape ({len(ids)}, {self.dimension}), got {vectors.shape}"
+            )
+        if not ids:
+            return
+
+        self.delete(chunk_id for chunk_id in ids if chunk_id in self._rows)
+
+        start = len(self._chunks)
+        for offset, (chunk_id, text, metadata) in enumerate(zip(ids, texts, metadatas)):
+            self._chunks.append({"id": chunk_id, "text": text, "metadata": metadata})
+            self._rows[chunk_id] = start + offset
+        self._pending.append(vectors)
+        self._dirty = True
+
+    def delete(self, ids: Iterable[str]) -> int:
+        """Tombstone rows by chunk id"""
+        removed = 0
+        for chunk_id in list(ids):
+            row = self._rows.pop(chunk_id, None)
+            if row is None:
+                continue
+            self._chunks[row] = None
+            removed += 1
+        if removed:
+            self._deleted += removed
+            self._dirty = True
+        return removed
+
+    def clear(self):
+        """Remove every chunk and the persisted files"""
+        self._vectors = np.zeros((0, self.dimension or 0), dtype=np.float32)
+        self._pending.clear()
+        self._chunks = []
+        self._rows = {}
+        self._deleted = 0
+        self._dirty = False
+        for name in (VECTORS_FILE, CHUNKS_FILE, INFO_FILE):
+            path = self.persist_dir / name
+            if path.exists():
+                path.unlink()
+
+    def get(self, chunk_id: str) -> Optional[Dict]:
+        row = self._rows.get(chunk_id)
+        return None if row is None else self._chunks[row]
+
+    def ids(self) -> set:
+        return set(self._rows)
+
+    def _consolidate(self):
+        """Fold buffered batches into the main matrix with one copy"""
+        if self._pending:
+            self._vectors = np.concatenate([np.asarray(self._vectors), *self._pending])
+            self._pending.clear()
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+
+    def search(self, query: np.ndarray, k: int = 4) -> List[Tuple[float, Dict]]:
+        """Top-k chunks by inner product, best first"""
+        if not self._rows or k <= 0:
+            return []
+
+        self._consolidate()
+        scores = self._vectors @ np.asarray(query, dtype=np.float32)
+        if self._deleted:
+            scores = np.array(scores)
+            scores[[row for row, chunk in enumerate(self._chunks) if chunk is None]] = -np.inf
+
+        k = min(k, len(self._rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(float(scores[row]), self._chunks[row]) for row in top]
+
+    def status(self) -> Dict:
+        return {
+            "chunks": len(self._rows),
+            "dimension": self.dimension,
+            "backend": self.backend_name,
+            "persist_dir": str(self.persist_dir),
+        }
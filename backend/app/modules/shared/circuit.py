@@ -0,0 +1,126 @@
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Tuple
+
+
+class CircuitBreaker:
+    """
+    Latency- and error-aware circuit breaker.
+
+    Outcomes of calls to a dependency are kept for ``window`` seconds. Once
+    at least ``min_samples`` are recorded, the breaker opens when the error
+    rate reaches ``error_rate`` or the p95 latency reaches ``p95_latency``.
+    After ``cooldown`` seconds it goes half-open and lets one probe through
+    at a time; ``probes`` consecutive successes close it, any failure opens
+    it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        window: float = 60.0,
+        min_samples: int = 5,
+        error_rate: float = 0.5,
+        p95_latency: float = 6.0,
+        cooldown: float = 30.0,
+        probes: int = 2,
+    ):
+        self.name = name
+        self.window = window
+        self.min_samples = min_samples
+        self.error_rate = error_rate
+        self.p95_latency = p95_latency
+        self.cooldown = cooldown
+        self.probes = probes
+
+        self.state = self.CLOSED
+        self._lock = threading.Lock()
+        self._samples: Deque[Tuple[float, float, bool]] = deque()  # (time, latency, ok)
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._probe_successes = 0
+        self.stats: Dict[str, int] = {"opened": 0, "rejected": 0}
+
+    def _prune(self, now: float):
+        while self._samples and now - self._samples[0][0] > self.window:
+            self._samples.popleft()
+
+    def _p95(self) -> float:
+        latencies = sorted(sample[1] for sample in self._samples)
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+
+    def _open(self, now: float, reason: str):
+        self.state = self.OPEN
+        self._opened_at = now
+        self._probe_in_flight = False
+        self._probe_successes = 0
+        self.stats["opened"] += 1
+        print(f"⚡ {self.name} circuit opened ({reason})")
+
+    def allow(self) -> bool:
+        """Whether the next call may go to the dependency"""
+        now = time.monotonic()
+        with self._lock:
+            if self.state == self.OPEN and now - self._opened_at >= self.cooldown:
+                self.state = self.HALF_OPEN
+                self._probe_successes = 0
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.stats["rejected"] += 1
+            return False
+
+    def release(self):
+        """Give back a probe slot for a call abandoned before it finished"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probe_in_flight = False
+
+    def record(self, latency: float, ok: bool):
+        """Record one call's outcome"""
+        now = time.monotonic()
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probe_in_flight = False
+                if not ok:
+                    self._open(now, "probe failed")
+                    return
+                self._probe_successes += 1
+                if self._probe_successes >= self.probes:
+                    self.state = self.CLOSED
+                    self._samples.clear()
+                    print(f"✅ {self.name} circuit closed")
+                return
+            if self.state == self.OPEN:
+                return  # Late results from calls started before opening
+
+            self._samples.append((now, latency, ok))
+            self._prune(now)
+            if len(self._samples) < self.min_samples:
+                return
+            errors = sum(1 for sample in self._samples if not sample[2])
+            if errors / len(self._samples) >= self.error_rate:
+                self._open(now, f"error rate {errors}/{len(self._samples)}")
+            elif self._p95() >= self.p95_latency:
+                self._open(now, f"p95 latency {self._p95():.2f}s")
+
+    def status(self) -> Dict[str, object]:
+        with self._lock:
+            self._prune(time.monotonic())
+            errors = sum(1 for sample in self._samples if not sample[2])
+            return {
+                "state": self.state,
+                "samples": len(self._samples),
+                "error_rate": round(errors / len(self._samples), 3) if self._samples else 0.0,
+                "p95_latency": round(self._p95(), 3),
+                **self.stats,
+            }
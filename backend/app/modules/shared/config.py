@@ -13,13 +13,83 @@ class Settings(BaseSettings):
     # Database
     chroma_persist_dir: str = "./chroma_db"
     
+    # RAG
+    embedding_backend: str = "auto"  # "auto", "sentence-transformers" or "hashing"
+    embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"  # Loaded from the local cache only
+    embedding_dimension: int = 768  # Hashing backend only
+    embedding_batch_size: int = 64  # Chunks per embedding call during ingestion
+    rag_chunk_size: int = 1000
+    rag_chunk_overlap: int = 200
+    ingest_workers: int = 0  # Parser processes; 0 uses every core
+    rag_top_k: int = 4
+    rag_candidates: int = 20  # Per-retriever candidates fed to rank fusion
+    rag_rrf_k: int = 60  # Reciprocal rank fusion constant
+    rag_rerank: bool = True  # Rerank fused candidates by query-term coverage
+    rag_context_token_budget: int = 1500  # Max prompt tokens of retrieved context; 0 = unlimited
+    rag_query_cache_size: int = 1024  # Cached query embeddings; 0 disables
+    rag_retrieval_cache_size: int = 512  # Cached search results; 0 disables
+    
+    # LLM
+    llm_request_timeout: float = 60.0  # Whole non-streaming generation
+    llm_stream_first_chunk_timeout: float = 30.0  # Time to first streamed chunk
+    llm_stream_idle_timeout: float = 30.0  # Max gap between streamed chunks
+    llm_cache_max_entries: int = 1024  # 0 disables the response cache
+    llm_cache_ttl: float = 3600.0
+    llm_cache_similarity_threshold: float = 0.8  # Near-duplicate tier; 0 disables
+    llm_cache_replay_chunk_chars: int = 24  # Chunk size when replaying on streams
+    
+    # Sessions
+    session_max_turns: int = 6  # Recent exchanges kept verbatim
+    session_turn_chars: int = 1000  # Per-message cap when replaying recent turns
+    session_summary_chars: int = 1500  # Rolling summary of older turns
+    session_ttl: float = 3600.0  # Idle seconds before a session expires
+    session_max_sessions: int = 1000
+    session_max_bytes: int = 32 * 1024 * 1024
+    
     # TTS
     tts_model: str = "tts_models/en/ljspeech/tacotron2-DDC"
+    tts_max_concurrency: int = 32  # Syntheses allowed in flight per worker
+    tts_max_connections: int = 64
+    tts_max_keepalive_connections: int = 16
+    tts_keepalive_expiry: float = 30.0
+    tts_connect_timeout: float = 5.0
+    tts_synthesis_timeout: float = 60.0  # Resemble clip creation (sync render)
+    tts_download_timeout: float = 30.0
+    tts_cache_dir: str = "./tts_cache"
+    tts_cache_memory_bytes: int = 64 * 1024 * 1024
+    tts_cache_disk_bytes: int = 1024 * 1024 * 1024
+    tts_cache_policy: str = "lru"  # "lru" or "lfu"
+    lipsync_lexicon_path: str = ""  # CMUdict-format file; unset uses the cmudict package, else rules only
+    lipsync_word_cache_size: int = 8192  # Word -> viseme sequences kept in the LRU
+    tts_chunk_chars: int = 1000  # Max characters per provider call; longer text is chunked and stitched
+    tts_long_form_concurrency: int = 4  # Chunks of one long text synthesized at once
+    tts_batch_concurrency: int = 8  # Items of one /speak-batch synthesized at once
+    tts_batch_max_items: int = 500
+    tts_prewarm_manifest: str = "./prewarm_phrases.txt"  # Phrases cached at startup ("" disables)
+    tts_prewarm_rate: float = 1.0  # Max phrases synthesized per second while pre-warming
+    tts_audio_max_age: int = 86400  # Cache-Control max-age for /speak-audio responses
+    tts_stream_segment_chars: int = 250  # Max characters per streamed segment
+    tts_stream_min_segment_chars: int = 20  # Shorter fragments are merged forward
+    tts_stream_lookahead: int = 4  # Segments synthesized ahead of playback
+    tts_local_engine: str = "auto"  # Fallback engine: "auto", "coqui", "espeak" or "off"
+    tts_local_workers: int = 2  # Processes for local synthesis
+    tts_local_voice: str = "en-us"  # espeak voice
+    tts_local_rate: int = 165  # espeak words per minute
+    tts_local_bitrate: str = "64k"
+    tts_local_timeout: float = 60.0  # Per local synthesis, excluding model load; 0 disables
+    tts_latency_slo: float = 4.0  # Hedge with local TTS when Resemble takes longer; 0 disables
+    tts_breaker_window: float = 60.0  # Seconds of Resemble outcomes considered
+    tts_breaker_min_samples: int = 5
+    tts_breaker_error_rate: float = 0.5
+    tts_breaker_p95_latency: float = 6.0
+    tts_breaker_cooldown: float = 30.0  # Seconds open before probing Resemble again
+    tts_breaker_probes: int = 2  # Successful probes needed to close
     
     # Server
     host: str = "0.0.0.0"
     port: int = 8000
     reload: bool = True
+    warm_up: bool = True  # Construct managers in the background right after startup
     
     # CORS - using string that we'll parse
     allowed_origins: str = "http://localhost:3000,http://localhost:5173,http://localhost:5174"
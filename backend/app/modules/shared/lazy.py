@@ -0,0 +1,49 @@
+import threading
+from typing import Callable, Generic, TypeVar
+
+from .startup import startup_report
+
+T = TypeVar("T")
+
+
+class LazyInstance(Generic[T]):
+    """
+    Module-level singleton that is only constructed on first use.
+
+    Attribute access (and assignment) is forwarded to the instance, so
+    ``tts_manager.text_to_speech(...)`` keeps working while importing the
+    module stays cheap. Construction time goes into the startup report.
+    """
+
+    __slots__ = ("_factory", "_name", "_instance", "_lock")
+
+    def __init__(self, factory: Callable[[], T], name: str):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_instance", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    @property
+    def is_initialized(self) -> bool:
+        return self._instance is not None
+
+    def get(self) -> T:
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                instance = self._instance
+                if instance is None:
+                    with startup_report.track(self._name, "init"):
+                        instance = self._factory()
+                    object.__setattr__(self, "_instance", instance)
+        return instance
+
+    def __getattr__(self, name: str):
+        return getattr(self.get(), name)
+
+    def __setattr__(self, name: str, value) -> None:
+        setattr(self.get(), name, value)
+
+    def __repr__(self) -> str:
+        state = "initialized" if self.is_initialized else "deferred"
+        return f"<LazyInstance {self._name} ({state})>"
@@ -0,0 +1,71 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key into one execution.
+
+    The first caller for a key starts the work as a task; callers arriving
+    while it runs await the same task and receive its result or exception.
+    The work is shielded from caller cancellation, so one client going away
+    does not fail the others (and a finished result can still be cached).
+
+    Work that is not a single awaitable (e.g. a download streamed to the
+    first caller) can lead a flight with ``claim`` and resolve the returned
+    future itself; ``do`` callers for that key wait on it as usual.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, "asyncio.Future"] = {}
+        self._joined: Dict[Hashable, int] = {}
+        self.stats: Dict[str, int] = {"executions": 0, "coalesced": 0}
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def pending(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    def joined(self, key: Hashable) -> int:
+        """Callers currently waiting on another caller's flight for ``key``"""
+        return self._joined.get(key, 0)
+
+    def _register(self, key: Hashable, call: "asyncio.Future") -> None:
+        self._calls[key] = call
+        self.stats["executions"] += 1
+
+        def _done(finished: "asyncio.Future") -> None:
+            if self._calls.get(key) is finished:
+                del self._calls[key]
+                self._joined.pop(key, None)
+            # Mark the exception retrieved even if every waiter was cancelled
+            if not finished.cancelled():
+                finished.exception()
+
+        call.add_done_callback(_done)
+
+    def claim(self, key: Hashable) -> Optional["asyncio.Future"]:
+        """Lead the flight for ``key``: a future to resolve, or None if one is running"""
+        if key in self._calls:
+            return None
+        future = asyncio.get_running_loop().create_future()
+        self._register(key, future)
+        return future
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        call = self._calls.get(key)
+        if call is not None:
+            self.stats["coalesced"] += 1
+            self._joined[key] = self._joined.get(key, 0) + 1
+            try:
+                return await asyncio.shield(call)
+            finally:
+                if self._calls.get(key) is call:
+                    self._joined[key] -= 1
+
+        task = asyncio.ensure_future(fn())
+        self._register(key, task)
+        return await asyncio.shield(task)
@@ -0,0 +1,38 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+
+class StartupReport:
+    """Records how long each subsystem took to import and initialize."""
+
+    def __init__(self) -> None:
+        self._created = time.perf_counter()
+        self._events: List[Dict[str, object]] = []
+
+    def record(self, subsystem: str, phase: str, seconds: float) -> None:
+        self._events.append({
+            "subsystem": subsystem,
+            "phase": phase,
+            "ms": round(seconds * 1000, 1),
+            "at_ms": round((time.perf_counter() - self._created) * 1000, 1),
+        })
+        print(f"⏱️  {subsystem} {phase}: {seconds * 1000:.1f} ms")
+
+    @contextmanager
+    def track(self, subsystem: str, phase: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(subsystem, phase, time.perf_counter() - started)
+
+    def as_dict(self) -> Dict[str, object]:
+        totals: Dict[str, float] = {}
+        for event in self._events:
+            totals[event["subsystem"]] = round(totals.get(event["subsystem"], 0.0) + event["ms"], 1)
+        return {"events": list(self._events), "totals_ms": totals}
+
+
+# Global startup report
+startup_report = StartupReport()
@@ -0,0 +1,124 @@
+import re
+from typing import List
+
+
+# Sentence terminators (optionally followed by closing quotes/brackets)
+_SENTENCE_END = re.compile(r'(?:(?<=[.!?…])|(?<=[.!?…]["\')\]]))\s+')
+# Clause boundaries used to break up sentences that are still too long
+_CLAUSE_END = re.compile(r'(?<=[,;:—])\s+')
+
+
+def _pack(parts: List[str], max_chars: int) -> List[str]:
+    """Greedily merge consecutive parts while they fit in ``max_chars``."""
+    packed: List[str] = []
+    current = ""
+    for part in parts:
+        if not current:
+            current = part
+        elif len(current) + 1 + len(part) <= max_chars:
+            current = f"{current} {part}"
+        else:
+            packed.append(current)
+            current = part
+    if current:
+        packed.append(current)
+    return packed
+
+
+def _hard_wrap(text: str, max_chars: int) -> List[str]:
+    """Split at word boundaries when a clause has no punctuation to cut on."""
+    return _pack(text.split(), max_chars)
+
+
+def split_sentences(text: str, max_chars: int = 300, min_chars: int = 0) -> List[str]:
+    """
+    Split text into speakable segments at sentence boundaries.
+
+    Sentences longer than ``max_chars`` are cut at clause punctuation and,
+    failing that, at word boundaries. Segments shorter than ``min_chars`` are
+    merged into their successor so the TTS provider is not called for
+    fragments like "Hi." on their own.
+    """
+    text = " ".join(text.split())
+    if not text:
+        return []
+
+    segments: List[str] = []
+    for sentence in _SENTENCE_END.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if len(sentence) <= max_chars:
+            segments.append(sentence)
+            continue
+        for clause in _pack(_CLAUSE_END.split(sentence), max_chars):
+            if len(clause) <= max_chars:
+                segments.append(clause)
+            else:
+                segments.extend(_hard_wrap(clause, max_chars))
+
+    if min_chars <= 0:
+        return segments
+
+    merged: List[str] = []
+    pending = ""
+    for segment in segments:
+        if pending and len(pending) + 1 + len(segment) > max_chars:
+            merged.append(pending)
+            pending = ""
+        pending = f"{pending} {segment}" if pending else segment
+        if len(pending) >= min_chars:
+            merged.append(pending)
+            pending = ""
+    if pending:
+        if merged and len(merged[-1]) + 1 + len(pending) <= max_chars:
+            merged[-1] = f"{merged[-1]} {pending}"
+        else:
+            merged.append(pending)
+    return merged
+
+
+class SentenceBuffer:
+    """
+    Incremental sentence splitter for streamed text (e.g. LLM tokens).
+
+    ``feed`` returns the sentences completed by the new chunk; text after the
+    last boundary is held back until more arrives or ``flush`` is called.
+    Sentences shorter than ``min_chars`` wait to be joined with the next one,
+    and text running past ``max_chars`` with no boundary is cut at a clause
+    or word break so synthesis never waits on an endless sentence.
+    """
+
+    def __init__(self, max_chars: int = 300, min_chars: int = 0):
+        self.max_chars = max_chars
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def _next_cut(self) -> int:
+        """Index to cut the buffer at, or -1 if no sentence is complete yet"""
+        for match in _SENTENCE_END.finditer(self._buffer):
+            if len(self._buffer[:match.start()].strip()) >= self.min_chars:
+                return match.end()
+        if len(self._buffer) > self.max_chars:
+            window = self._buffer[:self.max_chars]
+            clauses = list(_CLAUSE_END.finditer(window))
+            if clauses:
+                return clauses[-1].end()
+            space = window.rfind(" ")
+            return space + 1 if space > 0 else self.max_chars
+        return -1
+
+    def feed(self, chunk: str) -> List[str]:
+        self._buffer += chunk
+        ready: List[str] = []
+        while True:
+            cut = self._next_cut()
+            if cut < 0:
+                return ready
+            head, self._buffer = self._buffer[:cut], self._buffer[cut:]
+            ready.extend(split_sentences(head, self.max_chars, self.min_chars))
+
+    def flush(self) -> List[str]:
+        """Return whatever is left as final sentence(s)"""
+        rest, self._buffer = self._buffer, ""
+        return split_sentences(rest, self.max_chars, self.min_chars)
@@ -0,0 +1,96 @@
+"""CircuitBreaker opening on errors or latency, half-open probes and recovery."""
+from app.modules.shared.circuit import CircuitBreaker
+
+
+def _breaker(**overrides):
+    options = dict(window=60.0, min_samples=4, error_rate=0.5, p95_latency=2.0, cooldown=30.0, probes=2)
+    options.update(overrides)
+    return CircuitBreaker("test", **options)
+
+
+def _clock(monkeypatch, start=1000.0):
+    now = [start]
+    monkeypatch.setattr("app.modules.shared.circuit.time.monotonic", lambda: now[0])
+    return now
+
+
+def test_stays_closed_below_min_samples():
+    breaker = _breaker()
+    for _ in range(3):
+        breaker.record(0.1, False)
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_opens_on_error_rate_and_rejects():
+    breaker = _breaker()
+    for ok in (True, False, True, False):
+        breaker.record(0.1, ok)
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.stats == {"opened": 1, "rejected": 1}
+
+
+def test_opens_on_p95_latency():
+    breaker = _breaker()
+    for _ in range(4):
+        breaker.record(2.5, True)
+
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_old_samples_leave_the_window(monkeypatch):
+    now = _clock(monkeypatch)
+    breaker = _breaker()
+    for _ in range(3):
+        breaker.record(0.1, False)
+    now[0] += 61
+    breaker.record(0.1, False)
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.status()["samples"] == 1
+
+
+def test_half_open_allows_one_probe_and_closes_after_successes(monkeypatch):
+    now = _clock(monkeypatch)
+    breaker = _breaker()
+    for _ in range(4):
+        breaker.record(0.1, False)
+    now[0] += 30
+
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()  # One probe at a time
+    breaker.record(0.1, True)
+    assert breaker.allow()
+    breaker.record(0.1, True)
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.status()["samples"] == 0
+
+
+def test_failed_probe_reopens(monkeypatch):
+    now = _clock(monkeypatch)
+    breaker = _breaker()
+    for _ in range(4):
+        breaker.record(0.1, False)
+    now[0] += 30
+    breaker.allow()
+    breaker.record(0.1, False)
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_released_probe_can_be_retried(monkeypatch):
+    now = _clock(monkeypatch)
+    breaker = _breaker()
+    for _ in range(4):
+        breaker.record(0.1, False)
+    now[0] += 30
+    assert breaker.allow()
+    breaker.release()  # Caller went away before the call finished
+
+    assert breaker.allow()
@@ -0,0 +1,93 @@
+"""RAG context packing: span merging, de-duplication and the token budget."""
+from app.modules.chatbot.context import count_tokens, merge_chunks, pack_context, truncate_to_tokens
+
+PASSAGE = (
+    "Returns are accepted within thirty days of delivery. "
+    "Items must be unused and in their original packaging. "
+    "Refunds go back to the original payment method within a week. "
+    "Opened software and gift cards cannot be returned."
+)
+
+
+def _hit(score, text, source="policy.txt", start=None, page=None):
+    metadata = {"source": source}
+    if start is not None:
+        metadata["start_index"] = start
+    if page is not None:
+        metadata["page"] = page
+    return score, {"text": text, "metadata": metadata}
+
+
+def test_overlapping_chunks_merge_by_start_index():
+    hits = [_hit(0.9, PASSAGE[60:160], start=60), _hit(0.8, PASSAGE[0:100], start=0)]
+
+    spans = merge_chunks(hits)
+
+    assert len(spans) == 1
+    assert spans[0].text == PASSAGE[0:160]
+    assert spans[0].score == 0.9
+
+
+def test_overlapping_chunks_merge_by_text_without_offsets():
+    hits = [_hit(0.9, PASSAGE[:120]), _hit(0.5, PASSAGE[70:])]
+
+    assert [span.text for span in merge_chunks(hits)] == [PASSAGE]
+
+
+def test_distinct_sources_and_pages_stay_apart():
+    hits = [
+        _hit(0.9, PASSAGE[:100], start=0),
+        _hit(0.8, PASSAGE[:100], source="faq.txt", start=0),
+        _hit(0.7, PASSAGE[80:180], start=80, page=2),
+    ]
+
+    spans = merge_chunks(hits)
+
+    assert len(spans) == 2  # The FAQ copy is a duplicate text; page 2 is its own span
+    assert [span.score for span in spans] == [0.9, 0.7]
+
+
+def test_pack_drops_lower_spans_past_the_budget():
+    first = "Shipping is free on orders over fifty dollars."
+    second = "Support is available by chat every day of the week."
+    hits = [_hit(0.9, first, source="a.txt"), _hit(0.5, second, source="b.txt")]
+
+    packed = pack_context(hits, token_budget=count_tokens(first) + 1)
+
+    assert packed.text == first
+    assert packed.spans == 1
+    assert packed.sources == ["a.txt"]
+    assert packed.tokens <= count_tokens(first) + 1
+
+
+def test_pack_keeps_everything_within_budget():
+    hits = [_hit(0.9, PASSAGE[:100], start=0), _hit(0.8, PASSAGE[80:], start=80)]
+
+    packed = pack_context(hits, token_budget=0)  # 0 means unlimited
+
+    assert packed.text == PASSAGE
+    assert packed.chunks == 2 and packed.spans == 1
+    assert packed.tokens_saved > 0
+
+
+def test_over_budget_top_span_is_truncated_at_a_sentence_end():
+    budget = count_tokens(PASSAGE) // 2
+
+    packed = pack_context([_hit(0.9, PASSAGE)], token_budget=budget)
+
+    assert packed.text
+    assert PASSAGE.startswith(packed.text)
+    assert packed.text.endswith(".")
+    assert packed.tokens <= budget
+
+
+def test_truncate_to_tokens():
+    assert truncate_to_tokens(PASSAGE, 0) == ""
+    assert truncate_to_tokens(PASSAGE, count_tokens(PASSAGE)) == PASSAGE
+    assert count_tokens(truncate_to_tokens(PASSAGE, 5)) <= 5
+
+
+def test_no_hits_pack_to_nothing():
+    packed = pack_context([], token_budget=100)
+
+    assert packed.text == "" and packed.tokens == 0 and packed.sources == []
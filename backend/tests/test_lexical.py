@@ -0,0 +1,58 @@
+"""BM25 lexical index: code-aware tokenizing, ranking, updates and persistence."""
+from app.modules.chatbot.lexical import LexicalIndex, tokenize
+
+DOCS = {
+    "manual": "The XR2.5 blender has a 1200 W motor and a glass jar.",
+    "warranty": "Warranty claims for SKU-4411 need the original receipt.",
+    "shipping": "Shipping is free on orders over fifty dollars.",
+}
+
+
+def _index(tmp_path):
+    index = LexicalIndex(str(tmp_path))
+    index.add(list(DOCS), list(DOCS.values()))
+    return index
+
+
+def test_tokenize_expands_product_codes():
+    terms = tokenize("Is SKU-4411 covered?")
+
+    assert {"sku-4411", "sku4411", "sku", "4411", "covered"} <= set(terms)
+    assert "is" not in terms
+
+
+def test_code_spellings_match_each_other(tmp_path):
+    index = _index(tmp_path)
+
+    for query in ("SKU-4411", "sku 4411", "sku4411"):
+        assert index.search(query, k=1)[0][1] == "warranty"
+    assert index.search("xr2.5 motor", k=1)[0][1] == "manual"
+
+
+def test_rarer_terms_rank_higher(tmp_path):
+    index = _index(tmp_path)
+    index.add(["receipt"], ["Keep the receipt for the blender."])
+
+    ranked = [chunk_id for _, chunk_id in index.search("blender warranty", k=3)]
+
+    assert ranked[0] == "warranty"  # "warranty" is rarer than "blender"
+    assert set(ranked) == {"warranty", "manual", "receipt"}
+
+
+def test_replace_and_delete(tmp_path):
+    index = _index(tmp_path)
+    index.add(["shipping"], ["Express delivery costs ten dollars."])
+
+    assert index.search("free orders") == []
+    assert index.search("express", k=1)[0][1] == "shipping"
+    assert index.delete(["shipping", "missing"]) == 1
+    assert len(index) == 2
+
+
+def test_save_and_reload(tmp_path):
+    index = _index(tmp_path)
+    index.save()
+
+    reloaded = LexicalIndex(str(tmp_path))
+    assert reloaded.ids() == set(DOCS)
+    assert reloaded.search("glass jar") == index.search("glass jar")
@@ -0,0 +1,79 @@
+"""Long-form synthesis must stitch into one clip even when chunks fail over."""
+import asyncio
+
+from app.modules.avatar.mp3 import MP3Error, concat_mp3, parse_mp3
+from app.modules.avatar.tts import TTSManager
+from app.modules.avatar.tts_backends import TTSBackend
+from app.modules.shared.config import settings
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz, joint stereo (Resemble-like)
+PROVIDER_FRAME = bytes.fromhex("fffb9064") + b"\0" * 413
+# MPEG-2 Layer III, 64 kbps, 22.05 kHz, mono (espeak through ffmpeg)
+LOCAL_FRAME = bytes.fromhex("fff380c0") + b"\0" * 204
+
+
+class FakeBackend(TTSBackend):
+    def __init__(self, name, namespace, frame, fail_on=()):
+        self.name = name
+        self.voice_key = name
+        self.namespace = namespace
+        self.frame = frame
+        self.fail_on = fail_on
+
+    @property
+    def available(self):
+        return True
+
+    async def synthesize(self, text):
+        if any(marker in text for marker in self.fail_on):
+            raise RuntimeError("503 Service Unavailable")
+        return self.frame * 8
+
+    def synthesize_sync(self, text):
+        if any(marker in text for marker in self.fail_on):
+            raise RuntimeError("503 Service Unavailable")
+        return self.frame * 8
+
+
+def _manager(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "tts_cache_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "tts_chunk_chars", 60)
+    monkeypatch.setattr(settings, "tts_latency_slo", 0.0)
+    manager = TTSManager()
+    manager.primary = FakeBackend("Resemble.ai", "project", PROVIDER_FRAME, fail_on=("flaky",))
+    manager.local = FakeBackend("local", "local", LOCAL_FRAME)
+    return manager
+
+
+TEXT = (
+    "The first sentence is rendered by the provider without trouble. "
+    "The second sentence hits a flaky provider and falls back locally. "
+    "The third sentence is rendered by the provider again."
+)
+
+
+def test_mixed_formats_cannot_be_joined_directly():
+    try:
+        concat_mp3([PROVIDER_FRAME * 2, LOCAL_FRAME * 2])
+    except MP3Error:
+        return
+    raise AssertionError("concat_mp3 joined clips with different formats")
+
+
+def test_long_form_rerenders_chunks_onto_the_fallback_voice(tmp_path, monkeypatch):
+    manager = _manager(tmp_path, monkeypatch)
+
+    speech = asyncio.run(manager.text_to_speech_long_async(TEXT))
+
+    info = parse_mp3(speech.audio)
+    assert len(speech.chunks) >= 3
+    assert (info.sample_rate, info.channels) == (22050, 1)
+    assert abs(info.duration - speech.duration) < 1e-6
+
+
+def test_blocking_long_form_rerenders_chunks_onto_the_fallback_voice(tmp_path, monkeypatch):
+    manager = _manager(tmp_path, monkeypatch)
+
+    info = parse_mp3(manager.text_to_speech(TEXT))
+
+    assert (info.sample_rate, info.channels) == (22050, 1)
@@ -0,0 +1,97 @@
+"""In-memory MP3 parsing: plain frames, Xing/LAME and VBRI headers, damaged input."""
+import struct
+
+import pytest
+
+from app.modules.avatar.mp3 import MP3Error, MP3Info, parse_mp3
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz, joint stereo: 417-byte frames
+HEADER = bytes.fromhex("fffb9064")
+FRAME_LENGTH = 417
+SAMPLES = 1152
+RATE = 44100
+SIDE_INFO = 32  # Xing tag follows the header and side info
+
+
+def _frame(body: bytes = b"") -> bytes:
+    return (HEADER + body).ljust(FRAME_LENGTH, b"\0")
+
+
+def _xing_frame(frames: int, delay: int = 0, padding: int = 0, tag: bytes = b"Info") -> bytes:
+    body = b"\0" * SIDE_INFO + tag + struct.pack(">II", 0x1, frames)
+    lame = b"LAME3.100" + b"\0" * 12 + ((delay << 12) | padding).to_bytes(3, "big")
+    return _frame(body + lame)
+
+
+def _vbri_frame(frames: int, delay: int) -> bytes:
+    return _frame(b"\0" * 32 + b"VBRI" + struct.pack(">HHHII", 1, delay, 75, 0, frames))
+
+
+def test_plain_frames_give_exact_duration():
+    info = parse_mp3(_frame() * 10)
+
+    assert info.frame_count == 10
+    assert info.duration == pytest.approx(10 * SAMPLES / RATE)
+    assert (info.sample_rate, info.channels, info.version, info.layer) == (RATE, 2, 1.0, 3)
+    assert info.bitrate == pytest.approx(128000, rel=0.01)
+    assert list(info.frame_offsets) == [i * FRAME_LENGTH for i in range(10)]
+    assert not info.vbr
+
+
+def test_id3v2_tag_and_trailing_garbage_are_skipped():
+    id3 = b"ID3\x04\x00\x00" + bytes([0, 0, 0, 20]) + b"\0" * 20
+    info = parse_mp3(id3 + _frame() * 3 + b"TAG" + b"\0" * 125)
+
+    assert info.audio_start == len(id3)
+    assert info.frame_count == 3
+
+
+def test_xing_lame_header_sets_count_and_gapless_trim():
+    data = _xing_frame(frames=20, delay=576, padding=1000) + _frame() * 20
+    info = parse_mp3(data)
+
+    assert info.audio_start == FRAME_LENGTH  # The Info frame carries no audio
+    assert info.frame_count == 20
+    assert (info.encoder_delay, info.encoder_padding) == (576, 1000)
+    assert info.duration == pytest.approx((20 * SAMPLES - 576 - 1000) / RATE)
+    assert not info.vbr
+
+
+def test_xing_tag_marks_vbr():
+    assert parse_mp3(_xing_frame(frames=4, tag=b"Xing") + _frame() * 4).vbr
+
+
+def test_vbri_header():
+    info = parse_mp3(_vbri_frame(frames=8, delay=576) + _frame() * 8)
+
+    assert info.vbr
+    assert info.encoder_delay == 576
+    assert info.duration == pytest.approx((8 * SAMPLES - 576) / RATE)
+
+
+def test_truncated_final_frame_is_ignored():
+    info = parse_mp3(_frame() * 5 + _frame()[:100])
+
+    assert info.frame_count == 5
+    assert info.audio_end == 5 * FRAME_LENGTH
+
+
+def test_truncated_info_frame_raises_mp3_error():
+    data = HEADER + b"\0" * SIDE_INFO + b"Xing" + struct.pack(">I", 0x1)  # Frame count cut off
+
+    with pytest.raises(MP3Error):
+        parse_mp3(data)
+
+
+def test_non_mp3_bytes_raise_mp3_error():
+    with pytest.raises(MP3Error):
+        parse_mp3(b"RIFF" + b"\0" * 400)
+
+
+def test_metadata_round_trip():
+    info = parse_mp3(_xing_frame(frames=6, delay=576, padding=200) + _frame() * 6)
+    restored = MP3Info.from_meta(info.to_meta())
+
+    assert restored.duration == info.duration
+    assert (restored.audio_start, restored.audio_end) == (info.audio_start, info.audio_end)
+    assert MP3Info.from_meta({"duration": 1.0}) is None
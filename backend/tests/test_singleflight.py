@@ -0,0 +1,88 @@
+"""SingleFlight coalescing, led flights and cancellation isolation."""
+import asyncio
+
+import pytest
+
+from app.modules.shared.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flights = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "audio"
+
+    async def main():
+        return await asyncio.gather(*(flights.do("k", work) for _ in range(5)))
+
+    assert asyncio.run(main()) == ["audio"] * 5
+    assert len(calls) == 1
+    assert flights.stats == {"executions": 1, "coalesced": 4}
+    assert flights.in_flight() == 0
+
+
+def test_errors_reach_every_waiter_and_are_not_cached():
+    flights = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("503")
+
+    async def main():
+        results = await asyncio.gather(flights.do("k", fail), flights.do("k", fail), return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+        return await flights.do("k", lambda: asyncio.sleep(0, result="retry"))
+
+    assert asyncio.run(main()) == "retry"
+
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    flights = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.02)
+        return "audio"
+
+    async def main():
+        first = asyncio.ensure_future(flights.do("k", work))
+        second = asyncio.ensure_future(flights.do("k", work))
+        await asyncio.sleep(0.005)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(main()) == "audio"
+
+
+def test_claimed_flight_is_joined_by_do():
+    flights = SingleFlight()
+
+    async def main():
+        flight = flights.claim("k")
+        assert flights.claim("k") is None
+        waiter = asyncio.ensure_future(flights.do("k", lambda: asyncio.sleep(0, result="duplicate")))
+        await asyncio.sleep(0)
+        assert flights.joined("k") == 1
+        flight.set_result("streamed")
+        result = await waiter
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(main()) == "streamed"
+    assert flights.in_flight() == 0 and flights.joined("k") == 0
+
+
+def test_cancelled_claim_fails_waiters():
+    flights = SingleFlight()
+
+    async def main():
+        flight = flights.claim("k")
+        waiter = asyncio.ensure_future(flights.do("k", lambda: asyncio.sleep(0)))
+        await asyncio.sleep(0)
+        flight.cancel()
+        await waiter
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(main())
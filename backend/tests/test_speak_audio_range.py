@@ -0,0 +1,102 @@
+"""Byte ranges, validators and cache headers for /api/avatar/speak-audio cache hits."""
+import asyncio
+import importlib
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+
+from app.modules.avatar.tts import CachedClip
+
+avatar_router = importlib.import_module("app.modules.avatar.router")
+
+AUDIO = bytes(range(256)) * 4
+ETAG = "abc123"
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        (None, None),
+        ("bytes=0-99", (0, 99)),
+        ("bytes=1000-", (1000, 1023)),
+        ("bytes=-24", (1000, 1023)),  # Suffix range: last 24 bytes
+        ("bytes=-5000", (0, 1023)),  # Longer suffix than the clip
+        ("bytes=1000-5000", (1000, 1023)),  # End clamped to the clip
+        ("bytes=0-1,5-9", None),  # Multi-range gets the full clip
+        ("items=0-9", None),
+        ("bytes=a-b", None),
+    ],
+)
+def test_parse_range(header, expected):
+    assert avatar_router._parse_range(header, len(AUDIO)) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=1024-", "bytes=2000-3000", "bytes=-0"])
+def test_unsatisfiable_range_is_416(header):
+    with pytest.raises(HTTPException) as excinfo:
+        avatar_router._parse_range(header, len(AUDIO))
+
+    assert excinfo.value.status_code == 416
+    assert excinfo.value.headers["Content-Range"] == f"bytes */{len(AUDIO)}"
+
+
+class FakeManager:
+    def __init__(self, path, local=False):
+        self.clip = CachedClip(str(path), len(AUDIO), ETAG, local=local)
+
+    def cached_clip(self, text):
+        return self.clip
+
+
+def _get(monkeypatch, tmp_path, headers, local=False):
+    path = tmp_path / "clip.mp3"
+    path.write_bytes(AUDIO)
+    monkeypatch.setattr(avatar_router, "tts_manager", FakeManager(path, local))
+    app = FastAPI()
+    app.include_router(avatar_router.router)
+
+    async def request():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/api/avatar/speak-audio", params={"text": "hi"}, headers=headers)
+
+    return asyncio.run(request())
+
+
+def test_range_request_gets_partial_content(monkeypatch, tmp_path):
+    response = _get(monkeypatch, tmp_path, {"range": "bytes=-24"})
+
+    assert response.status_code == 206
+    assert response.content == AUDIO[-24:]
+    assert response.headers["content-range"] == f"bytes 1000-1023/{len(AUDIO)}"
+    assert response.headers["etag"] == f'"{ETAG}"'
+
+
+def test_matching_if_none_match_is_304(monkeypatch, tmp_path):
+    response = _get(monkeypatch, tmp_path, {"if-none-match": f'W/"{ETAG}"'})
+
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+def test_stale_if_range_gets_the_whole_clip(monkeypatch, tmp_path):
+    response = _get(monkeypatch, tmp_path, {"range": "bytes=0-9", "if-range": '"stale"'})
+
+    assert response.status_code == 200
+    assert response.content == AUDIO
+
+
+def test_current_if_range_honours_the_range(monkeypatch, tmp_path):
+    response = _get(monkeypatch, tmp_path, {"range": "bytes=0-9", "if-range": f'"{ETAG}"'})
+
+    assert response.status_code == 206
+    assert response.content == AUDIO[:10]
+
+
+def test_local_tier_clip_is_not_cacheable(monkeypatch, tmp_path):
+    response = _get(monkeypatch, tmp_path, {"if-none-match": f'"{ETAG}"'}, local=True)
+
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "no-store"
+    assert "etag" not in response.headers
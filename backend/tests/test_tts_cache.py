@@ -0,0 +1,125 @@
+"""TTSCache byte budgets, eviction order, persistence and index batching."""
+import json
+import os
+
+import pytest
+
+from app.modules.avatar.tts_cache import TTSCache
+
+
+def _cache(tmp_path, memory=1000, disk=1000, policy="lru"):
+    return TTSCache(str(tmp_path), memory_budget=memory, disk_budget=disk, policy=policy)
+
+
+def _clock(monkeypatch):
+    """Distinct access times so LRU order does not depend on timer resolution"""
+    ticks = iter(range(1, 10_000))
+    monkeypatch.setattr("app.modules.avatar.tts_cache.time.time", lambda: float(next(ticks)))
+
+
+def test_keys_normalize_whitespace_and_unicode():
+    assert TTSCache.make_key("v", "p", "Café  au\tlait") == TTSCache.make_key("v", "p", "Café au lait")
+    assert TTSCache.make_key("v", "p", "hello") != TTSCache.make_key("v", "other", "hello")
+
+
+def test_disk_budget_evicts_least_recently_used(tmp_path, monkeypatch):
+    _clock(monkeypatch)
+    cache = _cache(tmp_path, memory=0, disk=250)
+    for key in ("a", "b"):
+        cache.put(key, key.encode() * 100)
+    cache.get("a")  # "b" is now the oldest
+    cache.put("c", b"c" * 100)
+
+    assert "b" not in cache
+    assert cache.get("a") == b"a" * 100
+    assert not os.path.exists(tmp_path / "b.mp3")
+    assert cache.status()["disk_bytes"] == 200
+    assert cache.stats["disk_evictions"] == 1
+
+
+def test_lfu_evicts_least_used(tmp_path, monkeypatch):
+    _clock(monkeypatch)
+    cache = _cache(tmp_path, memory=0, disk=250, policy="lfu")
+    cache.put("a", b"a" * 100)
+    cache.put("b", b"b" * 100)
+    for _ in range(3):
+        cache.get("a")
+    cache.get("b")
+    cache.put("c", b"c" * 100)
+
+    assert "a" in cache and "c" in cache
+    assert "b" not in cache
+
+
+def test_memory_budget_keeps_disk_copy(tmp_path):
+    cache = _cache(tmp_path, memory=150, disk=1000)
+    cache.put("a", b"a" * 100)
+    cache.put("b", b"b" * 100)
+
+    status = cache.status()
+    assert status["memory_entries"] == 1 and status["memory_bytes"] == 100
+    assert cache.get("a") == b"a" * 100  # Served from disk
+    assert cache.stats["disk_hits"] == 1
+
+
+def test_oversized_clip_skips_the_tiers_it_exceeds(tmp_path):
+    cache = _cache(tmp_path, memory=50, disk=80)
+    cache.put("big", b"x" * 100)
+
+    assert "big" not in cache
+    assert cache.status()["memory_bytes"] == 0
+
+
+def test_reput_replaces_memory_bytes(tmp_path):
+    cache = _cache(tmp_path)
+    cache.put("k", b"old" * 10, meta={"etag": "old"})
+    cache.put("k", b"new" * 20, meta={"etag": "new"})
+
+    assert cache.get("k") == b"new" * 20
+    assert cache.status()["memory_bytes"] == 60
+    assert cache.get_meta("k") == {"etag": "new"}
+
+
+def test_index_writes_are_batched_until_flush(tmp_path):
+    cache = _cache(tmp_path)
+    index_path = tmp_path / TTSCache.INDEX_FILE
+    cache.put("k", b"k" * 10, meta={"duration": 1.5})
+
+    assert json.loads(index_path.read_text())["entries"] == {}
+    cache.flush()
+    assert json.loads(index_path.read_text())["entries"]["k"]["meta"] == {"duration": 1.5}
+
+
+def test_reload_keeps_clips_and_metadata(tmp_path):
+    cache = _cache(tmp_path)
+    cache.put("k", b"k" * 10, meta={"duration": 1.5})
+    cache.flush()
+
+    reloaded = _cache(tmp_path)
+    assert reloaded.get("k") == b"k" * 10
+    assert reloaded.get_meta("k") == {"duration": 1.5}
+
+
+def test_reload_recovers_clips_missing_from_the_index(tmp_path):
+    cache = _cache(tmp_path)
+    cache.put("k", b"k" * 10)  # Never flushed, as after a crash
+    (tmp_path / "stale.frames").write_bytes(b"\0")
+
+    reloaded = _cache(tmp_path)
+    assert reloaded.get("k") == b"k" * 10
+    assert not (tmp_path / "stale.frames").exists()
+
+
+def test_reload_enforces_a_smaller_budget(tmp_path):
+    cache = _cache(tmp_path, disk=1000)
+    for key in "abc":
+        cache.put(key, key.encode() * 100)
+    cache.flush()
+
+    reloaded = _cache(tmp_path, disk=150)
+    assert reloaded.status()["disk_bytes"] <= 150
+
+
+def test_unknown_policy_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        _cache(tmp_path, policy="fifo")
@@ -23,6 +23,12 @@ import DeleteIcon from '@mui/icons-material/Delete';
 import { useAppContext } from '../shared/AppContext';
 import { chatbotAPI, avatarAPI } from '../../services/api';
 
+// crypto.randomUUID only exists in secure contexts (https or localhost)
+const newSessionId = () =>
+  typeof crypto !== 'undefined' && typeof crypto.randomUUID === 'function'
+    ? crypto.randomUUID()
+    : `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}${Math.random().toString(36).slice(2)}`;
+
 const ChatModule = () => {
   const {
     messages,
@@ -38,6 +44,11 @@ const ChatModule = () => {
   const [uploadStatus, setUploadStatus] = useState('');
   const messagesEndRef = useRef(null);
   const fileInputRef = useRef(null);
+  // Conversation history lives server-side under this id
+  const sessionIdRef = useRef(null);
+  if (sessionIdRef.current === null) {
+    sessionIdRef.current = newSessionId();
+  }
 
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
@@ -66,7 +77,8 @@ const ChatModule = () => {
       const response = await chatbotAPI.query(
         userMessage,
         settings.provider,
-        settings.useRag
+        settings.useRag,
+        sessionIdRef.current
       );
 
       // Add bot response
@@ -130,8 +142,20 @@ const ChatModule = () => {
     setUploadStatus('Uploading...');
 
     try {
-      const result = await chatbotAPI.uploadDocuments(files);
-      setUploadStatus(`Uploaded ${files.length} file(s). Added ${result.chunks_added} chunks.`);
+      const { job_id: jobId } = await chatbotAPI.uploadDocuments(files);
+
+      // Indexing runs in the background; poll the job until it finishes
+      let job = await chatbotAPI.getIngestJob(jobId);
+      while (job.status === 'queued' || job.status === 'running') {
+        setUploadStatus(`Indexing ${job.files_done}/${job.files_total} file(s)... ${job.chunks_added} chunks`);
+        await new Promise(resolve => setTimeout(resolve, 1000));
+        job = await chatbotAPI.getIngestJob(jobId);
+      }
+
+      if (job.status === 'failed') {
+        throw new Error(job.error);
+      }
+      setUploadStatus(`Uploaded ${files.length} file(s). Added ${job.chunks_added} chunks.`);
       setTimeout(() => setUploadStatus(''), 3000);
     } catch (error) {
       console.error('Error uploading files:', error);
@@ -300,7 +324,11 @@ const ChatModule = () => {
       {messages.length > 0 && (
         <Button
           size="small"
-          onClick={clearMessages}
+          onClick={() => {
+            clearMessages();
+            // A cleared chat starts a fresh server-side conversation
+            sessionIdRef.current = newSessionId();
+          }}
           sx={{ mt: 1 }}
         >
           Clear Chat
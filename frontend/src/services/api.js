@@ -33,11 +33,12 @@ api.interceptors.response.use(
 
 // Chatbot API
 export const chatbotAPI = {
-  query: async (query, provider = 'gemini', useRag = true) => {
+  query: async (query, provider = 'gemini', useRag = true, sessionId = null) => {
     const response = await api.post('/api/chatbot/query', {
       query,
       provider,
       use_rag: useRag,
+      session_id: sessionId,
     });
     return response.data;
   },
@@ -56,6 +57,11 @@ export const chatbotAPI = {
     return response.data;
   },
 
+  getIngestJob: async (jobId) => {
+    const response = await api.get(`/api/chatbot/documents/jobs/${jobId}`);
+    return response.data;
+  },
+
   loadDirectory: async (directory = 'data') => {
     const response = await api.post('/api/chatbot/documents/load-directory', null, {
       params: { directory },